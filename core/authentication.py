@@ -0,0 +1,152 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject, empty
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+# claims added by core.serializers.TokenObtainPairSerializer
+CLAIMS = ("is_staff", "customer_id")
+
+
+class UserStatusCache:
+    """
+    Per-process TTL cache of (is_active, is_staff) by user id, so a
+    deactivated or demoted user loses access within `ttl` seconds without
+    a query on every request. User saves and deletes in this process
+    invalidate their entry at once (see core.signals.handlers).
+    """
+
+    def __init__(self, ttl=None, max_size=10000):
+        self._ttl = ttl
+        self.max_size = max_size
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def ttl(self):
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, "CORE_AUTH_STATUS_TTL", 30)
+
+    def get(self, user_id):
+        """Return (is_active, is_staff), or None if the user does not exist."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        status = (
+            get_user_model()
+            .objects.filter(pk=user_id)
+            .values_list("is_active", "is_staff")
+            .first()
+        )
+        with self._lock:
+            if len(self._entries) >= self.max_size:
+                self._entries.clear()
+            self._entries[user_id] = (now + self.ttl, status)
+        return status
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_status = UserStatusCache()
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    The authenticated user as described by the token claims. id, pk,
+    is_staff and customer_id are answered from the claims; anything else
+    (names, permissions, save()) loads the User row on first use.
+    """
+
+    def __init__(self, user_id, is_staff, customer_id):
+        self.__dict__["_claims"] = {
+            "id": user_id,
+            "is_staff": is_staff,
+            "customer_id": customer_id,
+        }
+        super().__init__(
+            lambda: get_user_model().objects.get(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        )
+
+    def _claim(self, name):
+        if self._wrapped is empty:
+            return self.__dict__["_claims"][name]
+        return getattr(self._wrapped, name)
+
+    @property
+    def id(self):
+        return self._claim("id")
+
+    @property
+    def pk(self):
+        return self._claim("id")
+
+    @property
+    def is_staff(self):
+        return self._claim("is_staff")
+
+    @property
+    def customer_id(self):
+        return self.__dict__["_claims"]["customer_id"]
+
+    @property
+    def is_active(self):
+        return True
+
+    @property
+    def is_authenticated(self):
+        return True
+
+    @property
+    def is_anonymous(self):
+        return False
+
+    def __bool__(self):
+        # permission classes test `request.user and ...`
+        return True
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that trusts the user id, is_staff and customer_id
+    claims instead of loading the User on every request. Whether the user
+    still exists, is active and is staff is checked against UserStatusCache.
+    Tokens issued without the claims fall back to loading the user.
+    """
+
+    status_cache = user_status
+
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in CLAIMS):
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        status = self.status_cache.get(user_id)
+        if status is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        is_active, is_staff = status
+        if not is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return ClaimsUser(
+            user_id,
+            # a demotion takes effect without waiting for the token to expire
+            is_staff=validated_token["is_staff"] and is_staff,
+            customer_id=validated_token["customer_id"],
+        )
@@ -0,0 +1,124 @@
+import statistics
+import threading
+import time
+from functools import wraps
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.test import RequestFactory
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from storefront.db import pool
+from storefront.db.backends.pooled import PooledDatabaseWrapperMixin
+from store.models import Cart
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive a cheap endpoint (cart retrieve) through the WSGI handler from "
+        "several threads, with the connection pool off and then on, and report "
+        "p50/p99 latency. --connect-delay stands in for the network handshake "
+        "of a remote database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--database", default="default")
+        parser.add_argument(
+            "--connect-delay",
+            type=float,
+            default=0,
+            help="Milliseconds added to every new connection.",
+        )
+
+    def handle(self, *args, **options):
+        alias = options["database"]
+        connection = connections[alias]
+        if not isinstance(connection, PooledDatabaseWrapperMixin):
+            raise CommandError(
+                f"Database {alias!r} does not use a storefront.db.backends engine."
+            )
+        settings_dict = connections.settings[alias]
+        configured = settings_dict.get("POOL")
+        pool_options = configured or {"MAX_SIZE": options["threads"]}
+        delay = options["connect_delay"] / 1000
+        # the engine's own DatabaseWrapper, below the pooling mixin
+        backend_class = next(
+            cls
+            for cls in type(connection).__mro__
+            if "get_new_connection" in vars(cls)
+            and not issubclass(cls, PooledDatabaseWrapperMixin)
+        )
+        get_new_connection = backend_class.get_new_connection
+
+        @wraps(get_new_connection)
+        def slow_get_new_connection(self, conn_params):
+            time.sleep(delay)
+            return get_new_connection(self, conn_params)
+
+        setup_test_environment()
+        backend_class.get_new_connection = slow_get_new_connection
+        cart = Cart.objects.create()
+        try:
+            application = get_wsgi_application()
+            for label, options_for_run in [("off", None), ("on", pool_options)]:
+                settings_dict["POOL"] = options_for_run
+                connections.close_all()
+                latencies = self.run_load(
+                    application,
+                    f"/store/cart/{cart.pk}/",
+                    options["requests"],
+                    options["threads"],
+                )
+                stats = pool.pool_stats().get(alias, {})
+                self.stdout.write(
+                    f"pool {label:<3} p50 {self.percentile(latencies, 50):7.2f}ms "
+                    f"p99 {self.percentile(latencies, 99):7.2f}ms "
+                    f"mean {statistics.mean(latencies):7.2f}ms"
+                    + (
+                        f"  connects {stats['connects']} checkouts {stats['checkouts']}"
+                        if options_for_run
+                        else ""
+                    )
+                )
+        finally:
+            backend_class.get_new_connection = get_new_connection
+            settings_dict["POOL"] = configured
+            cart.delete()
+            teardown_test_environment()
+
+    def run_load(self, application, path, requests, threads):
+        factory = RequestFactory()
+        latencies = []
+        failures = []
+        lock = threading.Lock()
+        per_thread = requests // threads
+
+        def worker():
+            local = []
+            for _ in range(per_thread):
+                environ = factory.get(path).environ
+                started = time.perf_counter()
+                response = application(environ, lambda status, headers: None)
+                b"".join(response)
+                response.close()
+                local.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    failures.append(response.status_code)
+            with lock:
+                latencies.extend(local)
+
+        pool_threads = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in pool_threads:
+            thread.start()
+        for thread in pool_threads:
+            thread.join()
+        if failures:
+            raise CommandError(f"{path} failed {len(failures)} times: {failures[0]}")
+        return latencies
+
+    def percentile(self, values, percent):
+        values = sorted(values)
+        return values[min(len(values) - 1, int(len(values) * percent / 100))]
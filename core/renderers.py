@@ -0,0 +1,82 @@
+"""
+JSON rendering through orjson when it is installed.
+
+FastJSONRenderer produces the same document as DRF's JSONRenderer with
+COMPACT_JSON and UNICODE_JSON (the defaults). Decimal, UUID and datetimes are
+encoded with DRF's own rules, and \\u2028/\\u2029 are escaped. Indented output
+(the browsable API, `Accept: application/json; indent=4`), payloads orjson
+cannot encode, and installs without orjson all go through the stdlib path
+of JSONRenderer. The one visible difference is that orjson writes floats
+in exponent form without a plus sign (1e16, not 1e+16); the values are equal.
+
+Views may return a PreRenderedJSON (see store.cache.CatalogCacheMixin) to
+send bytes that were already encoded as they are.
+"""
+import json
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+_default = JSONEncoder().default
+
+
+def dumps(data):
+    """Encode `data` as FastJSONRenderer does without indentation."""
+    if orjson is not None:
+        try:
+            content = orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits
+            pass
+        else:
+            if b"\xe2\x80\xa8" in content or b"\xe2\x80\xa9" in content:
+                content = content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                    b"\xe2\x80\xa9", b"\\u2029"
+                )
+            return content
+    return JSONRenderer().render(data)
+
+
+class PreRenderedJSON:
+    """Response data that FastJSONRenderer sends without encoding it again."""
+
+    __slots__ = ("content",)
+
+    def __init__(self, content):
+        self.content = content
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(dumps(data))
+
+    @property
+    def data(self):
+        return json.loads(self.content)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if isinstance(data, PreRenderedJSON):
+            if indent is None:
+                return data.content
+            data = data.data
+        if (
+            indent is not None
+            or orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or not self.strict
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
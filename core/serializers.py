@@ -1,6 +1,10 @@
 from djoser.serializers import UserCreateSerializer as BaseUserCreateSerializer
 from djoser.serializers import UserSerializer
-from store import serializers
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer as BaseTokenObtainPairSerializer,
+)
+
+from store.models import Customer
 
 
 class UserCreateSerializer(BaseUserCreateSerializer):
@@ -11,3 +15,19 @@ class UserCreateSerializer(BaseUserCreateSerializer):
 class SimpleUserSerializer(UserSerializer):
     class Meta(UserSerializer.Meta):
         fields = ["id", "username", "email", "first_name", "last_name"]
+
+
+class TokenObtainPairSerializer(BaseTokenObtainPairSerializer):
+    """
+    Adds the claims read by core.authentication.ClaimsJWTAuthentication.
+    Access tokens minted from the refresh token copy them.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["is_staff"] = user.is_staff
+        token["customer_id"] = (
+            Customer.objects.filter(user=user).values_list("id", flat=True).first()
+        )
+        return token
@@ -1,7 +1,17 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+
+from core.authentication import user_status
 from store.signals import order_created
 
 
 @receiver(order_created)
 def on_order_created(sender, **kwargs):
     print(f'{kwargs["order"]} has been successfully created')
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_status(sender, instance, **kwargs):
+    user_status.invalidate(instance.pk)
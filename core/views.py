@@ -1,3 +1,10 @@
 from django.shortcuts import render
+from rest_framework_simplejwt import views as jwt_views
+
+from .serializers import TokenObtainPairSerializer
 
 # Create your views here.
+
+
+class TokenObtainPairView(jwt_views.TokenObtainPairView):
+    serializer_class = TokenObtainPairSerializer
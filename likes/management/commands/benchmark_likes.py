@@ -0,0 +1,171 @@
+import statistics
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from core.models import User
+from likes.models import LikeCounter, LikedItem
+from store.models import Collection, Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Have --threads threads like (and then partly unlike) one product for "
+        "--users users each, with one counter shard and with "
+        "LIKES_COUNTER_SHARDS, failing on a lost or duplicated like. Then "
+        "compare resolving counts and 'liked by me' for a page of products "
+        "in batch against per-product queries. Use "
+        "--settings=storefront.settings_benchmark to run on SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--users", type=int, default=100, help="Per thread.")
+        parser.add_argument("--shards", type=int, default=8)
+        parser.add_argument("--page", type=int, default=100)
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            # the default in-memory test database cannot take writes from
+            # several threads
+            test_settings = connection.settings_dict.setdefault("TEST", {})
+            if not test_settings.get("NAME"):
+                test_settings["NAME"] = str(
+                    Path(connection.settings_dict["NAME"]).with_name(
+                        "benchmark_likes.sqlite3"
+                    )
+                )
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run(self, options):
+        collection = Collection.objects.create(title="Collection")
+        Product.objects.bulk_create(
+            [
+                Product(
+                    title=f"Product {i}",
+                    slug=f"product-{i}",
+                    unit_price=1,
+                    inventory=10,
+                    collection=collection,
+                )
+                for i in range(options["page"] + 2)
+            ]
+        )
+        product_ids = list(Product.objects.order_by("id").values_list("id", flat=True))
+        # signals would create a Customer per user, which this does not need
+        User.objects.bulk_create(
+            [
+                User(username=f"user-{i}", email=f"user-{i}@example.com")
+                for i in range(options["threads"] * options["users"])
+            ]
+        )
+        users = list(User.objects.order_by("id"))
+
+        for number, shards in enumerate([1, options["shards"]]):
+            with override_settings(LIKES_COUNTER_SHARDS=shards):
+                self.like_concurrently(product_ids[number], users, shards, options)
+
+        self.resolve_page(product_ids[2:], users, options)
+
+    def like_concurrently(self, product_id, users, shards, options):
+        per_thread = options["users"]
+        errors = []
+        duplicates = []
+
+        def work(thread_users):
+            try:
+                for user in thread_users:
+                    LikedItem.objects.like(user, Product, product_id)
+                    # a double click
+                    if LikedItem.objects.like(user, Product, product_id):
+                        duplicates.append(user.pk)
+                for user in thread_users[::4]:
+                    LikedItem.objects.unlike(user, Product, product_id)
+            except Exception as e:
+                errors.append(repr(e))
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(
+                target=work, args=(users[i * per_thread : (i + 1) * per_thread],)
+            )
+            for i in range(options["threads"])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        liked = LikedItem.objects.filter(object_id=product_id).count()
+        counted = LikeCounter.objects.counts_for_many(Product, [product_id])[product_id]
+        expected = len(users) - len(range(0, per_thread, 4)) * options["threads"]
+        shard_rows = LikeCounter.objects.filter(object_id=product_id).count()
+        # like, double click and unlike are each one write
+        writes = len(users) * 2 + len(users[::4])
+        self.stdout.write(
+            f"{shards} shard(s): {len(users)} users, "
+            f"{options['threads']} threads, {elapsed:.2f}s, "
+            f"{writes / elapsed:.0f} writes/s; likes {liked}, counter {counted}, "
+            f"expected {expected}, {shard_rows} counter rows, "
+            f"{len(errors)} errors"
+        )
+        if errors or duplicates or not liked == counted == expected:
+            raise CommandError(
+                f"errors: {errors[:5]}, duplicate likes: {len(duplicates)}"
+            )
+
+    def resolve_page(self, page, users, options):
+        user = users[0]
+        for user_index, product_id in enumerate(page):
+            for liker in users[: user_index % 20]:
+                LikedItem.objects.like(liker, Product, product_id)
+
+        def per_product():
+            return {
+                product_id: (
+                    LikedItem.objects.filter(object_id=product_id).count(),
+                    LikedItem.objects.filter(user=user, object_id=product_id).exists(),
+                )
+                for product_id in page
+            }
+
+        def batched():
+            counts = LikeCounter.objects.counts_for_many(Product, page)
+            liked = LikedItem.objects.liked_by(user, Product, page)
+            return {
+                product_id: (counts[product_id], product_id in liked)
+                for product_id in page
+            }
+
+        results = []
+        for label, resolve in [("per product", per_product), ("batched", batched)]:
+            timings = []
+            for i in range(5):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    results.append(resolve())
+                    timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f"page of {len(page)}: {label:<12} {len(queries):>4} queries "
+                f"{statistics.median(timings):>8.2f}ms"
+            )
+        if results[0] != results[-1]:
+            raise CommandError("Batched likes differ from per-product queries")
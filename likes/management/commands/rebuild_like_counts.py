@@ -0,0 +1,93 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from likes.models import LikeCounter, LikedItem
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the sharded LikeCounter rows from LikedItem in batches of "
+        "objects, e.g. after bulk deletes that sent no signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only report objects whose count is out of date.",
+        )
+
+    def handle(self, *args, **options):
+        content_type_ids = set(
+            LikedItem.objects.values_list("content_type", flat=True).distinct()
+        ) | set(LikeCounter.objects.values_list("content_type", flat=True).distinct())
+        checked = mismatched = 0
+        for content_type_id in sorted(content_type_ids):
+            likes = LikedItem.objects.filter(content_type_id=content_type_id)
+            counters = LikeCounter.objects.filter(content_type_id=content_type_id)
+            last_id = -1
+            while True:
+                batch = sorted(
+                    set(self.next_ids(likes, last_id, options["batch_size"]))
+                    | set(self.next_ids(counters, last_id, options["batch_size"]))
+                )[: options["batch_size"]]
+                if not batch:
+                    break
+                in_batch = {"object_id__gt": last_id, "object_id__lte": batch[-1]}
+                last_id = batch[-1]
+                with transaction.atomic():
+                    # concurrent likes of these objects wait for the rebuild
+                    list(counters.select_for_update().filter(**in_batch))
+                    actual = dict(
+                        likes.filter(**in_batch)
+                        .order_by()
+                        .values_list("object_id")
+                        .annotate(likes=Count("id"))
+                    )
+                    stored = dict(
+                        counters.filter(**in_batch)
+                        .order_by()
+                        .values_list("object_id")
+                        .annotate(likes=Sum("count"))
+                    )
+                    stale = [
+                        object_id
+                        for object_id in batch
+                        if actual.get(object_id, 0) != stored.get(object_id, 0)
+                    ]
+                    for object_id in stale:
+                        self.stdout.write(
+                            f"{content_type_id}/{object_id}: "
+                            f"{stored.get(object_id, 0)} -> {actual.get(object_id, 0)}"
+                        )
+                    if stale and not options["verify"]:
+                        counters.filter(object_id__in=stale).delete()
+                        LikeCounter.objects.bulk_create(
+                            [
+                                LikeCounter(
+                                    content_type_id=content_type_id,
+                                    object_id=object_id,
+                                    shard=0,
+                                    count=actual[object_id],
+                                )
+                                for object_id in stale
+                                if actual.get(object_id)
+                            ]
+                        )
+                checked += len(batch)
+                mismatched += len(stale)
+
+        action = "found" if options["verify"] else "fixed"
+        self.stdout.write(
+            f"Checked {checked} objects, {action} {mismatched} stale counts."
+        )
+
+    def next_ids(self, queryset, last_id, batch_size):
+        return (
+            queryset.filter(object_id__gt=last_id)
+            .order_by("object_id")
+            .values_list("object_id", flat=True)
+            .distinct()[:batch_size]
+        )
@@ -0,0 +1,83 @@
+# Generated by Django 4.0 on 2026-10-18 21:25
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+import django.db.models.deletion
+
+
+def delete_duplicate_likes(apps, schema_editor):
+    # keep each user's first like of an object
+    LikedItem = apps.get_model('likes', 'LikedItem')
+    duplicates = (
+        LikedItem.objects.values('user', 'content_type', 'object_id')
+        .order_by()
+        .annotate(first_id=Min('id'), likes=Count('id'))
+        .filter(likes__gt=1)
+    )
+    for duplicate in duplicates.iterator():
+        LikedItem.objects.filter(
+            user=duplicate['user'],
+            content_type=duplicate['content_type'],
+            object_id=duplicate['object_id'],
+        ).exclude(pk=duplicate['first_id']).delete()
+
+
+def populate_like_counters(apps, schema_editor):
+    LikedItem = apps.get_model('likes', 'LikedItem')
+    LikeCounter = apps.get_model('likes', 'LikeCounter')
+    counts = (
+        LikedItem.objects.values_list('content_type', 'object_id')
+        .order_by()
+        .annotate(likes=Count('id'))
+    )
+    LikeCounter.objects.bulk_create(
+        (
+            LikeCounter(
+                content_type_id=content_type_id,
+                object_id=object_id,
+                shard=0,
+                count=likes,
+            )
+            for content_type_id, object_id, likes in counts.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('likes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LikeCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='likeditem',
+            index=models.Index(fields=['content_type', 'object_id'], name='likes_liked_content_7292dd_idx'),
+        ),
+        migrations.RunPython(delete_duplicate_likes, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='likeditem',
+            constraint=models.UniqueConstraint(fields=('user', 'content_type', 'object_id'), name='likes_likeditem_unique_user_object'),
+        ),
+        migrations.AddField(
+            model_name='likecounter',
+            name='content_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype'),
+        ),
+        migrations.AddConstraint(
+            model_name='likecounter',
+            constraint=models.UniqueConstraint(fields=('content_type', 'object_id', 'shard'), name='likes_likecounter_unique_shard'),
+        ),
+        migrations.RunPython(populate_like_counters, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,144 @@
+import random
+
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
+from django.db import IntegrityError, connections, models, router, transaction
+from django.db.models import Sum
 
 # Create your models here.
 
 
+class LikedItemManager(models.Manager):
+    """
+    Likes of objects of one model. LikeCounter keeps the number of likes
+    per object (see unlike and likes.signals), so none of these count
+    LikedItem rows.
+    """
+
+    def like(self, user, obj_type, obj_id):
+        """Like the object; returns False if the user already liked it."""
+        content_type = ContentType.objects.get_for_model(obj_type)
+        try:
+            with transaction.atomic(using=router.db_for_write(self.model)):
+                # user_id: request.user may be a lazy object answering pk only
+                self.create(
+                    user_id=user.pk, content_type=content_type, object_id=obj_id
+                )
+        except IntegrityError:
+            # the (user, content_type, object_id) constraint
+            return False
+        return True
+
+    def unlike(self, user, obj_type, obj_id):
+        """Remove the user's like; returns False if there was none."""
+        content_type = ContentType.objects.get_for_model(obj_type)
+        using = router.db_for_write(self.model)
+        with transaction.atomic(using=using):
+            # a raw DELETE sends no post_delete, and its rowcount tells
+            # whether this call removed the like: Model.delete() signals
+            # for rows an overlapping unlike already deleted, counting
+            # them twice
+            deleted = self.filter(
+                user_id=user.pk, content_type=content_type, object_id=obj_id
+            )._raw_delete(using)
+            if deleted:
+                LikeCounter.objects.add(content_type.pk, obj_id, -1)
+        return bool(deleted)
+
+    def liked_by(self, user, obj_type, obj_ids):
+        """The subset of `obj_ids` the user liked, in one query."""
+        content_type = ContentType.objects.get_for_model(obj_type)
+        return set(
+            self.filter(
+                user_id=user.pk, content_type=content_type, object_id__in=obj_ids
+            ).values_list("object_id", flat=True)
+        )
+
+
 class LikedItem(models.Model):
+    objects = LikedItemManager()
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey()
+
+    class Meta:
+        constraints = [
+            # also the index liked_by reads
+            models.UniqueConstraint(
+                fields=["user", "content_type", "object_id"],
+                name="likes_likeditem_unique_user_object",
+            )
+        ]
+        indexes = [models.Index(fields=["content_type", "object_id"])]
+
+
+class LikeCounterManager(models.Manager):
+    def add(self, content_type_id, obj_id, delta):
+        """
+        Add `delta` to a random shard of the object's counter in one
+        INSERT that falls back to incrementing the existing shard row.
+        Concurrent likes of one object mostly land on different rows, so
+        they do not queue on a single row lock.
+        """
+        shard = random.randrange(getattr(settings, "LIKES_COUNTER_SHARDS", 8))
+        connection = connections[router.db_for_write(self.model)]
+        opts = self.model._meta
+        quote = connection.ops.quote_name
+        table = quote(opts.db_table)
+        key_columns = [
+            quote(opts.get_field(name).column)
+            for name in ["content_type", "object_id", "shard"]
+        ]
+        count_column = quote(opts.get_field("count").column)
+        sql = (
+            f"INSERT INTO {table} ({', '.join(key_columns)}, {count_column}) "
+            f"VALUES (%s, %s, %s, %s) "
+        )
+        if connection.vendor == "mysql":
+            sql += (
+                f"ON DUPLICATE KEY UPDATE {count_column} = "
+                f"{count_column} + VALUES({count_column})"
+            )
+        else:
+            sql += (
+                f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET "
+                f"{count_column} = {table}.{count_column} + excluded.{count_column}"
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [content_type_id, obj_id, shard, delta])
+
+    def counts_for_many(self, obj_type, obj_ids):
+        """Return {object id: likes} for `obj_ids` in one query."""
+        content_type = ContentType.objects.get_for_model(obj_type)
+        counts = {obj_id: 0 for obj_id in obj_ids}
+        rows = (
+            self.filter(content_type=content_type, object_id__in=counts)
+            .order_by()
+            .values_list("object_id")
+            .annotate(count=Sum("count"))
+        )
+        counts.update(rows)
+        return counts
+
+
+class LikeCounter(models.Model):
+    """
+    One of the LIKES_COUNTER_SHARDS rows whose counts add up to an object's
+    likes. A single shard may go negative when unlikes land on it.
+    """
+
+    objects = LikeCounterManager()
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    shard = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_type", "object_id", "shard"],
+                name="likes_likecounter_unique_shard",
+            )
+        ]
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from likes.models import LikeCounter, LikedItem
+
+
+# deletions cascading from a user or content type arrive here too;
+# LikedItemManager.unlike counts its own. `manage.py rebuild_like_counts`
+# repairs counters after bulk changes
+@receiver(post_save, sender=LikedItem)
+def count_like(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        LikeCounter.objects.add(instance.content_type_id, instance.object_id, 1)
+
+
+@receiver(post_delete, sender=LikedItem)
+def count_unlike(sender, instance, **kwargs):
+    LikeCounter.objects.add(instance.content_type_id, instance.object_id, -1)
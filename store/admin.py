@@ -1,21 +1,54 @@
+from django import forms
 from django.contrib import admin, messages
 from django.contrib.admin.filters import SimpleListFilter
 from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import PermissionDenied
 from django.db import models
+from django.db.models import OuterRef, Subquery
 from django.db.models.aggregates import Count
 from django.db.models.expressions import OrderBy
+from django.db.models.functions import Coalesce
 from django.db.models.query import QuerySet
 from django.http.request import HttpRequest
-from django.urls import reverse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
 from django.urls.base import clear_url_caches
 from django.utils.html import format_html, urlencode
 from typing_extensions import OrderedDict
 
-from . import models
+from . import bulk_actions, imports, models
+from .admin_performance import PerformanceModeAdmin, cached_count, performance_mode
 
 # Register your models here.
 
 
+def bulk_admin_action(name, description, **params):
+    """
+    An admin action running the bulk action `name` (see store.bulk_actions)
+    over the selection in the background.
+    """
+
+    @admin.action(description=description, permissions=["change"])
+    def action(modeladmin, request, queryset):
+        filters = None
+        if request.POST.get("select_across") == "1":
+            # "select all": keep the filters rather than every matching pk
+            filters = {key: request.GET.getlist(key) for key in request.GET}
+        job = bulk_actions.start(name, queryset, params, request.user, filters)
+        url = reverse("admin:store_bulkactionjob_change", args=[job.pk])
+        modeladmin.message_user(
+            request,
+            format_html(
+                'Started <a href="{}">{}</a> for {} rows.', url, job, job.total
+            ),
+            messages.SUCCESS,
+        )
+
+    action.__name__ = "_".join([name, *params.values()]).lower()
+    return action
+
+
 class UnorderedChangeList(ChangeList):
     def get_ordering_field(self, field_name):
         return None
@@ -28,23 +61,17 @@ class CollectionAdmin(admin.ModelAdmin):
     search_fields = ["title"]
     autocomplete_fields = ["featured_product"]
 
-    @admin.display(ordering="product_count")
+    @admin.display(ordering="products_count")
     def product_count(self, collection):
         url = (
             reverse("admin:store_product_changelist")
             + "?"
             + urlencode({"collection__id": str(collection.id)})
         )
-        return format_html("<a href={}>{} Products</>", url, collection.product_count)
+        return format_html("<a href={}>{} Products</>", url, collection.products_count)
 
     def get_queryset(self, request):
-        print(request)
-        return (
-            super()
-            .get_queryset(request)
-            .annotate(product_count=Count("products"))
-            .order_by("-product_count")
-        )
+        return super().get_queryset(request).order_by("-products_count")
 
     def get_changelist(self, request, **kwargs):
         return UnorderedChangeList
@@ -55,17 +82,43 @@ class InventoryFilter(admin.SimpleListFilter):
     parameter_name = "inventory"
 
     def lookups(self, request, model_admin):
-        return [("<10", "Low")]
+        if not performance_mode():
+            return [("<10", "Low")]
+        low = cached_count(models.Product.objects.filter(inventory__lt=10))
+        return [("<10", f"Low ({low})")]
 
     def queryset(self, request, queryset: QuerySet):
         if self.value() == "<10":
             return queryset.filter(inventory__lt=10)
 
 
+class CollectionFilter(admin.RelatedFieldListFilter):
+    def field_choices(self, field, request, model_admin):
+        if not performance_mode():
+            return super().field_choices(field, request, model_admin)
+        # the denormalized products_count costs nothing to show
+        collections = models.Collection.objects.only("id", "title", "products_count")
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        if ordering:
+            collections = collections.order_by(*ordering)
+        return [
+            (collection.pk, f"{collection} ({collection.products_count})")
+            for collection in collections
+        ]
+
+
+class ProductImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV or NDJSON, matched on slug.")
+    format = forms.ChoiceField(choices=[(f, f.upper()) for f in imports.FORMATS])
+    batch_size = forms.IntegerField(initial=1000, min_value=1)
+    dry_run = forms.BooleanField(required=False)
+
+
 @admin.register(models.Product)
-class ProdutAdmin(admin.ModelAdmin):
+class ProdutAdmin(PerformanceModeAdmin, admin.ModelAdmin):
+    change_list_template = "admin/store/product/change_list.html"
     #    inlines = [TagInline]
-    actions = ["clear_inventory"]
+    actions = [bulk_admin_action("clear_inventory", "Clear Inventory")]
     list_display = [
         "title",
         "unit_price",
@@ -74,7 +127,7 @@ class ProdutAdmin(admin.ModelAdmin):
         "collection_title",
     ]
     list_editable = ["unit_price"]
-    list_filter = ["collection", "last_update", InventoryFilter]
+    list_filter = [("collection", CollectionFilter), "last_update", InventoryFilter]
     list_per_page = 10
     list_select_related = ["collection"]
     search_fields = ["title"]
@@ -96,16 +149,72 @@ class ProdutAdmin(admin.ModelAdmin):
             return "Low"
         return "OK"
 
-    @admin.action(description="Clear Inventory")
-    def clear_inventory(self, request, queryset):
-        updated_count = queryset.update(inventory=0)
-        self.message_user(
-            request, f"{updated_count} successfully updated.", messages.ERROR
+    def get_urls(self):
+        return [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_products),
+                name="store_product_import",
+            )
+        ] + super().get_urls()
+
+    def import_products(self, request):
+        if not self.has_add_permission(request) or not self.has_change_permission(
+            request
+        ):
+            raise PermissionDenied
+        form = ProductImportForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            importer = imports.ProductImporter(
+                batch_size=form.cleaned_data["batch_size"],
+                dry_run=form.cleaned_data["dry_run"],
+            )
+            result = importer.run(
+                imports.read_rows(
+                    imports.open_upload(form.cleaned_data["file"]),
+                    form.cleaned_data["format"],
+                )
+            )
+            self.message_user(
+                request,
+                f"{result.rows} rows: {result.created} created, "
+                f"{result.updated} updated, {len(result.errors)} errors"
+                + (" (dry run)" if form.cleaned_data["dry_run"] else ""),
+                messages.WARNING if result.errors else messages.SUCCESS,
+            )
+            if not result.errors:
+                return redirect("admin:store_product_changelist")
+            return TemplateResponse(
+                request,
+                "admin/store/product/import_errors.html",
+                {
+                    **self.admin_site.each_context(request),
+                    "opts": self.model._meta,
+                    "title": "Import errors",
+                    "errors": result.errors[:1000],
+                    "error_count": len(result.errors),
+                },
+            )
+        return TemplateResponse(
+            request,
+            "admin/store/product/import_products.html",
+            {
+                **self.admin_site.each_context(request),
+                "opts": self.model._meta,
+                "title": "Import products",
+                "form": form,
+            },
         )
 
 
 @admin.register(models.Customer)
-class CustomerAdmin(admin.ModelAdmin):
+class CustomerAdmin(PerformanceModeAdmin, admin.ModelAdmin):
+    actions = [
+        bulk_admin_action(
+            "set_membership", f"Set membership to {label}", membership=value
+        )
+        for value, label in models.Customer.MEMBERSHIP_CHOICES
+    ]
     list_display = ["first_name", "last_name", "membership", "order_count"]
     list_editable = ["membership"]
     list_per_page = 10
@@ -127,7 +236,20 @@ class CustomerAdmin(admin.ModelAdmin):
         return format_html("<a href={}>{} Orders</>", url, customer.order_count)
 
     def get_queryset(self, request):
-        return super().get_queryset(request).annotate(order_count=Count("order"))
+        # a correlated subquery is only evaluated for the rows on the page,
+        # where a join with GROUP BY aggregates every customer's orders
+        order_count = (
+            models.Order.objects.filter(customer=OuterRef("pk"))
+            .order_by()
+            .values("customer")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(order_count=Coalesce(Subquery(order_count), 0))
+        )
 
 
 # admin.site.register(models.Product, ProdutAdmin)
@@ -142,7 +264,43 @@ class OrderItemInline(admin.TabularInline):
 
 
 @admin.register(models.Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(PerformanceModeAdmin, admin.ModelAdmin):
     autocomplete_fields = ["customer"]
     inlines = [OrderItemInline]
+    actions = [
+        bulk_admin_action(
+            "set_payment_status", f"Mark payment {label}", payment_status=value
+        )
+        for value, label in models.Order.PAYMENT_STATUS
+    ]
     list_display = ["id", "placed_at", "customer", "payment_status"]
+    # Customer.__str__ reads the user's names
+    list_select_related = ["customer__user"]
+
+
+@admin.register(models.BulkActionJob)
+class BulkActionJobAdmin(admin.ModelAdmin):
+    actions = ["resume"]
+    list_display = ["__str__", "status", "progress", "created_by", "created_at"]
+    list_filter = ["status", "action"]
+    list_select_related = ["created_by"]
+    ordering = ["-id"]
+
+    @admin.display()
+    def progress(self, job):
+        return f"{job.processed} / {job.total}"
+
+    @admin.action(description="Resume selected jobs", permissions=["change"])
+    def resume(self, request, queryset):
+        jobs = [
+            job.pk for job in queryset.exclude(status=models.BulkActionJob.STATUS_DONE)
+        ]
+        for job_id in jobs:
+            bulk_actions.resume(job_id)
+        self.message_user(request, f"Resumed {len(jobs)} jobs.", messages.SUCCESS)
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_readonly_fields(self, request, obj=None):
+        return [field.name for field in self.model._meta.fields]
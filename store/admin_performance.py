@@ -0,0 +1,145 @@
+"""
+Admin changelists that stay usable on tables with millions of rows.
+
+With STORE_ADMIN_PERFORMANCE_MODE on (the default), admins using
+PerformanceModeAdmin change three things:
+
+- Counts. Unfiltered changelists use estimate_count (table statistics, or
+  MAX(pk) on SQLite). Filtered ones are counted exactly once per
+  STORE_ADMIN_COUNT_TTL seconds and the number is cached. The second,
+  unfiltered "N total" count Django shows next to filtered results is
+  skipped.
+- Paging. The page's primary keys are read on their own (a narrow OFFSET
+  scan over an index) and the rows are then fetched by pk. The last row of
+  every rendered page is cached, so the next page seeks past it as
+  KeysetPagination does instead of using OFFSET at all.
+- Facets. cached_count() backs the per-choice counts shown by the
+  collection and inventory filters.
+
+Cached counts and page boundaries can lag behind writes by up to the TTL,
+which is fine for the admin.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db.models.constants import LOOKUP_SEP
+from django.utils.functional import cached_property
+
+from store.pagination import KeysetPagination, estimate_count
+
+
+def performance_mode():
+    return getattr(settings, "STORE_ADMIN_PERFORMANCE_MODE", True)
+
+
+def _cache():
+    return caches[getattr(settings, "STORE_ADMIN_CACHE", "default")]
+
+
+def _timeout():
+    return getattr(settings, "STORE_ADMIN_COUNT_TTL", 60)
+
+
+def _key(kind, queryset, *parts):
+    sql, params = queryset.query.sql_with_params()
+    raw = "|".join([queryset.db, sql, repr(params)] + [str(part) for part in parts])
+    return f"store:admin:{kind}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+
+def cached_count(queryset):
+    """Count the queryset at most once per STORE_ADMIN_COUNT_TTL seconds."""
+    key = _key("count", queryset)
+    count = _cache().get(key)
+    if count is None:
+        if queryset.query.annotations:
+            # count the matching pks so annotations (e.g. per-row subqueries)
+            # are not computed for every row
+            queryset = queryset.model._base_manager.using(queryset.db).filter(
+                pk__in=queryset.values("pk")
+            )
+        count = queryset.order_by().count()
+        _cache().set(key, count, _timeout())
+    return count
+
+
+def _seekable(model, name):
+    """Whether `name` is a path to a concrete, non-null column."""
+    parts = name.lstrip("-").split(LOOKUP_SEP)
+    for index, part in enumerate(parts):
+        try:
+            field = model._meta.pk if part == "pk" else model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return False
+        if field.null:
+            return False
+        if index < len(parts) - 1:
+            if not (field.many_to_one or field.one_to_one):
+                return False
+            model = field.related_model
+    return field.concrete
+
+
+class ChangelistPaginator(Paginator):
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_count(queryset)
+            if estimate is not None:
+                return estimate
+        return cached_count(queryset)
+
+    @cached_property
+    def seek_ordering(self):
+        """The queryset's ordering if pages can seek on it, else None."""
+        ordering = list(self.object_list.query.order_by)
+        if ordering and all(
+            isinstance(name, str) and _seekable(self.object_list.model, name)
+            for name in ordering
+        ):
+            return ordering
+        return None
+
+    def page(self, number):
+        number = self.validate_number(number)
+        queryset = self.object_list
+        ordering = self.seek_ordering
+        columns = [name.lstrip("-") for name in ordering] if ordering else []
+        rows = queryset.values_list("pk", *columns)
+
+        position = None
+        if ordering and number > 1:
+            position = _cache().get(_key("boundary", queryset, number - 1))
+        if position is not None:
+            seek = KeysetPagination().seek_filter(ordering, position)
+            rows = list(rows.filter(seek)[: self.per_page])
+        else:
+            bottom = (number - 1) * self.per_page
+            rows = list(rows[bottom : bottom + self.per_page])
+        if ordering and rows:
+            _cache().set(
+                _key("boundary", queryset, number), list(rows[-1][1:]), _timeout()
+            )
+        # the same ordering applies, so the page keeps its order
+        page_queryset = queryset.filter(pk__in=[row[0] for row in rows])
+        return self._get_page(page_queryset, number, self)
+
+
+class PerformanceModeAdmin:
+    """ModelAdmin mixin switching the changelist to ChangelistPaginator."""
+
+    def get_paginator(
+        self, request, queryset, per_page, orphans=0, allow_empty_first_page=True
+    ):
+        if not performance_mode():
+            return super().get_paginator(
+                request, queryset, per_page, orphans, allow_empty_first_page
+            )
+        return ChangelistPaginator(queryset, per_page, orphans, allow_empty_first_page)
+
+    @property
+    def show_full_result_count(self):
+        return not performance_mode()
@@ -0,0 +1,437 @@
+"""
+Deterministic dataset and request scenarios for `manage.py benchmark_api`.
+
+Every route registered in store/urls.py must be exercised by at least one
+scenario; run_benchmark() reports uncovered routes as failures so new
+endpoints cannot slip in without a query budget.
+"""
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import User
+from core.serializers import TokenObtainPairSerializer
+from likes.models import LikedItem
+from store import urls as store_urls
+from store.models import (
+    Cart,
+    CartItem,
+    Collection,
+    Customer,
+    Order,
+    OrderItem,
+    Product,
+    Reviews,
+)
+from tags.models import Tag, TaggedItem
+
+
+def seed(scale=1, seed_value=42):
+    """
+    Create collections, products, customers, orders, carts and reviews.
+    Sizes grow linearly with `scale`; the same seed always yields the same
+    data.
+    """
+    rng = random.Random(seed_value)
+    collections = Collection.objects.bulk_create(
+        [Collection(title=f"Collection {i}") for i in range(5 * scale)]
+    )
+    collections = list(Collection.objects.order_by("id"))
+    Product.objects.bulk_create(
+        [
+            Product(
+                title=f"Product {i}",
+                slug=f"product-{i}",
+                description=f"Description of product {i}",
+                unit_price=Decimal(rng.randint(100, 99900)) / 100,
+                inventory=rng.randint(10, 500),
+                collection=collections[i % len(collections)],
+            )
+            for i in range(100 * scale)
+        ],
+        batch_size=1000,
+    )
+    for collection in collections:
+        collection.products_count = collection.products.count()
+    Collection.objects.bulk_update(collections, ["products_count"])
+    product_ids = list(Product.objects.order_by("id").values_list("id", flat=True))
+    for i, label in enumerate(["sale", "new", "featured"]):
+        TaggedItem.objects.tag_many(
+            Tag.objects.create(label=label), Product, product_ids[i :: i + 2]
+        )
+
+    staff = User.objects.create_user(
+        "bench-staff",
+        "bench-staff@example.com",
+        "password",
+        is_staff=True,
+        is_superuser=True,
+    )
+    # the signal handler creates a Customer for each user
+    users = [staff] + [
+        User.objects.create_user(
+            f"bench-customer-{i}",
+            f"bench-customer-{i}@example.com",
+            "password",
+            first_name=f"First{i}",
+            last_name=f"Last{i}",
+        )
+        for i in range(10 * scale)
+    ]
+    customers = list(Customer.objects.filter(user__in=users).order_by("id"))
+    for user in users:
+        for product_id in rng.sample(product_ids[:20], 5):
+            LikedItem.objects.like(user, Product, product_id)
+
+    orders = Order.objects.bulk_create(
+        [Order(customer=rng.choice(customers)) for i in range(50 * scale)]
+    )
+    orders = list(Order.objects.order_by("id"))
+    OrderItem.objects.bulk_create(
+        [
+            OrderItem(
+                order=order,
+                product_id=product_id,
+                quantity=rng.randint(1, 5),
+                unit_price=Decimal(rng.randint(100, 9900)) / 100,
+            )
+            for order in orders
+            for product_id in rng.sample(product_ids, rng.randint(1, 5))
+        ],
+        batch_size=1000,
+    )
+
+    carts = [Cart.objects.create() for i in range(5 * scale)]
+    CartItem.objects.bulk_create(
+        [
+            CartItem(cart=cart, product_id=product_id, quantity=rng.randint(1, 5))
+            for cart in carts
+            for product_id in rng.sample(product_ids, 10)
+        ]
+    )
+    Reviews.objects.bulk_create(
+        [
+            Reviews(
+                product_id=product_ids[i % 10],
+                name=f"Reviewer {i}",
+                description=f"Review {i}",
+            )
+            for i in range(20 * scale)
+        ]
+    )
+    # bulk_create sends no signals
+    Product.objects.refresh_review_aggregates()
+    return {"staff": staff, "customer": users[1]}
+
+
+def seed_products(rows, collections=100):
+    """
+    Insert `rows` products spread over `collections` collections, with a
+    single INSERT ... SELECT on SQLite.
+    """
+    Collection.objects.bulk_create(
+        [Collection(title=f"Collection {i}") for i in range(collections)]
+    )
+    collection_ids = list(Collection.objects.values_list("id", flat=True))
+    if connection.vendor == "sqlite":
+        table = Product._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 "
+                f"FROM n WHERE i < %s) "
+                f"INSERT INTO {table} (title, slug, description, unit_price, "
+                f"inventory, last_update, collection_id, reviews_count) "
+                f"SELECT 'Product ' || i, 'product-' || i, NULL, "
+                f"(i % 99900 + 100) / 100.0, i % 500, datetime('now'), "
+                f"%s + i % %s, 0 FROM n",
+                [rows, min(collection_ids), len(collection_ids)],
+            )
+    else:
+        for start in range(0, rows, 10000):
+            Product.objects.bulk_create(
+                [
+                    Product(
+                        title=f"Product {i}",
+                        slug=f"product-{i}",
+                        unit_price=(i % 99900 + 100) / 100,
+                        inventory=i % 500,
+                        collection_id=collection_ids[i % len(collection_ids)],
+                    )
+                    for i in range(start + 1, min(start + 10000, rows) + 1)
+                ]
+            )
+    for collection_id in collection_ids:
+        Collection.objects.filter(pk=collection_id).update(
+            products_count=Product.objects.filter(collection_id=collection_id).count()
+        )
+
+
+class Scenario:
+    def __init__(self, name, route, method, path, user=None, data=None):
+        self.name = name
+        self.route = route
+        self.method = method
+        self.path = path
+        self.user = user
+        # callables build fresh state for requests that consume it
+        self.data = data
+
+    @property
+    def repeatable(self):
+        return self.method == "get"
+
+
+def build_scenarios(users):
+    staff, customer = users["staff"], users["customer"]
+    product = Product.objects.order_by("id").first()
+    review = Reviews.objects.filter(product=product).order_by("id").first()
+    collection = Collection.objects.order_by("id").first()
+    cart = Cart.objects.order_by("created_at").first()
+    cart_item = cart.items.order_by("id").first()
+    order = Order.objects.filter(customer__user=customer).order_by("id").first()
+
+    def new_cart():
+        new = Cart.objects.create()
+        CartItem.objects.bulk_create(
+            [
+                CartItem(cart=new, product=p, quantity=1)
+                for p in Product.objects.all()[:5]
+            ]
+        )
+        return new
+
+    return [
+        Scenario("api-root", "api-root", "get", reverse("api-root")),
+        Scenario(
+            "products-list", "products-list", "get", reverse("products-list"), staff
+        ),
+        Scenario(
+            "products-list:search",
+            "products-list",
+            "get",
+            reverse("products-list") + "?search=product&ordering=unit_price",
+            staff,
+        ),
+        Scenario(
+            "products-list:tags",
+            "products-list",
+            "get",
+            reverse("products-list") + "?tags=sale,new",
+            staff,
+        ),
+        Scenario(
+            "products-list:cursor",
+            "products-list",
+            "get",
+            reverse("products-list") + "?cursor=",
+            staff,
+        ),
+        Scenario(
+            "products-detail",
+            "products-detail",
+            "get",
+            reverse("products-detail", args=[product.pk]),
+            staff,
+        ),
+        Scenario(
+            "products-likes",
+            "products-likes",
+            "get",
+            reverse("products-likes")
+            + "?ids="
+            + ",".join(
+                str(pk) for pk in Product.objects.values_list("id", flat=True)[:10]
+            ),
+            customer,
+        ),
+        Scenario(
+            "products-like",
+            "products-like",
+            "post",
+            reverse("products-like", args=[product.pk]),
+            customer,
+        ),
+        Scenario(
+            "product-reviews-list",
+            "product-reviews-list",
+            "get",
+            reverse("product-reviews-list", args=[product.pk]),
+        ),
+        Scenario(
+            "product-reviews-detail",
+            "product-reviews-detail",
+            "get",
+            reverse("product-reviews-detail", args=[product.pk, review.pk]),
+        ),
+        Scenario(
+            "collection-list", "collection-list", "get", reverse("collection-list")
+        ),
+        Scenario(
+            "collection-detail",
+            "collection-detail",
+            "get",
+            reverse("collection-detail", args=[collection.pk]),
+        ),
+        Scenario("cart-list:create", "cart-list", "post", reverse("cart-list")),
+        Scenario(
+            "cart-detail", "cart-detail", "get", reverse("cart-detail", args=[cart.pk])
+        ),
+        Scenario(
+            "cart-items-list",
+            "cart-items-list",
+            "get",
+            reverse("cart-items-list", args=[cart.pk]),
+        ),
+        Scenario(
+            "cart-items-list:create",
+            "cart-items-list",
+            "post",
+            reverse("cart-items-list", args=[cart.pk]),
+            data={"product_id": cart_item.product_id, "quantity": 1},
+        ),
+        Scenario(
+            "cart-items-detail",
+            "cart-items-detail",
+            "get",
+            reverse("cart-items-detail", args=[cart.pk, cart_item.pk]),
+        ),
+        Scenario(
+            "cart-items-bulk",
+            "cart-items-bulk",
+            "post",
+            reverse("cart-items-bulk", args=[cart.pk]),
+            data=lambda: [
+                {"product_id": pk, "quantity": 1}
+                for pk in Product.objects.values_list("id", flat=True)[:20]
+            ],
+        ),
+        Scenario(
+            "orders-list:staff", "orders-list", "get", reverse("orders-list"), staff
+        ),
+        Scenario(
+            "orders-list:customer",
+            "orders-list",
+            "get",
+            reverse("orders-list"),
+            customer,
+        ),
+        Scenario(
+            "orders-list:create",
+            "orders-list",
+            "post",
+            reverse("orders-list"),
+            customer,
+            data=lambda: {"cart_id": str(new_cart().pk)},
+        ),
+        Scenario(
+            "orders-export",
+            "orders-export",
+            "get",
+            reverse("orders-export") + "?output=ndjson",
+            staff,
+        ),
+        Scenario(
+            "orders-detail",
+            "orders-detail",
+            "get",
+            reverse("orders-detail", args=[order.pk]),
+            customer,
+        ),
+        Scenario(
+            "customers-list", "customers-list", "get", reverse("customers-list"), staff
+        ),
+        Scenario(
+            "customers-detail",
+            "customers-detail",
+            "get",
+            reverse("customers-detail", args=[customer.customer.pk]),
+            staff,
+        ),
+        Scenario(
+            "customers-me", "customers-me", "get", reverse("customers-me"), customer
+        ),
+        Scenario(
+            "customers-history",
+            "customers-history",
+            "get",
+            reverse("customers-history"),
+            staff,
+        ),
+    ]
+
+
+def registered_routes():
+    return {pattern.name for pattern in store_urls.urlpatterns}
+
+
+def _client(user):
+    client = APIClient()
+    if user is not None:
+        token = TokenObtainPairSerializer.get_token(user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f"JWT {token}")
+    return client
+
+
+def run_scenario(scenario, repeat):
+    client = _client(scenario.user)
+    timings = []
+    # the most queries of any repeat, so the cold first request (empty
+    # process caches) is budgeted too
+    query_count = 0
+    for i in range(repeat if scenario.repeatable else 1):
+        data = scenario.data() if callable(scenario.data) else scenario.data
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, scenario.method)(
+                scenario.path, data, format="json"
+            )
+            if response.streaming:
+                content = b"".join(response.streaming_content)
+            else:
+                content = response.content
+            timings.append((time.perf_counter() - started) * 1000)
+        query_count = max(query_count, len(queries))
+    return {
+        "name": scenario.name,
+        "route": scenario.route,
+        "method": scenario.method.upper(),
+        "path": scenario.path,
+        "status": response.status_code,
+        "queries": query_count,
+        "time_ms": round(statistics.median(timings), 3),
+        "bytes": len(content),
+    }
+
+
+def run_benchmark(scenarios, budget, repeat=5):
+    """
+    Run every scenario and compare its query count with `budget`
+    ({scenario name: max queries}). Returns the report dict.
+    """
+    results = [run_scenario(scenario, repeat) for scenario in scenarios]
+    failures = []
+    for result in results:
+        limit = budget.get(result["name"])
+        result["budget"] = limit
+        if result["status"] >= 400:
+            failures.append(f"{result['name']}: HTTP {result['status']}")
+        if limit is None:
+            failures.append(f"{result['name']}: no query budget")
+        elif result["queries"] > limit:
+            failures.append(
+                f"{result['name']}: {result['queries']} queries (budget {limit})"
+            )
+    covered = {scenario.route for scenario in scenarios}
+    for route in sorted(registered_routes() - covered):
+        failures.append(f"{route}: route has no benchmark scenario")
+    return {
+        "database": connection.vendor,
+        "endpoints": results,
+        "failures": failures,
+    }
@@ -0,0 +1,239 @@
+"""
+Chunked, resumable bulk actions for the admin.
+
+start() records the admin selection as a BulkActionJob: the selected pks
+(or, for "select all", the changelist's filter parameters, which the model
+admin turns back into a queryset when the job runs), the highest matching pk
+and the row count. A background thread then works
+through the selection in primary key order, `chunk_size` rows at a time.
+Each chunk runs in its own short transaction, which also advances the job's
+last_pk. So no lock is held for longer than one chunk, and a job interrupted
+by a crash resumes after the last committed chunk.
+
+Running jobs update heartbeat_at after every chunk. A job whose heartbeat is
+older than STORE_BULK_ACTION_STALE_AFTER seconds is considered abandoned.
+`manage.py resume_bulk_actions` picks such jobs up, along with pending ones
+(and failed ones with --retry-failed).
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.main import ALL_VAR, PAGE_VAR
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection, transaction
+from django.db.models import F, Max, Q
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+
+from store.models import BulkActionJob, Customer, Order, Product
+from store.signals import products_updated
+
+logger = logging.getLogger(__name__)
+
+
+class BulkAction:
+    def __init__(self, name, model, apply):
+        self.name = name
+        self.model = model
+        self.apply = apply
+
+
+ACTIONS = {}
+
+
+def register(name, model):
+    """
+    Register `apply(pks, params) -> rows updated` as a bulk action on
+    `model`. apply runs inside the chunk's transaction.
+    """
+
+    def decorator(apply):
+        ACTIONS[name] = BulkAction(name, model, apply)
+        return apply
+
+    return decorator
+
+
+@register("clear_inventory", Product)
+def clear_inventory(pks, params):
+    # update() skips auto_now and the Product signals
+    updated = Product.objects.filter(pk__in=pks).update(
+        inventory=0, last_update=timezone.now()
+    )
+    products_updated.send_robust(clear_inventory, product_ids=pks)
+    return updated
+
+
+@register("set_membership", Customer)
+def set_membership(pks, params):
+    return Customer.objects.filter(pk__in=pks).update(membership=params["membership"])
+
+
+@register("set_payment_status", Order)
+def set_payment_status(pks, params):
+    return Order.objects.filter(pk__in=pks).update(
+        payment_status=params["payment_status"]
+    )
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def start(name, queryset, params=None, user=None, filters=None):
+    """
+    Record a job for the action over `queryset` and run it after commit.
+
+    The job stores the pks of `queryset`, or with `filters` (the changelist's
+    GET parameters as lists) only those, to be rebuilt by the model admin.
+    """
+    action = ACTIONS[name]
+    if queryset.model is not action.model:
+        raise ValueError(f"{name} applies to {action.model.__name__} rows")
+    if filters is None:
+        pks = list(queryset.order_by("pk").values_list("pk", flat=True))
+        selected = {"pks": pks}
+        max_pk = pks[-1] if pks else 0
+        total = len(pks)
+    else:
+        # paging does not change which rows match
+        selected = {
+            "filters": {
+                key: values
+                for key, values in filters.items()
+                if key not in (ALL_VAR, PAGE_VAR)
+            }
+        }
+        max_pk = queryset.aggregate(max_pk=Max("pk"))["max_pk"] or 0
+        total = queryset.count()
+    job = BulkActionJob.objects.create(
+        action=name,
+        params=params or {},
+        selection=selected,
+        max_pk=max_pk,
+        total=total,
+        created_by=user,
+    )
+    _schedule(job.pk)
+    return job
+
+
+def resume(job_id):
+    """Queue a failed or abandoned job to continue from its last chunk."""
+    BulkActionJob.objects.filter(pk=job_id, status=BulkActionJob.STATUS_FAILED).update(
+        status=BulkActionJob.STATUS_PENDING
+    )
+    _schedule(job_id)
+
+
+def _schedule(job_id):
+    # with STORE_BULK_ACTION_RUN_ON_COMMIT off, jobs wait for
+    # `manage.py resume_bulk_actions`
+    if getattr(settings, "STORE_BULK_ACTION_RUN_ON_COMMIT", True):
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_thread, job_id))
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "STORE_BULK_ACTION_WORKERS", 2),
+                thread_name_prefix="bulk-action",
+            )
+        return _executor
+
+
+def _run_in_thread(job_id):
+    try:
+        run(job_id)
+    except Exception:
+        logger.exception("Bulk action job %s failed", job_id)
+    finally:
+        connection.close()
+
+
+def claimable():
+    """Jobs that are pending or whose runner stopped sending heartbeats."""
+    stale = timezone.now() - timedelta(
+        seconds=getattr(settings, "STORE_BULK_ACTION_STALE_AFTER", 60)
+    )
+    return BulkActionJob.objects.filter(
+        Q(status=BulkActionJob.STATUS_PENDING)
+        | Q(status=BulkActionJob.STATUS_RUNNING, heartbeat_at__lt=stale)
+    )
+
+
+def run(job_id, chunk_size=None):
+    """
+    Claim the job and process its remaining chunks. Returns False if
+    another runner holds it.
+    """
+    claimed = (
+        claimable()
+        .filter(pk=job_id)
+        .update(status=BulkActionJob.STATUS_RUNNING, heartbeat_at=timezone.now())
+    )
+    if not claimed:
+        return False
+    job = BulkActionJob.objects.get(pk=job_id)
+    queryset = selection(job)
+    chunk_size = chunk_size or getattr(settings, "STORE_BULK_ACTION_CHUNK_SIZE", 1000)
+    try:
+        while run_chunk(job, queryset, chunk_size):
+            pass
+    except Exception as e:
+        BulkActionJob.objects.filter(pk=job.pk).update(
+            status=BulkActionJob.STATUS_FAILED, last_error=repr(e)
+        )
+        raise
+    BulkActionJob.objects.filter(pk=job.pk).update(
+        status=BulkActionJob.STATUS_DONE, finished_at=timezone.now(), last_error=""
+    )
+    return True
+
+
+def selection(job):
+    """The job's rows: its pks, or its changelist rebuilt by the model admin."""
+    model = ACTIONS[job.action].model
+    if "pks" in job.selection:
+        return model._base_manager.filter(pk__in=job.selection["pks"])
+    request = HttpRequest()
+    request.method = "GET"
+    request.GET = QueryDict(mutable=True)
+    for key, values in job.selection["filters"].items():
+        request.GET.setlist(key, values)
+    request.user = job.created_by or AnonymousUser()
+    model_admin = admin.site._registry[model]
+    return model_admin.get_changelist_instance(request).get_queryset(request)
+
+
+def run_chunk(job, queryset, chunk_size):
+    """
+    Apply the action to the next `chunk_size` selected rows and advance the
+    job in one transaction. Returns the number of rows processed.
+    """
+    action = ACTIONS[job.action]
+    # read outside the transaction, which then only holds the write locks
+    # (and SQLite never has to upgrade a read lock under a concurrent writer)
+    pks = list(
+        queryset.filter(pk__gt=job.last_pk, pk__lte=job.max_pk)
+        .order_by("pk")
+        .values_list("pk", flat=True)[:chunk_size]
+    )
+    if not pks:
+        return 0
+    with transaction.atomic():
+        updated = action.apply(pks, job.params)
+        BulkActionJob.objects.filter(pk=job.pk).update(
+            last_pk=pks[-1],
+            processed=F("processed") + len(pks),
+            updated=F("updated") + updated,
+            heartbeat_at=timezone.now(),
+        )
+    job.last_pk = pks[-1]
+    return len(pks)
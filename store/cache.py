@@ -0,0 +1,322 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from core.renderers import FastJSONRenderer, PreRenderedJSON
+from store.models import Customer
+
+
+class CatalogCache:
+    """
+    Cache of serialized catalog responses.
+
+    Entries are keyed on the request path and its normalized query string
+    and namespaced by a catalog version number. Any change to the catalog
+    bumps the version (see store.signals.handlers), which makes every older
+    entry unreachable; the backend's own timeout then reclaims them.
+
+    Entries hold the rendered JSON, which FastJSONRenderer sends without
+    encoding it again.
+
+    The backend is any Django cache alias (locmem by default, RedisCache or
+    another shared backend in production) named by STORE_CATALOG_CACHE.
+    """
+
+    version_key = "store:catalog:version"
+    key_prefix = "store:catalog:json"
+    tracked_keys = 10000
+
+    def __init__(self, alias=None, timeout=None):
+        self._alias = alias
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        # keys written by this process and when they expire, used to tell
+        # backend evictions apart from ordinary misses
+        self._written = OrderedDict()
+        self.reset_stats()
+
+    @property
+    def cache(self):
+        return caches[
+            self._alias or getattr(settings, "STORE_CATALOG_CACHE", "default")
+        ]
+
+    @property
+    def timeout(self):
+        if self._timeout is not None:
+            return self._timeout
+        return getattr(settings, "STORE_CATALOG_CACHE_TIMEOUT", 300)
+
+    def get_version(self):
+        version = self.cache.get(self.version_key)
+        if version is None:
+            # start from the clock so a lost version key never rewinds to a
+            # number that older entries were written under
+            self.cache.add(self.version_key, int(time.time() * 1000), None)
+            version = self.cache.get(self.version_key)
+        return version
+
+    def invalidate(self):
+        try:
+            self.cache.incr(self.version_key)
+        except ValueError:
+            self.cache.set(self.version_key, int(time.time() * 1000), None)
+        with self._lock:
+            self.invalidations += 1
+            self._written.clear()
+
+    def make_key(self, request):
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+            if value != "" or key == "cursor"
+        )
+        raw = "|".join(
+            [request.get_host(), request.path]
+            + [f"{key}={value}" for key, value in params]
+        )
+        digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+        return f"{self.key_prefix}:{self.get_version()}:{digest}"
+
+    def get(self, key):
+        data = self.cache.get(key)
+        with self._lock:
+            if data is not None:
+                self.hits += 1
+                return data
+            self.misses += 1
+            expires = self._written.pop(key, None)
+            if expires is not None and expires > time.monotonic():
+                self.evictions += 1
+        return None
+
+    def set(self, key, data):
+        self.cache.set(key, data, self.timeout)
+        with self._lock:
+            self._written[key] = time.monotonic() + self.timeout
+            self._written.move_to_end(key)
+            while len(self._written) > self.tracked_keys:
+                self._written.popitem(last=False)
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+catalog_cache = CatalogCache()
+
+
+class CatalogCacheMixin:
+    """
+    Serve list/retrieve from the catalog cache. Permission checks still run
+    before the cache is consulted; only successful responses are stored.
+    """
+
+    catalog_cache = catalog_cache
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        # the key (and so the version) is fixed before reading the database,
+        # so a change landing mid-request can only orphan the entry
+        key = self.catalog_cache.make_key(request)
+        content = self.catalog_cache.get(key)
+        if content is not None:
+            return Response(self.cached_data(request, content))
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            data = PreRenderedJSON.from_data(response.data)
+            self.catalog_cache.set(key, data.content)
+            response.data = self.cached_data(request, data.content)
+        return response
+
+    def cached_data(self, request, content):
+        if isinstance(request.accepted_renderer, FastJSONRenderer):
+            return PreRenderedJSON(content)
+        # e.g. the browsable API
+        return json.loads(content)
+
+
+class ConditionalGetMixin:
+    """
+    ETag and Last-Modified on list and retrieve, with 304 Not Modified
+    (or 412 for If-Match) answered before the queryset is read or the body
+    serialized.
+
+    get_validators() returns a value that changes whenever the response
+    body may, and optionally the time of the last change. The ETag hashes
+    it with the full path and the negotiated media type.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def get_validators(self, request):
+        """Return (version, last modified datetime); None for either is unknown."""
+        return None, None
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        version, last_modified = self.get_validators(request)
+        if version is None:
+            return handler(request, *args, **kwargs)
+        raw = "|".join(
+            [request.get_full_path(), request.accepted_media_type, str(version)]
+        )
+        etag = quote_etag(hashlib.sha1(raw.encode("utf-8")).hexdigest())
+        # HTTP dates have whole seconds
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is not None:
+            if response.status_code == 304:
+                response["ETag"] = etag
+            return response
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response["ETag"] = etag
+            if timestamp is not None:
+                response["Last-Modified"] = http_date(timestamp)
+        return response
+
+
+class CustomerIdCache:
+    """
+    user id -> customer id, kept in a bounded per-process LRU with a TTL and
+    memoized on the request, so a request maps its user to a customer at
+    most once and usually not at all.
+
+    Tokens issued by core.serializers carry the customer id as a claim,
+    which is used first. Customer saves and deletes and new users
+    invalidate or prime their entry (see store.signals.handlers); the TTL
+    bounds how long a change made by another process can go unnoticed.
+    Missing customers are not cached.
+    """
+
+    request_attribute = "_store_customer_id"
+
+    def __init__(self, max_size=None, ttl=None):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries = OrderedDict()  # user id -> (expires, customer id)
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def max_size(self):
+        if self._max_size is not None:
+            return self._max_size
+        return getattr(settings, "STORE_CUSTOMER_CACHE_SIZE", 10000)
+
+    @property
+    def ttl(self):
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, "STORE_CUSTOMER_CACHE_TTL", 300)
+
+    def for_request(self, request):
+        """The customer id of request.user, or None if it has no profile."""
+        # DRF's Request proxies attribute reads but not writes to the
+        # HttpRequest, so memoize on the latter
+        http_request = getattr(request, "_request", request)
+        if self.request_attribute in http_request.__dict__:
+            with self._lock:
+                self.request_hits += 1
+            return http_request.__dict__[self.request_attribute]
+        user = request.user
+        customer_id = getattr(user, "customer_id", None)
+        if customer_id is not None:
+            with self._lock:
+                self.claim_hits += 1
+        else:
+            customer_id = self.get(user.id)
+        setattr(http_request, self.request_attribute, customer_id)
+        return customer_id
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        # user is unique, so skip Meta.ordering and its join on the user
+        customer_id = (
+            Customer.objects.filter(user_id=user_id)
+            .order_by()
+            .values_list("id", flat=True)
+            .first()
+        )
+        if customer_id is not None:
+            self.set(user_id, customer_id, now)
+        return customer_id
+
+    def set(self, user_id, customer_id, now=None):
+        expires = (now or time.monotonic()) + self.ttl
+        with self._lock:
+            self._entries[user_id] = (expires, customer_id)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.request_hits = 0
+        self.claim_hits = 0
+        self.invalidations = 0
+
+    def stats(self):
+        with self._lock:
+            hits = self.hits + self.request_hits + self.claim_hits
+            lookups = hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "request_hits": self.request_hits,
+                "claim_hits": self.claim_hits,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+
+customer_ids = CustomerIdCache()
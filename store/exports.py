@@ -0,0 +1,133 @@
+"""
+Streaming CSV / NDJSON exports of orders and order items.
+
+Rows are read as values_list tuples in primary-key batches (keyset, not
+OFFSET), so memory stays flat however many rows are exported. A plain
+iterator() would not be enough: MySQLdb buffers the whole result set on
+the client. Each batch is its own query, so rows committed while an export
+runs may or may not be included.
+"""
+import csv
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from store.filters import OrderExportFilter
+from store.models import Order, OrderItem
+
+# dataset -> (model, [(column name, field path)]); the first path is the
+# model's primary key and drives the batching
+DATASETS = {
+    "orders": (
+        Order,
+        [
+            ("order_id", "id"),
+            ("placed_at", "placed_at"),
+            ("payment_status", "payment_status"),
+            ("customer_id", "customer_id"),
+        ],
+    ),
+    "items": (
+        OrderItem,
+        [
+            ("item_id", "id"),
+            ("order_id", "order_id"),
+            ("placed_at", "order__placed_at"),
+            ("payment_status", "order__payment_status"),
+            ("customer_id", "order__customer_id"),
+            ("product_id", "product_id"),
+            ("product_title", "product__title"),
+            ("quantity", "quantity"),
+            ("unit_price", "unit_price"),
+        ],
+    ),
+}
+OUTPUTS = ("csv", "ndjson")
+CONTENT_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def order_lookups(params):
+    """
+    Validate the placed_at__gte / placed_at__lt / payment_status filters in
+    `params` and return them as Order lookups. Raises ExportError for
+    invalid values.
+    """
+    filterset = OrderExportFilter(params, queryset=Order.objects.none())
+    if not filterset.is_valid():
+        raise ExportError(
+            "; ".join(
+                f"{name}: {' '.join(errors)}"
+                for name, errors in filterset.errors.items()
+            )
+        )
+    return {
+        name: value
+        for name, value in filterset.form.cleaned_data.items()
+        if value not in (None, "")
+    }
+
+
+def export_rows(dataset, lookups, batch_size=2000):
+    """Yield a tuple per row of `dataset` matching the Order `lookups`."""
+    model, columns = DATASETS[dataset]
+    if model is Order:
+        queryset = Order.objects.filter(**lookups)
+    else:
+        # filter through the join: an `order__in` subquery would be
+        # re-evaluated for every batch
+        queryset = OrderItem.objects.filter(
+            **{f"order__{name}": value for name, value in lookups.items()}
+        )
+    queryset = queryset.order_by("id").values_list(*[path for _, path in columns])
+    last_pk = None
+    while True:
+        batch = queryset if last_pk is None else queryset.filter(id__gt=last_pk)
+        rows = list(batch[:batch_size])
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last_pk = rows[-1][0]
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def render_csv(dataset, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in DATASETS[dataset][1]])
+    for row in rows:
+        yield writer.writerow(
+            [
+                value.isoformat() if isinstance(value, datetime) else value
+                for value in row
+            ]
+        )
+
+
+def render_ndjson(dataset, rows):
+    names = [name for name, _ in DATASETS[dataset][1]]
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    for row in rows:
+        yield encoder.encode(dict(zip(names, row))) + "\n"
+
+
+RENDERERS = {"csv": render_csv, "ndjson": render_ndjson}
+
+
+def export(dataset, output, params, batch_size=2000):
+    """
+    Return an iterator of text chunks exporting `dataset` as `output`, with
+    the order filters taken from `params`.
+    """
+    if dataset not in DATASETS:
+        raise ExportError(f"dataset must be one of {', '.join(DATASETS)}")
+    if output not in OUTPUTS:
+        raise ExportError(f"output must be one of {', '.join(OUTPUTS)}")
+    lookups = order_lookups(params)
+    return RENDERERS[output](dataset, export_rows(dataset, lookups, batch_size))
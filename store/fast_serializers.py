@@ -0,0 +1,194 @@
+"""
+Serializers compiled to plain functions over values() rows.
+
+compile_serializer() walks a serializer's readable fields once and
+generates one function per serializer that builds the representation
+straight from a values() row: no model instances, no per-field get_attribute
+or SkipField handling. Fields whose DRF representation of a database value
+is the value itself (integers, strings, booleans, primary keys) are copied
+as-is. Every other field still goes through its own bound
+to_representation, so the output matches the serializer exactly.
+
+Supported fields are the plain model fields, PrimaryKeyRelatedField,
+SerializerMethodField and nested (non-list) serializers over a foreign
+key. Anything else raises ValueError when the serializer is compiled.
+Methods are bound to one serializer instance created without a context,
+so they must not rely on self.context.
+
+FastSerializerMixin serves a viewset's list and retrieve through the
+compiled serializer when STORE_FAST_SERIALIZERS is on.
+"""
+import threading
+
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+
+# fields whose to_representation returns a database value unchanged
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+)
+
+
+class Record(dict):
+    """
+    A values() row that also answers attribute access, so
+    SerializerMethodField methods written against model instances work on
+    it. `record.product.title` reads the "product__title" column.
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            pass
+        prefix = name + "__"
+        nested = {
+            key[len(prefix) :]: value
+            for key, value in self.items()
+            if key.startswith(prefix)
+        }
+        if nested:
+            return Record(nested)
+        raise AttributeError(name)
+
+
+class _Compiler:
+    def __init__(self, annotations):
+        self.annotations = set(annotations)
+        self.columns = []
+        self.namespace = {"Record": Record}
+        self.uses_record = False
+
+    def add(self, value):
+        name = f"_{len(self.namespace)}"
+        self.namespace[name] = value
+        return name
+
+    def column(self, name):
+        if name not in self.columns:
+            self.columns.append(name)
+        return f"row[{name!r}]"
+
+    def serializer(self, serializer, prefix, record):
+        items = []
+        for field in serializer._readable_fields:
+            expression = self.field(serializer, field, prefix, record)
+            items.append(f"{field.field_name!r}: {expression}")
+        return "{" + ", ".join(items) + "}"
+
+    def field(self, serializer, field, prefix, record):
+        label = f"{serializer.__class__.__name__}.{field.field_name}"
+        if isinstance(field, serializers.SerializerMethodField):
+            # methods may read an annotation of the same name (see
+            # CartItemSerializer.get_total_price)
+            if not prefix and field.field_name in self.annotations:
+                self.column(field.field_name)
+            self.uses_record = True
+            method = self.add(getattr(serializer, field.method_name))
+            return f"{method}({record})"
+
+        if field.source == "*" or "." in field.source:
+            raise ValueError(f"{label}: source {field.source!r} cannot be compiled")
+        source = prefix + field.source
+
+        if isinstance(field, serializers.ListSerializer):
+            raise ValueError(f"{label}: list serializers cannot be compiled")
+        if isinstance(field, serializers.Serializer):
+            model_field = serializer.Meta.model._meta.get_field(field.source)
+            nested = self.serializer(field, f"{source}__", f"{record}.{field.source}")
+            if not model_field.null:
+                return nested
+            return f"(None if {self.column(source)} is None else {nested})"
+
+        if isinstance(field, PrimaryKeyRelatedField):
+            if field.pk_field is not None:
+                raise ValueError(f"{label}: pk_field cannot be compiled")
+            # values() returns the foreign key's id under the field's name
+            return self.column(source)
+        if isinstance(field, IDENTITY_FIELDS):
+            return self.column(source)
+        if isinstance(field, serializers.RelatedField):
+            raise ValueError(f"{label}: {field.__class__.__name__} cannot be compiled")
+        represent = self.add(field.to_representation)
+        value = self.column(source)
+        return f"(None if (value := {value}) is None else {represent}(value))"
+
+
+def compile_serializer(serializer_class, annotations=()):
+    """
+    Return (columns, represent): the names to pass to values() and a
+    function turning one such row into the serializer's representation.
+    `annotations` are the queryset's annotation names.
+    """
+    compiler = _Compiler(annotations)
+    body = compiler.serializer(serializer_class(), "", "record")
+    lines = ["def represent(row):"]
+    if compiler.uses_record:
+        lines.append("    record = Record(row)")
+    lines.append(f"    return {body}")
+    code = compile("\n".join(lines), f"<fast {serializer_class.__name__}>", "exec")
+    exec(code, compiler.namespace)
+    return compiler.columns, compiler.namespace["represent"]
+
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+
+def get_fast_serializer(serializer_class, annotations=()):
+    key = (serializer_class, frozenset(annotations))
+    with _compiled_lock:
+        if key not in _compiled:
+            _compiled[key] = compile_serializer(serializer_class, annotations)
+        return _compiled[key]
+
+
+class FastSerializerMixin:
+    """
+    Serve list and retrieve from values() rows through the compiled
+    serializer (see compile_serializer) when STORE_FAST_SERIALIZERS is on.
+    Filtering, pagination and permission checks are unchanged; the rows
+    also carry the view's ordering columns so keyset cursors can be built.
+    """
+
+    def use_fast_serializer(self):
+        return getattr(settings, "STORE_FAST_SERIALIZERS", False)
+
+    def get_fast_rows(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        columns, represent = get_fast_serializer(
+            self.get_serializer_class(), queryset.query.annotations
+        )
+        ordering = list(getattr(self, "keyset_ordering", None) or [])
+        if isinstance(getattr(self, "ordering_fields", None), (list, tuple)):
+            ordering += self.ordering_fields
+        extra = [name.lstrip("-") for name in ordering]
+        columns = columns + [name for name in extra if name not in columns]
+        return queryset.values(*columns), represent
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_serializer():
+            return super().list(request, *args, **kwargs)
+        rows, represent = self.get_fast_rows()
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response([represent(row) for row in page])
+        return Response([represent(row) for row in rows])
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.use_fast_serializer():
+            return super().retrieve(request, *args, **kwargs)
+        rows, represent = self.get_fast_rows()
+        # as GenericAPIView.get_object, on the values() queryset
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            rows, **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(request, row)
+        return Response(represent(row))
@@ -1,10 +1,55 @@
 from django_filters import filterset
-from django_filters.rest_framework import FilterSet
+from django_filters.rest_framework import CharFilter, FilterSet
+from rest_framework.filters import OrderingFilter, SearchFilter
 
-from .models import Product
+from tags.models import TaggedItem
+
+from .models import Order, Product
+from .pagination import KeysetPagination
+from .search import get_search_backend
 
 
 class ProductFilter(FilterSet):
+    # ?tags=a,b matches products tagged a or b
+    tags = CharFilter(method="filter_tags")
+
     class Meta:
         model = Product
         fields = {"collection_id": ["exact"], "unit_price": ["gt", "lt"]}
+
+    def filter_tags(self, queryset, name, value):
+        labels = [label.strip() for label in value.split(",") if label.strip()]
+        if not labels:
+            return queryset
+        return queryset.filter(
+            pk__in=TaggedItem.objects.object_ids_tagged(Product, labels)
+        )
+
+
+class OrderExportFilter(FilterSet):
+    class Meta:
+        model = Order
+        fields = {"placed_at": ["gte", "lt"], "payment_status": ["exact"]}
+
+
+class ProductSearchFilter(SearchFilter):
+    """
+    Use the configured search backend for ?search= and rank the results by
+    relevance unless the client asked for an explicit ordering or a keyset
+    cursor, which cannot seek on relevance. Falls back to SearchFilter when
+    no backend is configured.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        backend = get_search_backend()
+        query = request.query_params.get(self.search_param, "")
+        if backend is None:
+            return super().filter_queryset(request, queryset, view)
+        rank = not (
+            request.query_params.get(OrderingFilter.ordering_param)
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+        filtered = backend.filter_queryset(queryset, query, rank=rank)
+        if filtered is None:
+            return super().filter_queryset(request, queryset, view)
+        return filtered
@@ -0,0 +1,203 @@
+"""
+Batched product import from CSV or NDJSON.
+
+Rows are read as a stream and handled `batch_size` at a time. Each batch is
+validated with the model fields' own validators. Collections are checked
+against one id set loaded up front, and existing products are matched on
+slug with a single query. The batch is then written in its own
+transaction, with bulk_create for new products and
+Product.objects.update_rows for existing ones. A bad row only costs its
+own line in the error report, and a failing batch never leaves a partial
+write behind.
+
+Neither write goes through the Product signals, so the importer does
+their work itself. It sets last_update explicitly, which the search index
+watermark relies on. It adjusts Collection.products_count and sends
+products_updated.
+"""
+import csv
+import io
+import json
+from collections import Counter, defaultdict
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.text import slugify
+
+from store.models import Collection, Product
+from store.signals import products_updated
+
+FORMATS = ("csv", "ndjson")
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, row dict) from a text stream."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == "ndjson":
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                row = e
+            yield line_number, row
+    else:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+
+
+def open_upload(uploaded_file):
+    """Wrap a binary upload (or file) as a text stream for read_rows."""
+    return io.TextIOWrapper(uploaded_file, encoding="utf-8-sig", newline="")
+
+
+class ImportResult:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.errors = []  # (line number, slug, message)
+
+    def add_error(self, line_number, slug, message):
+        self.errors.append((line_number, slug, message))
+
+
+class ProductImporter:
+    def __init__(self, batch_size=1000, dry_run=False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.fields = {
+            name: Product._meta.get_field(name)
+            for name in ["title", "slug", "unit_price", "inventory"]
+        }
+        self.max_slug_length = self.fields["slug"].max_length
+
+    def run(self, rows):
+        """Import an iterable of (line number, row) pairs."""
+        result = ImportResult()
+        self.collection_ids = set(Collection.objects.values_list("id", flat=True))
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                return result
+            result.rows += len(batch)
+            self.import_batch(batch, result)
+
+    def import_batch(self, batch, result):
+        cleaned = {}
+        for line_number, row in batch:
+            try:
+                values = self.clean_row(row)
+            except ValidationError as e:
+                slug = row.get("slug") if isinstance(row, dict) else None
+                result.add_error(line_number, slug, "; ".join(e.messages))
+                continue
+            # a slug repeated within a batch: the last row wins
+            cleaned[values["slug"]] = (line_number, values)
+        if not cleaned:
+            return
+        try:
+            created, updated = self.write_batch(cleaned, result)
+        except DatabaseError as e:
+            # e.g. a collection deleted since the import started; the
+            # batch was rolled back as a whole
+            for line_number, values in cleaned.values():
+                result.add_error(line_number, values["slug"], f"batch failed: {e}")
+        else:
+            result.created += created
+            result.updated += updated
+
+    def write_batch(self, cleaned, result):
+        """Write one batch in a transaction; return (created, updated)."""
+        with transaction.atomic():
+            existing = defaultdict(list)
+            # locked so a concurrent delete cannot be undone by the upsert
+            for slug, pk, collection_id in (
+                Product.objects.select_for_update()
+                .filter(slug__in=cleaned)
+                .values_list("slug", "id", "collection_id")
+            ):
+                existing[slug].append((pk, collection_id))
+
+            now = timezone.now()
+            to_create = []
+            to_update = defaultdict(list)  # updated fields -> products
+            deltas = Counter()
+            for slug, (line_number, values) in cleaned.items():
+                matches = existing.get(slug, [])
+                if len(matches) > 1:
+                    result.add_error(line_number, slug, "slug matches several products")
+                    continue
+                product = Product(last_update=now, **values)
+                if matches:
+                    product.pk, previous_collection_id = matches[0]
+                    if previous_collection_id != product.collection_id:
+                        deltas[previous_collection_id] -= 1
+                        deltas[product.collection_id] += 1
+                    to_update[tuple(values) + ("last_update",)].append(product)
+                else:
+                    deltas[product.collection_id] += 1
+                    to_create.append(product)
+
+            updated = sum(len(products) for products in to_update.values())
+            if self.dry_run:
+                return len(to_create), updated
+
+            Product.objects.bulk_create(to_create)
+            for fields, products in to_update.items():
+                Product.objects.update_rows(products, fields)
+
+            for collection_id, delta in deltas.items():
+                if delta:
+                    Collection.objects.filter(pk=collection_id).update(
+                        products_count=F("products_count") + delta
+                    )
+
+            product_ids = [p.pk for p in to_create if p.pk is not None]
+            if len(product_ids) < len(to_create):
+                # the backend cannot return ids from bulk inserts
+                product_ids = list(
+                    Product.objects.filter(
+                        slug__in=[p.slug for p in to_create]
+                    ).values_list("id", flat=True)
+                )
+            product_ids += [p.pk for products in to_update.values() for p in products]
+            products_updated.send_robust(self.__class__, product_ids=product_ids)
+        return len(to_create), updated
+
+    def clean_row(self, row):
+        if not isinstance(row, dict):
+            raise ValidationError(f"invalid row: {row}")
+        errors = []
+        values = {}
+        raw = dict(row)
+        if not raw.get("slug"):
+            raw["slug"] = slugify(raw.get("title") or "")[: self.max_slug_length]
+        # Field.clean runs the model's validators: max_length, max_digits,
+        # the unit_price minimum, and rejects missing required values
+        for name in ["title", "slug", "unit_price", "inventory"]:
+            try:
+                values[name] = self.fields[name].clean(raw.get(name), None)
+            except ValidationError as e:
+                errors += [f"{name}: {message}" for message in e.messages]
+        if "description" in raw:
+            values["description"] = raw["description"] or None
+
+        collection_id = raw.get("collection_id")
+        try:
+            values["collection_id"] = int(collection_id)
+        except (TypeError, ValueError):
+            errors.append(f"collection_id: invalid collection {collection_id!r}")
+        else:
+            if values["collection_id"] not in self.collection_ids:
+                errors.append(f"collection_id: unknown collection {collection_id}")
+        if errors:
+            raise ValidationError(errors)
+        return values
@@ -0,0 +1,93 @@
+import statistics
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+
+from core.models import User
+from store.benchmark import seed_products
+from store.models import Collection
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database with --rows products and time the product "
+        "changelist with STORE_ADMIN_PERFORMANCE_MODE off and on. Use "
+        "--settings=storefront.settings_benchmark to run on SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000000)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            # millions of rows do not belong in an in-memory database
+            test_settings = connection.settings_dict.setdefault("TEST", {})
+            if not test_settings.get("NAME"):
+                test_settings["NAME"] = str(
+                    Path(connection.settings_dict["NAME"]).with_name(
+                        "benchmark_admin.sqlite3"
+                    )
+                )
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(
+                CACHES={
+                    "default": {
+                        "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+                    }
+                },
+                STORE_OUTBOX_DISPATCH_ON_COMMIT=False,
+            ):
+                self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run(self, options):
+        started = time.perf_counter()
+        seed_products(options["rows"])
+        self.stdout.write(
+            f"Seeded {options['rows']} products in {time.perf_counter() - started:.1f}s"
+        )
+        user = User.objects.create_superuser("bench", "bench@example.com", "password")
+        client = Client()
+        client.force_login(user)
+
+        changelist = reverse("admin:store_product_changelist")
+        middle = options["rows"] // 10 // 2
+        collection = Collection.objects.order_by("id").first()
+        pages = [
+            ("first page", "?p=1"),
+            ("middle page", f"?p={middle}"),
+            # reached from the middle page, as the "next" link does
+            ("next page", f"?p={middle + 1}"),
+            ("by collection", f"?collection__id__exact={collection.pk}"),
+            ("low inventory", "?inventory=%3C10"),
+        ]
+        for mode in [False, True]:
+            with override_settings(STORE_ADMIN_PERFORMANCE_MODE=mode):
+                for label, query in pages:
+                    timings = []
+                    for i in range(options["repeat"]):
+                        if label == "next page":
+                            client.get(changelist + f"?p={middle}")
+                        started = time.perf_counter()
+                        response = client.get(changelist + query)
+                        timings.append((time.perf_counter() - started) * 1000)
+                        assert response.status_code == 200, response.status_code
+                    self.stdout.write(
+                        f"performance mode {'on ' if mode else 'off'} "
+                        f"{label:<15} {statistics.median(timings):>10.1f}ms "
+                        f"(first {timings[0]:.1f}ms)"
+                    )
@@ -0,0 +1,77 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from store import benchmark
+
+DEFAULT_BUDGET = Path(benchmark.__file__).with_name("benchmark_budget.json")
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database, call every store endpoint and fail if "
+        "a query count exceeds the checked-in budget. Use "
+        "--settings=storefront.settings_benchmark to run on SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=int, default=1)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--budget", default=str(DEFAULT_BUDGET))
+        parser.add_argument("--report", help="Write the JSON report to this file.")
+        parser.add_argument(
+            "--update-budget",
+            action="store_true",
+            help="Rewrite the budget file from the measured query counts.",
+        )
+
+    def handle(self, *args, **options):
+        budget_path = Path(options["budget"])
+        budget = json.loads(budget_path.read_text()) if budget_path.exists() else {}
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # measure the database path: no catalog cache, no background
+            # outbox thread competing for the connection
+            with override_settings(
+                CACHES={
+                    "default": {
+                        "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+                    }
+                },
+                STORE_OUTBOX_DISPATCH_ON_COMMIT=False,
+            ):
+                users = benchmark.seed(options["scale"])
+                scenarios = benchmark.build_scenarios(users)
+                report = benchmark.run_benchmark(scenarios, budget, options["repeat"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report["scale"] = options["scale"]
+        for result in report["endpoints"]:
+            self.stdout.write(
+                f"{result['name']:<28} {result['status']:>4} "
+                f"{result['queries']:>4} queries (budget {result['budget']}) "
+                f"{result['time_ms']:>9.2f}ms {result['bytes']:>8} bytes"
+            )
+        if options["report"]:
+            Path(options["report"]).write_text(json.dumps(report, indent=2))
+
+        if options["update_budget"]:
+            budget = {r["name"]: r["queries"] for r in report["endpoints"]}
+            budget_path.write_text(json.dumps(budget, indent=2) + "\n")
+            self.stdout.write(f"Wrote {budget_path}")
+            return
+        if report["failures"]:
+            raise CommandError(
+                "Benchmark regressions:\n" + "\n".join(report["failures"])
+            )
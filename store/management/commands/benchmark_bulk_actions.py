@@ -0,0 +1,136 @@
+import random
+import statistics
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from store import bulk_actions
+from store.benchmark import seed_products
+from store.models import BulkActionJob, Product
+
+
+class WriteProbe(threading.Thread):
+    """Update single products in a loop and record how long each write takes."""
+
+    def __init__(self, max_pk):
+        super().__init__(daemon=True)
+        self.max_pk = max_pk
+        self.stopped = threading.Event()
+        self.timings = []
+        self.errors = 0
+
+    def run(self):
+        rng = random.Random(42)
+        try:
+            while not self.stopped.is_set():
+                pk = rng.randint(1, self.max_pk)
+                started = time.perf_counter()
+                try:
+                    Product.objects.filter(pk=pk).update(unit_price=1)
+                except OperationalError:
+                    self.errors += 1
+                self.timings.append((time.perf_counter() - started) * 1000)
+                time.sleep(0.005)
+        finally:
+            connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database with --rows products and clear their "
+        "inventory with one UPDATE and then as a chunked bulk action, "
+        "reporting throughput, the time each transaction holds its locks (for "
+        "chunks: the whole chunk, an upper bound) and the latency of "
+        "concurrent single-row writes. Use "
+        "--settings=storefront.settings_benchmark to run on SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000000)
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            # the probe thread needs a database shared between connections
+            test_settings = connection.settings_dict.setdefault("TEST", {})
+            if not test_settings.get("NAME"):
+                test_settings["NAME"] = str(
+                    Path(connection.settings_dict["NAME"]).with_name(
+                        "benchmark_bulk_actions.sqlite3"
+                    )
+                )
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(
+                STORE_BULK_ACTION_RUN_ON_COMMIT=False,
+                STORE_OUTBOX_DISPATCH_ON_COMMIT=False,
+            ):
+                self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run(self, options):
+        rows = options["rows"]
+        started = time.perf_counter()
+        seed_products(rows)
+        self.stdout.write(
+            f"Seeded {rows} products in {time.perf_counter() - started:.1f}s"
+        )
+        max_pk = Product.objects.order_by("-pk").values_list("pk", flat=True)[0]
+
+        def single_update():
+            # the previous admin action: queryset.update(inventory=0)
+            started = time.perf_counter()
+            with transaction.atomic():
+                Product.objects.all().update(inventory=0)
+            return [time.perf_counter() - started]
+
+        def chunked():
+            # "select all" on the unfiltered changelist
+            job = bulk_actions.start(
+                "clear_inventory", Product.objects.all(), filters={}
+            )
+            queryset = bulk_actions.selection(job)
+            holds = []
+            while True:
+                started = time.perf_counter()
+                if not bulk_actions.run_chunk(job, queryset, options["chunk_size"]):
+                    break
+                holds.append(time.perf_counter() - started)
+            return holds
+
+        for label, clear in [
+            ("single UPDATE", single_update),
+            (f"chunks of {options['chunk_size']}", chunked),
+        ]:
+            Product.objects.update(inventory=1)
+            probe = WriteProbe(max_pk)
+            probe.start()
+            time.sleep(0.1)
+            started = time.perf_counter()
+            holds = clear()
+            elapsed = time.perf_counter() - started
+            probe.stopped.set()
+            probe.join()
+            assert not Product.objects.exclude(inventory=0).exists()
+            self.stdout.write(
+                f"{label:<20} total {elapsed:>7.2f}s "
+                f"{rows / elapsed:>10.0f} rows/s | "
+                f"lock hold max {max(holds) * 1000:>8.1f}ms "
+                f"median {statistics.median(holds) * 1000:>8.1f}ms | "
+                f"probe writes {len(probe.timings)}, "
+                f"max {max(probe.timings):.1f}ms, "
+                f"p50 {statistics.median(probe.timings):.1f}ms, "
+                f"errors {probe.errors}"
+            )
+        BulkActionJob.objects.all().delete()
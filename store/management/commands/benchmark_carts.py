@@ -0,0 +1,124 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Prefetch
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from store import benchmark
+from store.models import Cart, CartItem, Product
+from store.serializers import CartSerializer
+from store.views import CartViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database with a cart of --lines lines, then time "
+        "GET /store/cart/<id>/ and CartSerializer with line and cart totals "
+        "annotated by the database against totals computed in Python. Then "
+        "compare adding --items products to carts one POST at a time with "
+        "one POST to the bulk endpoint. Use "
+        "--settings=storefront.settings_benchmark to run on SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lines", type=int, default=500)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--items", type=int, default=50)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run(self, options):
+        benchmark.seed_products(options["lines"])
+        cart = Cart.objects.create()
+        CartItem.objects.bulk_create(
+            [
+                CartItem(cart=cart, product_id=product_id, quantity=i % 5 + 1)
+                for i, product_id in enumerate(
+                    Product.objects.order_by("id").values_list("id", flat=True)
+                )
+            ]
+        )
+        client = APIClient()
+        self.time(
+            f"GET /store/cart/<id>/, {options['lines']} lines",
+            lambda: client.get(reverse("cart-detail", args=[cart.pk])),
+            options,
+        )
+
+        in_python = Cart.objects.prefetch_related(
+            Prefetch("items", queryset=CartItem.objects.select_related("product"))
+        )
+        results = [
+            self.time(
+                f"CartSerializer, totals {label}",
+                lambda: CartSerializer(queryset.get(pk=cart.pk)).data,
+                options,
+            )
+            for label, queryset in [
+                ("in the database", CartViewSet.queryset),
+                ("in Python", in_python),
+            ]
+        ]
+        if results[0] != results[1]:
+            raise CommandError("The annotated totals differ from Python's")
+
+        self.add_items(client, options)
+
+    def add_items(self, client, options):
+        items = [
+            {"product_id": product_id, "quantity": 1}
+            for product_id in Product.objects.order_by("id").values_list(
+                "id", flat=True
+            )[: options["items"]]
+        ]
+
+        def single(cart):
+            path = reverse("cart-items-list", args=[cart.pk])
+            return [client.post(path, item, format="json") for item in items]
+
+        def bulk(cart):
+            path = reverse("cart-items-bulk", args=[cart.pk])
+            return [client.post(path, items, format="json")]
+
+        for label, add in [("one POST per item", single), ("bulk POST", bulk)]:
+            carts = [Cart.objects.create() for i in range(options["repeat"])]
+            started = time.perf_counter()
+            for cart in carts:
+                for response in add(cart):
+                    if response.status_code != 201:
+                        raise CommandError(f"{label}: HTTP {response.status_code}")
+            elapsed = time.perf_counter() - started
+            added = len(carts) * len(items)
+            if CartItem.objects.filter(cart__in=carts).count() != added:
+                raise CommandError(f"{label}: lines missing")
+            self.stdout.write(
+                f"add {len(items)} items, {label:<18} {added / elapsed:>9.0f} items/s"
+            )
+
+    def time(self, label, compute, options):
+        timings = []
+        for i in range(options["repeat"]):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                result = compute()
+                timings.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(
+            f"{label:<40} {len(queries):>3} queries "
+            f"{statistics.median(timings):>9.2f}ms"
+        )
+        return result
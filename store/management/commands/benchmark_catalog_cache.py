@@ -0,0 +1,88 @@
+import json
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+
+from core.models import User
+from store import benchmark
+from store.cache import catalog_cache
+from store.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database with --products products, then compare "
+        "requests/s on /store/products/ over --urls distinct pages "
+        "with the catalog cache off and on, and print the cache's hit, miss "
+        "and eviction counters. Fails if a product change is not visible "
+        "through the cache. Use --settings=storefront.settings_benchmark to "
+        "run on SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=10000)
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--urls", type=int, default=20)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(
+                CACHES={
+                    "default": {
+                        "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+                    }
+                }
+            ):
+                self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run(self, options):
+        benchmark.seed_products(options["products"])
+        user = User.objects.create_user("bench", "bench@example.com", "password")
+        client = benchmark._client(user)
+        products_list = reverse("products-list")
+        paths = [
+            f"{products_list}?page={page}&ordering=unit_price"
+            for page in range(1, options["urls"] + 1)
+        ]
+
+        # a timeout of 0 stores nothing, so every request reads the database
+        for label, timeout in [("cache off", 0), ("cache on", 300)]:
+            with override_settings(STORE_CATALOG_CACHE_TIMEOUT=timeout):
+                catalog_cache.reset_stats()
+                started = time.perf_counter()
+                for i in range(options["requests"]):
+                    response = client.get(paths[i % len(paths)])
+                    if response.status_code != 200:
+                        raise CommandError(f"HTTP {response.status_code}")
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{label:<10} {options['requests'] / elapsed:>8.0f} req/s "
+                    f"{json.dumps(catalog_cache.stats())}"
+                )
+
+        with override_settings(STORE_CATALOG_CACHE_TIMEOUT=300):
+            product = Product.objects.order_by("pk").first()
+            path = reverse("products-detail", args=[product.pk])
+            client.get(path)
+            product.unit_price += 1
+            product.save()
+            served = json.loads(client.get(path).content)["unit_price"]
+            if Decimal(str(served)) != product.unit_price:
+                raise CommandError(
+                    f"The cache served unit_price {served} after a save of "
+                    f"{product.unit_price}"
+                )
+            self.stdout.write(f"after a save: {json.dumps(catalog_cache.stats())}")
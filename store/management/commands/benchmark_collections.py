@@ -0,0 +1,141 @@
+import io
+import statistics
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+
+from core.models import User
+from store import benchmark
+from store.models import Collection, Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database with --collections collections and "
+        "--products products, then compare listing collections with the "
+        "per-request Count('products') annotation against the stored "
+        "products_count, time rebuild_collection_counts, and fail if "
+        "product writes leave a stale count. Use "
+        "--settings=storefront.settings_benchmark to run on SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--collections", type=int, default=1000)
+        parser.add_argument("--products", type=int, default=1000000)
+        parser.add_argument("--writes", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # the catalog cache is off so every request reads the database
+            with override_settings(
+                CACHES={
+                    "default": {
+                        "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+                    }
+                },
+                STORE_CATALOG_CACHE_TIMEOUT=0,
+            ):
+                self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run(self, options):
+        started = time.perf_counter()
+        benchmark.seed_products(options["products"], options["collections"])
+        self.stdout.write(
+            f"seeded {options['products']} products in {options['collections']} "
+            f"collections in {time.perf_counter() - started:.2f}s"
+        )
+
+        annotated = self.time(
+            "Count('products') per request",
+            lambda: dict(
+                Collection.objects.annotate(count=Count("products")).values_list(
+                    "id", "count"
+                )
+            ),
+            options,
+        )
+        stored = self.time(
+            "stored products_count",
+            lambda: dict(Collection.objects.values_list("id", "products_count")),
+            options,
+        )
+        if annotated != stored:
+            raise CommandError("Stored products_count differs from the products")
+
+        user = User.objects.create_user("bench", "bench@example.com", "password")
+        client = benchmark._client(user)
+        response = self.time(
+            "GET /store/collections/",
+            lambda: client.get(reverse("collection-list")),
+            options,
+        )
+        if response.status_code != 200:
+            raise CommandError(f"GET /store/collections/: HTTP {response.status_code}")
+
+        started = time.perf_counter()
+        call_command("rebuild_collection_counts", stdout=io.StringIO())
+        self.stdout.write(
+            f"rebuild_collection_counts: {time.perf_counter() - started:.2f}s"
+        )
+
+        self.write_products(options)
+        output = io.StringIO()
+        call_command("rebuild_collection_counts", verify=True, stdout=output)
+        summary = output.getvalue().splitlines()[-1]
+        self.stdout.write(f"after the writes: {summary}")
+        if "found 0 stale" not in summary:
+            raise CommandError(output.getvalue())
+
+    def write_products(self, options):
+        """Create, move and delete products one at a time through the ORM."""
+        collection_ids = list(Collection.objects.values_list("id", flat=True))
+        started = time.perf_counter()
+        products = [
+            Product.objects.create(
+                title=f"New product {i}",
+                slug=f"new-product-{i}",
+                unit_price=1,
+                inventory=1,
+                collection_id=collection_ids[i % len(collection_ids)],
+            )
+            for i in range(options["writes"])
+        ]
+        for i, product in enumerate(products):
+            product.collection_id = collection_ids[(i + 1) % len(collection_ids)]
+            product.save()
+        for product in products:
+            product.delete()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"create, move and delete {options['writes']} products: "
+            f"{elapsed:.2f}s, {options['writes'] * 3 / elapsed:.0f} writes/s"
+        )
+
+    def time(self, label, compute, options):
+        timings = []
+        for i in range(options["repeat"]):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                result = compute()
+                timings.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(
+            f"{label:<32} {len(queries):>3} queries "
+            f"{statistics.median(timings):>9.2f}ms"
+        )
+        return result
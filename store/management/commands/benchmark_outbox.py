@@ -0,0 +1,120 @@
+import contextlib
+import io
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+
+from core.models import User
+from store import benchmark, outbox
+from store.models import Cart, CartItem, OutboxEvent, Product
+from store.signals import order_created
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database, then time checkouts (POST /store/orders/) "
+        "with 0 to --receivers order_created receivers that each take "
+        "--receiver-ms. Delivered inline, as checkout did before the outbox, "
+        "receivers add to every checkout; through the outbox they run after "
+        "the response, and the drain time and dispatch lag are reported "
+        "instead. Use --settings=storefront.settings_benchmark to run on "
+        "SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--checkouts", type=int, default=200)
+        parser.add_argument("--receivers", type=int, default=20)
+        parser.add_argument("--receiver-ms", type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # events wait in the outbox until this command drains them
+            with override_settings(STORE_OUTBOX_DISPATCH_ON_COMMIT=False):
+                self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run(self, options):
+        benchmark.seed_products(10, collections=1)
+        Product.objects.update(inventory=10 ** 9)
+        product_id = Product.objects.values_list("id", flat=True).first()
+        user = User.objects.create_user("bench", "bench@example.com", "password")
+        client = benchmark._client(user)
+        path = reverse("orders-list")
+        delivered = [0]
+
+        def receiver(sender, order, **kwargs):
+            time.sleep(options["receiver_ms"] / 1000)
+            delivered[0] += 1
+
+        counts = sorted({0, 1, options["receivers"] // 4, options["receivers"]})
+        try:
+            for count in counts:
+                for i in range(count):
+                    order_created.connect(
+                        receiver, weak=False, dispatch_uid=f"benchmark-{i}"
+                    )
+                for label, inline in [("inline", True), ("outbox", False)]:
+                    delivered[0] = 0
+                    timings = []
+                    for i in range(options["checkouts"]):
+                        cart = Cart.objects.create()
+                        CartItem.objects.create(
+                            cart=cart, product_id=product_id, quantity=1
+                        )
+                        started = time.perf_counter()
+                        response = client.post(
+                            path, {"cart_id": str(cart.pk)}, format="json"
+                        )
+                        if inline:
+                            self.dispatch(outbox.dispatch_pending)
+                        timings.append((time.perf_counter() - started) * 1000)
+                        if response.status_code != 200:
+                            raise CommandError(f"HTTP {response.status_code}")
+                    self.report(f"{count:>2} receivers {label}", timings)
+                    if not inline:
+                        depth = outbox.stats()["queue_depth"]
+                        started = time.perf_counter()
+                        self.dispatch(outbox.drain)
+                        elapsed = time.perf_counter() - started
+                        lag = outbox.stats()["last_dispatch_lag"]
+                        self.stdout.write(
+                            f"{'':<20} drained {depth} events in {elapsed:.2f}s, "
+                            f"last dispatch lag {lag:.2f}s"
+                        )
+                    if delivered[0] != options["checkouts"] * count:
+                        raise CommandError(
+                            f"{delivered[0]} deliveries, expected "
+                            f"{options['checkouts'] * count}"
+                        )
+                    if OutboxEvent.objects.exclude(
+                        status=OutboxEvent.STATUS_DISPATCHED
+                    ).exists():
+                        raise CommandError("Undelivered outbox events remain")
+        finally:
+            for i in range(options["receivers"]):
+                order_created.disconnect(dispatch_uid=f"benchmark-{i}")
+
+    def dispatch(self, deliver):
+        # core's on_order_created prints every order
+        with contextlib.redirect_stdout(io.StringIO()):
+            deliver()
+
+    def report(self, label, timings):
+        timings = sorted(timings)
+        self.stdout.write(
+            f"{label:<20} checkout p50 {statistics.median(timings):>8.2f}ms "
+            f"p99 {timings[int(len(timings) * 0.99) - 1]:>8.2f}ms "
+            f"max {timings[-1]:>8.2f}ms"
+        )
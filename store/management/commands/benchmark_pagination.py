@@ -0,0 +1,112 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+
+from core.models import User
+from store import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database with --products products, then compare "
+        "the latency of ?page=N (OFFSET) with ?cursor= (keyset) pages from "
+        "page 1 to the last one. Keyset pages are reached by following "
+        "`next` links. Use --settings=storefront.settings_benchmark to run "
+        "on SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=100000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--pages",
+            default="1,10,100,1000,10000",
+            help="Comma-separated page numbers to report.",
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # the catalog cache is off so every request reads the database
+            with override_settings(
+                CACHES={
+                    "default": {
+                        "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+                    }
+                },
+                STORE_CATALOG_CACHE_TIMEOUT=0,
+            ):
+                self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run(self, options):
+        started = time.perf_counter()
+        benchmark.seed_products(options["products"])
+        self.stdout.write(
+            f"seeded {options['products']} products in "
+            f"{time.perf_counter() - started:.2f}s"
+        )
+        user = User.objects.create_superuser("bench", "bench@example.com", "password")
+        client = benchmark._client(user)
+        products_list = reverse("products-list")
+        pages = [
+            page
+            for page in sorted(int(page) for page in options["pages"].split(","))
+            if (page - 1) * 10 < options["products"]
+        ]
+
+        for ordering in ["", "&ordering=unit_price"]:
+            keyset = self.walk(client, products_list + "?cursor=" + ordering, pages)
+            for page in pages:
+                offset = self.time_get(
+                    client, f"{products_list}?page={page}{ordering}", options
+                )
+                cursor = self.time_get(client, keyset[page], options)
+                self.stdout.write(
+                    f"page {page:>6} {ordering or '(title)':<22} "
+                    f"offset {offset[0]:>8.2f}ms (SQL {offset[1]:>7.2f}ms) | "
+                    f"keyset {cursor[0]:>8.2f}ms (SQL {cursor[1]:>7.2f}ms)"
+                )
+
+    def walk(self, client, path, pages):
+        """Follow `next` links from `path` and return the URLs of `pages`."""
+        urls = {}
+        page = 1
+        while path and page <= pages[-1]:
+            if page in pages:
+                urls[page] = path
+            response = client.get(path)
+            if response.status_code != 200:
+                raise CommandError(f"{path}: HTTP {response.status_code}")
+            path = json.loads(response.content)["next"]
+            page += 1
+        return urls
+
+    def time_get(self, client, path, options):
+        """Median milliseconds of the whole request and of its SQL."""
+        timings = []
+        sql_timings = []
+        for i in range(options["repeat"]):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(path)
+                timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f"{path}: HTTP {response.status_code}")
+            sql_timings.append(
+                sum(float(query["time"]) for query in queries.captured_queries) * 1000
+            )
+        return statistics.median(timings), statistics.median(sql_timings)
@@ -0,0 +1,97 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+
+from store import benchmark
+from store.models import Collection, Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database and poll the product and collection "
+        "endpoints with and without If-None-Match, reporting bytes sent and "
+        "latency. A product changes every --change-every polls. Use "
+        "--settings=storefront.settings_benchmark to run on SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=int, default=10)
+        parser.add_argument("--polls", type=int, default=200)
+        parser.add_argument("--change-every", type=int, default=20)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # the catalog cache is off so the plain polls measure the
+            # database path; the catalog version still needs a real cache
+            with override_settings(
+                CACHES={
+                    "default": {
+                        "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+                    }
+                },
+                STORE_CATALOG_CACHE_TIMEOUT=0,
+                STORE_OUTBOX_DISPATCH_ON_COMMIT=False,
+            ):
+                users = benchmark.seed(options["scale"])
+                client = benchmark._client(users["staff"])
+                product = Product.objects.order_by("id").first()
+                collection = Collection.objects.order_by("id").first()
+                paths = [
+                    reverse("products-list"),
+                    reverse("products-list") + "?collection_id=1&ordering=unit_price",
+                    reverse("products-detail", args=[product.pk]),
+                    reverse("collection-list"),
+                    reverse("collection-detail", args=[collection.pk]),
+                ]
+                for path in paths:
+                    for conditional in [False, True]:
+                        self.report(
+                            path,
+                            conditional,
+                            self.poll(client, path, conditional, options),
+                        )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def poll(self, client, path, conditional, options):
+        product = Product.objects.order_by("id").first()
+        etag = None
+        timings, sizes, not_modified = [], [], 0
+        for i in range(options["polls"]):
+            if i and i % options["change_every"] == 0:
+                product.inventory += 1
+                product.save()
+            headers = {"HTTP_IF_NONE_MATCH": etag} if conditional and etag else {}
+            started = time.perf_counter()
+            response = client.get(path, **headers)
+            timings.append((time.perf_counter() - started) * 1000)
+            sizes.append(len(response.content))
+            if response.status_code == 304:
+                not_modified += 1
+            else:
+                etag = response.get("ETag")
+        return {
+            "bytes": sum(sizes),
+            "median_ms": statistics.median(timings),
+            "not_modified": not_modified,
+            "polls": options["polls"],
+        }
+
+    def report(self, path, conditional, result):
+        label = "If-None-Match" if conditional else "plain"
+        self.stdout.write(
+            f"{path:<50} {label:<14} {result['bytes']:>9} bytes "
+            f"{result['median_ms']:>8.2f}ms median "
+            f"{result['not_modified']:>4}/{result['polls']} not modified"
+        )
@@ -0,0 +1,123 @@
+import time
+import tracemalloc
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.renderers import JSONRenderer
+
+from core.models import User
+from core.renderers import FastJSONRenderer, PreRenderedJSON, orjson
+from store.models import Collection, Customer, Order, OrderItem, Product
+from store.serializers import OrderSerializer, ProductSerializer
+from tags.models import TaggedItem
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database and report encode time and peak memory "
+        "for large product and order list payloads with DRF's JSONRenderer, "
+        "FastJSONRenderer and a pre-rendered payload. Use "
+        "--settings=storefront.settings_benchmark to run on SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=10000)
+        parser.add_argument("--orders", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.seed(options["products"], options["orders"])
+            payloads = [
+                (
+                    "products",
+                    ProductSerializer(
+                        TaggedItem.objects.attach_tags(
+                            Product, Product.objects.order_by("id")
+                        ),
+                        many=True,
+                    ).data,
+                ),
+                (
+                    "orders",
+                    OrderSerializer(
+                        Order.objects.select_related("customer__user")
+                        .prefetch_related("items__product")
+                        .order_by("id"),
+                        many=True,
+                    ).data,
+                ),
+            ]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f"orjson: {orjson.__version__ if orjson else 'missing'}")
+        for name, data in payloads:
+            prerendered = PreRenderedJSON.from_data(data)
+            for label, renderer, payload in [
+                ("JSONRenderer", JSONRenderer(), data),
+                ("FastJSONRenderer", FastJSONRenderer(), data),
+                ("pre-rendered", FastJSONRenderer(), prerendered),
+            ]:
+                seconds, peak, size = self.measure(renderer, payload, options["repeat"])
+                self.stdout.write(
+                    f"{name:<9} {len(data):>6} objects  {label:<17} "
+                    f"{seconds * 1000:>9.2f}ms  peak {peak / 1024:>9.0f}KiB  "
+                    f"{size:>9} bytes"
+                )
+
+    def measure(self, renderer, payload, repeat):
+        best = None
+        for i in range(repeat):
+            started = time.perf_counter()
+            renderer.render(payload)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        # memory is traced separately: tracing slows down the encoder. The
+        # peak counts everything allocated while encoding, output included
+        tracemalloc.start()
+        content = renderer.render(payload)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return best, peak, len(content)
+
+    def seed(self, products, orders):
+        collection = Collection.objects.create(title="Collection")
+        Product.objects.bulk_create(
+            [
+                Product(
+                    title=f"Product {i}",
+                    slug=f"product-{i}",
+                    description=f"Description of product {i}",
+                    unit_price=Decimal(i % 99900 + 100) / 100,
+                    inventory=i % 500,
+                    collection=collection,
+                )
+                for i in range(products)
+            ],
+            batch_size=1000,
+        )
+        product_ids = list(Product.objects.values_list("id", flat=True))
+        user = User.objects.create_user("bench", "bench@example.com", "password")
+        customer = Customer.objects.get(user=user)
+        Order.objects.bulk_create(
+            [Order(customer=customer) for i in range(orders)], batch_size=1000
+        )
+        OrderItem.objects.bulk_create(
+            [
+                OrderItem(
+                    order_id=order_id,
+                    product_id=product_ids[(order_id * 3 + j) % len(product_ids)],
+                    quantity=j + 1,
+                    unit_price=Decimal(order_id % 9900 + 100) / 100,
+                )
+                for order_id in Order.objects.values_list("id", flat=True)
+                for j in range(3)
+            ],
+            batch_size=1000,
+        )
@@ -0,0 +1,227 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Max
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import User
+from store import benchmark
+from store.models import Product, Reviews
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database where one product has --reviews reviews, "
+        "then compare computing review counts and latest dates per request "
+        "against the stored aggregates, page through the reviews by keyset "
+        "and by offset, and check the aggregates after adding and deleting "
+        "reviews. Use --settings=storefront.settings_benchmark to run on "
+        "SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=1000)
+        parser.add_argument("--reviews", type=int, default=100000)
+        parser.add_argument(
+            "--writes",
+            type=int,
+            default=1000,
+            help="Reviews added and deleted one at a time.",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # the catalog cache is off so every request reads the database
+            with override_settings(
+                CACHES={
+                    "default": {
+                        "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+                    }
+                },
+                STORE_CATALOG_CACHE_TIMEOUT=0,
+                STORE_OUTBOX_DISPATCH_ON_COMMIT=False,
+            ):
+                self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run(self, options):
+        benchmark.seed_products(options["products"])
+        product_ids = list(Product.objects.order_by("id").values_list("id", flat=True))
+        product_id = product_ids[0]
+
+        # the busy product, plus a few reviews on every other product
+        started = time.perf_counter()
+        Reviews.objects.bulk_create(
+            [
+                Reviews(
+                    product_id=product_id,
+                    name=f"Reviewer {i}",
+                    description=f"Review {i}",
+                )
+                for i in range(options["reviews"])
+            ],
+            batch_size=10000,
+        )
+        Reviews.objects.bulk_create(
+            [
+                Reviews(product_id=other, name="Reviewer", description="Review")
+                for other in product_ids[1:]
+                for i in range(3)
+            ],
+            batch_size=10000,
+        )
+        # auto_now_add stamps the rows almost alike; give each block of 1000
+        # its own minute, so pages seek on dates and on ids within a block
+        busy = Reviews.objects.filter(product_id=product_id)
+        first_id = busy.order_by("id").values_list("id", flat=True).first()
+        blocks = range(0, options["reviews"], 1000)
+        now = timezone.now()
+        for block in blocks:
+            busy.filter(
+                id__gte=first_id + block, id__lt=first_id + block + 1000
+            ).update(date=now - timedelta(minutes=len(blocks) - block // 1000))
+        Product.objects.refresh_review_aggregates()
+        self.stdout.write(
+            f"seeded {Reviews.objects.count()} reviews in "
+            f"{time.perf_counter() - started:.2f}s"
+        )
+
+        page = product_ids[:10]
+
+        def per_request():
+            return {
+                product.pk: (product.count, product.latest)
+                for product in Product.objects.filter(pk__in=page).annotate(
+                    count=Count("reviews"), latest=Max("reviews__date")
+                )
+            }
+
+        def stored():
+            return {
+                product.pk: (product.reviews_count, product.last_review_at)
+                for product in Product.objects.filter(pk__in=page)
+            }
+
+        results = [
+            self.time(f"10 products, aggregates {label}", compute, options)
+            for label, compute in [("per request", per_request), ("stored", stored)]
+        ]
+        if results[0] != results[1]:
+            raise CommandError("Stored review aggregates differ from the reviews")
+
+        user = User.objects.create_superuser("bench", "bench@example.com", "password")
+        client = benchmark._client(user)
+        reviews_list = reverse("product-reviews-list", args=[product_id])
+        cursor = self.cursor_after(client, reviews_list, options["reviews"] // 20)
+        self.time_get(client, reverse("products-list"), options)
+        self.time_get(client, reviews_list, options)
+        self.time_get(client, reviews_list + "?cursor=" + cursor, options)
+
+        # what a ?page= over the same ordering reads at the same depth
+        reviews = Reviews.objects.filter(product_id=product_id).order_by("-date", "-id")
+        offset = options["reviews"] // 2
+        self.time(
+            f"offset {offset} in reviews",
+            lambda: list(reviews[offset : offset + 10]),
+            options,
+        )
+        self.time(
+            "count reviews",
+            lambda: reviews.count(),
+            options,
+        )
+
+        self.add_and_delete(product_id, options)
+
+    def add_and_delete(self, product_id, options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            added = [
+                Reviews.objects.create(
+                    product_id=product_id, name="Reviewer", description="New review"
+                )
+                for i in range(options["writes"])
+            ]
+        elapsed = time.perf_counter() - started
+        self.check_aggregates(product_id, f"adding {options['writes']} reviews")
+        self.stdout.write(
+            f"add {options['writes']} reviews one at a time: {elapsed:.2f}s, "
+            f"{options['writes'] / elapsed:.0f} reviews/s"
+        )
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            for review in reversed(added):
+                review.delete()
+        elapsed = time.perf_counter() - started
+        self.check_aggregates(product_id, f"deleting {options['writes']} reviews")
+        self.stdout.write(
+            f"delete {options['writes']} reviews one at a time: {elapsed:.2f}s, "
+            f"{options['writes'] / elapsed:.0f} reviews/s"
+        )
+
+    def check_aggregates(self, product_id, label):
+        product = Product.objects.get(pk=product_id)
+        actual = Reviews.objects.filter(product_id=product_id).aggregate(
+            count=Count("id"), latest=Max("date")
+        )
+        if (product.reviews_count, product.last_review_at) != (
+            actual["count"],
+            actual["latest"],
+        ):
+            raise CommandError(
+                f"After {label}: stored {product.reviews_count}, "
+                f"{product.last_review_at}; actual {actual['count']}, "
+                f"{actual['latest']}"
+            )
+
+    def cursor_after(self, client, path, pages):
+        """Follow `next` links `pages` times and return the last cursor."""
+        cursor = ""
+        for i in range(pages):
+            response = client.get(path + "?cursor=" + cursor)
+            cursor = json.loads(response.content)["next"].split("cursor=")[1]
+        return cursor
+
+    def time_get(self, client, path, options):
+        timings = []
+        for i in range(options["repeat"]):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(path)
+                timings.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, response.status_code
+        label = path if len(path) <= 55 else path[:52] + "..."
+        self.stdout.write(
+            f"GET {label:<55} {len(queries):>3} queries "
+            f"{statistics.median(timings):>9.2f}ms"
+        )
+
+    def time(self, label, compute, options):
+        timings = []
+        for i in range(options["repeat"]):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                result = compute()
+                timings.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(
+            f"{label:<59} {len(queries):>3} queries "
+            f"{statistics.median(timings):>9.2f}ms"
+        )
+        return result
@@ -0,0 +1,149 @@
+import json
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+
+from core.models import User
+from store import benchmark
+from store.models import Collection, Product
+from store.search import get_search_backend
+
+WORDS = (
+    "lamp chair table desk sofa shelf mirror rug clock vase bowl plate cup "
+    "mug kettle pan pot knife fork spoon towel pillow blanket curtain basket "
+    "candle frame poster stool bench cabinet drawer hook rack tray jar bottle "
+    "glass lid box bag wallet belt scarf glove hat sock shoe boot jacket coat "
+    "shirt dress skirt jeans shorts sweater hoodie vest watch ring necklace "
+    "bracelet earring brooch pen pencil marker notebook folder binder stapler "
+    "tape glue scissors ruler eraser charger cable adapter speaker headphone "
+    "keyboard mouse monitor router camera tripod drone battery bulb fan heater "
+    "cooler filter brush comb razor soap lotion"
+).split()
+
+BACKENDS = [
+    ("SearchFilter (LIKE)", None),
+    ("InvertedIndexBackend", "store.search.InvertedIndexBackend"),
+    ("DatabaseFullTextBackend", "store.search.DatabaseFullTextBackend"),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database with --products products described from a "
+        "100-word vocabulary, then time ?search= on /store/products/ with "
+        "each search backend. Fails if a backend's count or ?ordering= "
+        "differs from SearchFilter's. Use "
+        "--settings=storefront.settings_benchmark to run on SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=500000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # the catalog cache is off so every request reads the database
+            with override_settings(
+                CACHES={
+                    "default": {
+                        "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+                    }
+                },
+                STORE_CATALOG_CACHE_TIMEOUT=0,
+            ):
+                self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run(self, options):
+        self.seed(options["products"])
+        user = User.objects.create_superuser("bench", "bench@example.com", "password")
+        client = benchmark._client(user)
+        products_list = reverse("products-list")
+        paths = [
+            products_list + "?search=lamp",
+            products_list + "?search=lamp%20cha",
+            products_list + "?search=lamp&ordering=unit_price",
+            products_list + "?search=lamp&ordering=unit_price&page=50",
+        ]
+
+        expected = {}
+        for label, path in BACKENDS:
+            with override_settings(STORE_SEARCH_BACKEND=path):
+                backend = get_search_backend()
+                if hasattr(backend, "build"):
+                    started = time.perf_counter()
+                    backend.build()
+                    self.stdout.write(
+                        f"{label}: index built in "
+                        f"{time.perf_counter() - started:.2f}s"
+                    )
+                for path in paths:
+                    data = self.time_get(client, label, path, options)
+                    if path not in expected:
+                        expected[path] = data
+                    self.compare(label, path, data, expected[path])
+
+    def seed(self, rows):
+        rng = random.Random(42)
+        collection = Collection.objects.create(title="Collection")
+        started = time.perf_counter()
+        for start in range(0, rows, 10000):
+            Product.objects.bulk_create(
+                [
+                    Product(
+                        title=" ".join(rng.sample(WORDS, 2)),
+                        slug=f"product-{i}",
+                        description=" ".join(rng.choices(WORDS, k=12)),
+                        unit_price=rng.randint(100, 99900) / 100,
+                        inventory=10,
+                        collection=collection,
+                    )
+                    for i in range(start, min(start + 10000, rows))
+                ]
+            )
+        self.stdout.write(
+            f"seeded {rows} products in {time.perf_counter() - started:.2f}s"
+        )
+
+    def compare(self, label, path, data, expected):
+        if data["count"] != expected["count"]:
+            raise CommandError(
+                f"{label} {path}: {data['count']} results, "
+                f"SearchFilter found {expected['count']}"
+            )
+        if "ordering=" in path:
+            prices = [product["unit_price"] for product in data["results"]]
+            if data["results"] != expected["results"] and prices != [
+                product["unit_price"] for product in expected["results"]
+            ]:
+                raise CommandError(f"{label} {path}: ordered differently")
+
+    def time_get(self, client, label, path, options):
+        timings = []
+        for i in range(options["repeat"]):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(path)
+                timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f"{label} {path}: HTTP {response.status_code}")
+        data = json.loads(response.content)
+        self.stdout.write(
+            f"{label:<24} {path.split('?')[1]:<42} {data['count']:>7} results "
+            f"{len(queries):>3} queries {statistics.median(timings):>9.2f}ms"
+        )
+        return data
@@ -0,0 +1,133 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.renderers import JSONRenderer
+
+from store.fast_serializers import compile_serializer
+from store.models import Cart, CartItem, Collection, Product
+from store.serializers import (
+    CartItemSerializer,
+    ProductSerializer,
+    SimpleProductSerializer,
+)
+from store.views import cart_item_total_price
+from tags.models import Tag, TaggedItem
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database, check that the compiled serializers "
+        "render byte-identical JSON to the DRF ones and report objects/s for "
+        "both. Use --settings=storefront.settings_benchmark to run on SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.seed(options["count"])
+            cart = Cart.objects.get()
+            products = Product.objects.order_by("id")
+            cart_items = (
+                CartItem.objects.filter(cart=cart)
+                .select_related("product")
+                .annotate(total_price=cart_item_total_price())
+                .order_by("id")
+            )
+            # the views attach ProductSerializer's tags in one query per page
+            cases = [
+                (ProductSerializer, products, True),
+                (SimpleProductSerializer, products, False),
+                (CartItemSerializer, cart_items, False),
+            ]
+            failures = [
+                failure
+                for serializer_class, queryset, tagged in cases
+                for failure in self.compare(
+                    serializer_class, queryset, tagged, options["repeat"]
+                )
+            ]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        if failures:
+            raise CommandError("Output differs:\n" + "\n".join(failures))
+
+    def seed(self, count):
+        collections = Collection.objects.bulk_create(
+            [Collection(title=f"Collection {i}") for i in range(10)]
+        )
+        collections = list(Collection.objects.order_by("id"))
+        Product.objects.bulk_create(
+            [
+                Product(
+                    title=f"Product {i}",
+                    slug=f"product-{i}",
+                    # some products without a description
+                    description=f"Description of product {i}" if i % 7 else None,
+                    unit_price=Decimal(i % 99900 + 100) / 100,
+                    inventory=i % 500,
+                    collection=collections[i % len(collections)],
+                )
+                for i in range(count)
+            ],
+            batch_size=1000,
+        )
+        product_ids = list(Product.objects.values_list("id", flat=True))
+        for i, label in enumerate(["sale", "new", "featured"]):
+            TaggedItem.objects.tag_many(
+                Tag.objects.create(label=label), Product, product_ids[i :: i + 2]
+            )
+        cart = Cart.objects.create()
+        CartItem.objects.bulk_create(
+            [
+                CartItem(cart=cart, product_id=pk, quantity=i % 5 + 1)
+                for i, pk in enumerate(Product.objects.values_list("id", flat=True))
+            ],
+            batch_size=1000,
+        )
+
+    def compare(self, serializer_class, queryset, tagged, repeat):
+        renderer = JSONRenderer()
+        columns, represent = compile_serializer(
+            serializer_class, queryset.query.annotations
+        )
+
+        def tag(objects):
+            if tagged:
+                return TaggedItem.objects.attach_tags(queryset.model, objects)
+            return objects
+
+        def drf():
+            return serializer_class(tag(queryset), many=True).data
+
+        def fast():
+            return [represent(row) for row in tag(queryset.values(*columns))]
+
+        timings = {}
+        for name, build in [("drf", drf), ("fast", fast)]:
+            best = None
+            for i in range(repeat):
+                started = time.perf_counter()
+                data = build()
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = (best, renderer.render(data))
+
+        count = queryset.count()
+        (drf_time, drf_json), (fast_time, fast_json) = timings["drf"], timings["fast"]
+        self.stdout.write(
+            f"{serializer_class.__name__:<24} {count:>7} objects "
+            f"drf {count / drf_time:>10.0f}/s  fast {count / fast_time:>10.0f}/s  "
+            f"x{drf_time / fast_time:.1f}"
+        )
+        if drf_json != fast_json:
+            return [f"{serializer_class.__name__}: JSON output differs"]
+        return []
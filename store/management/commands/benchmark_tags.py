@@ -0,0 +1,133 @@
+import json
+import statistics
+import time
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+
+from core.models import User
+from store import benchmark
+from store.models import Product
+from store.serializers import ProductSerializer
+from tags.models import Tag, TaggedItem
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database with --products products, tag them one "
+        "row at a time and in bulk, then list product pages with their tags "
+        "and filter by ?tags=, reporting query counts and latency. Use "
+        "--settings=storefront.settings_benchmark to run on SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=100000)
+        parser.add_argument("--tags", type=int, default=20)
+        parser.add_argument(
+            "--sample",
+            type=int,
+            default=1000,
+            help="Products tagged one row at a time.",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # the catalog cache is off so every request reads the database
+            with override_settings(
+                CACHES={
+                    "default": {
+                        "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+                    }
+                },
+                STORE_CATALOG_CACHE_TIMEOUT=0,
+                STORE_OUTBOX_DISPATCH_ON_COMMIT=False,
+            ):
+                self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run(self, options):
+        benchmark.seed_products(options["products"])
+        product_ids = list(Product.objects.order_by("id").values_list("id", flat=True))
+        tags = Tag.objects.bulk_create(
+            [Tag(label=f"tag-{i}") for i in range(options["tags"])]
+        )
+        tags = list(Tag.objects.order_by("id"))
+
+        # one row at a time, as the admin inline saves them
+        content_type = ContentType.objects.get_for_model(Product)
+        sample = product_ids[: options["sample"]]
+        started = time.perf_counter()
+        with transaction.atomic():
+            for product_id in sample:
+                TaggedItem.objects.create(
+                    tag=tags[0], content_type=content_type, object_id=product_id
+                )
+        self.report_rate("one at a time", len(sample), time.perf_counter() - started)
+        TaggedItem.objects.all().delete()
+
+        # product k gets tags k and k + 1 (mod the number of tags)
+        started = time.perf_counter()
+        with transaction.atomic():
+            rows = 0
+            count = len(tags)
+            for i, tag in enumerate(tags):
+                ids = product_ids[i::count] + product_ids[(i - 1) % count :: count]
+                rows += TaggedItem.objects.tag_many(tag, Product, ids)
+        self.report_rate("tag_many", rows, time.perf_counter() - started)
+
+        page = product_ids[:10]
+        for label, attach in [("per product", False), ("batched", True)]:
+            with CaptureQueriesContext(connection) as queries:
+                products = list(Product.objects.filter(pk__in=page))
+                if attach:
+                    TaggedItem.objects.attach_tags(Product, products)
+                ProductSerializer(products, many=True).data
+            self.stdout.write(
+                f"serialize 10 products, tags {label:<12} {len(queries):>3} queries"
+            )
+
+        user = User.objects.create_superuser("bench", "bench@example.com", "password")
+        client = benchmark._client(user)
+        products_list = reverse("products-list")
+        last_page = len(product_ids) // 10
+        paths = [
+            products_list,
+            products_list + f"?page={last_page // 2}",
+            products_list + f"?page={last_page}",
+            products_list + "?tags=tag-3",
+            products_list + "?tags=tag-3,tag-4&ordering=unit_price",
+            products_list + "?tags=tag-3&cursor=",
+        ]
+        for path in paths:
+            timings = []
+            for i in range(options["repeat"]):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = client.get(path)
+                    timings.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200, response.status_code
+                results = json.loads(response.content)["results"]
+                assert results and all("tags" in product for product in results)
+            self.stdout.write(
+                f"GET {path:<55} {len(queries):>3} queries "
+                f"{statistics.median(timings):>9.2f}ms"
+            )
+
+    def report_rate(self, label, rows, elapsed):
+        self.stdout.write(
+            f"tagging {label:<14} {rows:>8} rows {elapsed:>8.2f}s "
+            f"{rows / elapsed:>10.0f} rows/s"
+        )
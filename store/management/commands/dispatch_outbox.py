@@ -0,0 +1,33 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from store import outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver pending outbox events (order_created, ...) to their receivers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--loop", action="store_true", help="Keep polling for new events."
+        )
+        parser.add_argument("--interval", type=float, default=1.0)
+        parser.add_argument(
+            "--stats", action="store_true", help="Print queue metrics and exit."
+        )
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self.stdout.write(json.dumps(outbox.stats()))
+            return
+        while True:
+            processed = outbox.drain(options["workers"], options["batch_size"])
+            if processed:
+                self.stdout.write(f"Dispatched {processed} events. {outbox.stats()}")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,45 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store import exports
+from store.models import Order
+
+
+class Command(BaseCommand):
+    help = "Stream orders or order items as CSV or NDJSON to stdout or a file."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dataset", choices=list(exports.DATASETS), default="items"
+        )
+        parser.add_argument("--output", choices=exports.OUTPUTS, default="csv")
+        parser.add_argument("--file", help="Write to this file instead of stdout.")
+        parser.add_argument(
+            "--placed-after", help="Orders placed at or after this date/time."
+        )
+        parser.add_argument("--placed-before", help="Orders placed before this.")
+        parser.add_argument(
+            "--payment-status", choices=[c for c, _ in Order.PAYMENT_STATUS]
+        )
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        params = {
+            "placed_at__gte": options["placed_after"],
+            "placed_at__lt": options["placed_before"],
+            "payment_status": options["payment_status"],
+        }
+        params = {key: value for key, value in params.items() if value}
+        try:
+            chunks = exports.export(
+                options["dataset"], options["output"], params, options["batch_size"]
+            )
+        except exports.ExportError as e:
+            raise CommandError(str(e))
+
+        if options["file"]:
+            with open(options["file"], "w", newline="", encoding="utf-8") as f:
+                f.writelines(chunks)
+        else:
+            sys.stdout.writelines(chunks)
@@ -0,0 +1,62 @@
+import csv
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store import imports
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update products from a CSV or NDJSON file, matching "
+        "existing products on slug."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=imports.FORMATS,
+            help="Defaults to the file extension.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate and report without writing.",
+        )
+        parser.add_argument(
+            "--errors", help="Write the row-level error report to this CSV file."
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        fmt = options["format"] or path.suffix.lstrip(".").lower()
+        if fmt not in imports.FORMATS:
+            raise CommandError("Cannot tell the format, pass --format.")
+
+        importer = imports.ProductImporter(
+            batch_size=options["batch_size"], dry_run=options["dry_run"]
+        )
+        started = time.perf_counter()
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            result = importer.run(imports.read_rows(f, fmt))
+        elapsed = time.perf_counter() - started
+
+        if options["errors"]:
+            with open(options["errors"], "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["line", "slug", "error"])
+                writer.writerows(result.errors)
+        else:
+            for line_number, slug, message in result.errors:
+                self.stderr.write(f"line {line_number} ({slug}): {message}")
+
+        self.stdout.write(
+            f"{result.rows} rows in {elapsed:.1f}s "
+            f"({result.rows / elapsed if elapsed else 0:.0f} rows/s): "
+            f"{result.created} created, {result.updated} updated, "
+            f"{len(result.errors)} errors"
+            + (" (dry run)" if options["dry_run"] else "")
+        )
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from store.cache import catalog_cache
+from store.models import Collection, Product
+
+
+class Command(BaseCommand):
+    help = "Recompute Collection.products_count from the product table in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only report collections whose count is out of date.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_pk = 0
+        checked = mismatched = 0
+        while True:
+            with transaction.atomic():
+                collections = list(
+                    Collection.objects.select_for_update()
+                    .filter(pk__gt=last_pk)
+                    .order_by("pk")
+                    .only("id", "products_count")[:batch_size]
+                )
+                if not collections:
+                    break
+                last_pk = collections[-1].pk
+                counts = dict(
+                    Product.objects.filter(collection__in=collections)
+                    .order_by()
+                    .values_list("collection")
+                    .annotate(count=Count("id"))
+                )
+                stale = []
+                for collection in collections:
+                    actual = counts.get(collection.pk, 0)
+                    if collection.products_count != actual:
+                        self.stdout.write(
+                            f"Collection {collection.pk}: "
+                            f"{collection.products_count} -> {actual}"
+                        )
+                        collection.products_count = actual
+                        stale.append(collection)
+                if stale and not options["verify"]:
+                    Collection.objects.bulk_update(stale, ["products_count"])
+                    # bulk_update sends no signals
+                    transaction.on_commit(catalog_cache.invalidate)
+            checked += len(collections)
+            mismatched += len(stale)
+
+        action = "found" if options["verify"] else "fixed"
+        self.stdout.write(
+            f"Checked {checked} collections, {action} {mismatched} stale counts."
+        )
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from store import bulk_actions
+from store.models import BulkActionJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Run pending bulk admin actions and resume those whose runner stopped "
+        "(e.g. after a crash or restart) from their last committed chunk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int)
+        parser.add_argument(
+            "--retry-failed", action="store_true", help="Also resume failed jobs."
+        )
+
+    def handle(self, *args, **options):
+        if options["retry_failed"]:
+            BulkActionJob.objects.filter(status=BulkActionJob.STATUS_FAILED).update(
+                status=BulkActionJob.STATUS_PENDING
+            )
+        jobs = bulk_actions.claimable().order_by("id").values_list("id", flat=True)
+        for job_id in list(jobs):
+            try:
+                ran = bulk_actions.run(job_id, options["chunk_size"])
+            except Exception as e:
+                self.stderr.write(f"Job {job_id} failed: {e!r}")
+                continue
+            if ran:
+                job = BulkActionJob.objects.get(pk=job_id)
+                self.stdout.write(
+                    f"{job}: {job.processed} rows processed, {job.updated} updated."
+                )
@@ -0,0 +1,107 @@
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from store.models import Cart, CartItem, Collection, Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Add the same products to one cart from several threads at once "
+        "through the API, then fail if the final quantities lost an update. "
+        "Reports adds/s. Use --settings=storefront.settings_benchmark to run "
+        "on SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--adds", type=int, default=100, help="Per thread.")
+        parser.add_argument("--products", type=int, default=2)
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            # the default in-memory test database cannot take writes from
+            # several threads
+            test_settings = connection.settings_dict.setdefault("TEST", {})
+            if not test_settings.get("NAME"):
+                test_settings["NAME"] = str(
+                    Path(connection.settings_dict["NAME"]).with_name(
+                        "stress_cart_items.sqlite3"
+                    )
+                )
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run(self, options):
+        collection = Collection.objects.create(title="Collection")
+        products = Product.objects.bulk_create(
+            [
+                Product(
+                    title=f"Product {i}",
+                    slug=f"product-{i}",
+                    unit_price=1,
+                    inventory=10,
+                    collection=collection,
+                )
+                for i in range(options["products"])
+            ]
+        )
+        product_ids = list(Product.objects.values_list("id", flat=True))
+        cart = Cart.objects.create()
+        path = reverse("cart-items-list", args=[cart.pk])
+        errors = []
+        barrier = threading.Barrier(options["threads"])
+
+        def work(index):
+            client = APIClient()
+            barrier.wait()
+            try:
+                for i in range(options["adds"]):
+                    product_id = product_ids[(index + i) % len(product_ids)]
+                    response = client.post(
+                        path, {"product_id": product_id, "quantity": 1}, format="json"
+                    )
+                    if response.status_code != 201:
+                        errors.append(f"HTTP {response.status_code}")
+            except Exception as e:
+                errors.append(repr(e))
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=work, args=[index])
+            for index in range(options["threads"])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        adds = options["threads"] * options["adds"]
+        total = sum(
+            CartItem.objects.filter(cart=cart).values_list("quantity", flat=True)
+        )
+        lines = CartItem.objects.filter(cart=cart).count()
+        self.stdout.write(
+            f"{adds} adds from {options['threads']} threads in {elapsed:.2f}s "
+            f"({adds / elapsed:.0f} adds/s): {len(errors)} failed, "
+            f"total quantity {total}, {lines} cart lines"
+        )
+        if errors or total != adds or lines != len(product_ids):
+            raise CommandError(
+                f"Lost updates: expected {adds} in {len(product_ids)} lines"
+                + (f"; errors: {sorted(set(errors))}" if errors else "")
+            )
@@ -0,0 +1,149 @@
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+
+from core.models import User
+from store import benchmark
+from store.models import Cart, CartItem, Collection, OrderItem, Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Check out carts holding the same product from several threads at "
+        "once through the API, with more carts than inventory, then fail if "
+        "the inventory went negative or does not match the orders placed. "
+        "Reports orders/s. Use --settings=storefront.settings_benchmark to "
+        "run on SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--carts", type=int, default=25, help="Per thread.")
+        parser.add_argument("--inventory", type=int, default=100)
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            # the default in-memory test database cannot take writes from
+            # several threads
+            test_settings = connection.settings_dict.setdefault("TEST", {})
+            if not test_settings.get("NAME"):
+                test_settings["NAME"] = str(
+                    Path(connection.settings_dict["NAME"]).with_name(
+                        "stress_checkout.sqlite3"
+                    )
+                )
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # order_created receivers are left to `manage.py dispatch_outbox`
+            with override_settings(STORE_OUTBOX_DISPATCH_ON_COMMIT=False):
+                self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run(self, options):
+        collection = Collection.objects.create(title="Collection")
+        product = Product.objects.create(
+            title="Product",
+            slug="product",
+            unit_price=1,
+            inventory=options["inventory"],
+            collection=collection,
+        )
+        carts = [
+            Cart.objects.create() for i in range(options["threads"] * options["carts"])
+        ]
+        CartItem.objects.bulk_create(
+            [CartItem(cart=cart, product=product, quantity=1) for cart in carts]
+        )
+        users = [
+            User.objects.create_user(f"bench-{index}", f"bench-{index}@example.com")
+            for index in range(options["threads"])
+        ]
+        path = reverse("orders-list")
+        statuses = {}
+        errors = []
+        retries = [0]
+        lock = threading.Lock()
+        barrier = threading.Barrier(options["threads"])
+
+        def work(index):
+            client = benchmark._client(users[index])
+            # the test client re-raises exceptions signalled by any thread's
+            # request; a 500 response is unambiguous
+            client.raise_request_exception = False
+            barrier.wait()
+            try:
+                for cart in carts[index :: options["threads"]]:
+                    response = client.post(
+                        path, {"cart_id": str(cart.pk)}, format="json"
+                    )
+                    # SQLite answers "database is locked" instead of waiting
+                    # for a writer; a client would retry the 500
+                    while response.status_code == 500:
+                        with lock:
+                            retries[0] += 1
+                        response = client.post(
+                            path, {"cart_id": str(cart.pk)}, format="json"
+                        )
+                    with lock:
+                        statuses[response.status_code] = (
+                            statuses.get(response.status_code, 0) + 1
+                        )
+            except Exception as e:
+                errors.append(repr(e))
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=work, args=[index])
+            for index in range(options["threads"])
+        ]
+        lowest = options["inventory"]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            lowest = min(
+                lowest, Product.objects.values_list("inventory", flat=True).get()
+            )
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - started
+
+        inventory = Product.objects.values_list("inventory", flat=True).get()
+        sold = OrderItem.objects.aggregate(sold=Sum("quantity"))["sold"] or 0
+        orders = statuses.get(200, 0)
+        self.stdout.write(
+            f"{len(carts)} checkouts from {options['threads']} threads in "
+            f"{elapsed:.2f}s ({orders / elapsed:.0f} orders/s, "
+            f"{len(carts) / elapsed:.0f} checkouts/s): statuses {statuses}, "
+            f"{retries[0]} retries, inventory {inventory} (lowest seen "
+            f"{min(lowest, inventory)}), {sold} sold"
+        )
+        expected = min(len(carts), options["inventory"])
+        if errors or min(lowest, inventory) < 0:
+            raise CommandError(
+                f"Oversold: inventory reached {min(lowest, inventory)}"
+                + (f"; errors: {sorted(set(errors))}" if errors else "")
+            )
+        if (
+            sold != orders
+            or sold != expected
+            or inventory != options["inventory"] - sold
+        ):
+            raise CommandError(
+                f"Expected {expected} orders and inventory "
+                f"{options['inventory'] - expected}; got {orders} orders, "
+                f"{sold} sold and inventory {inventory}"
+            )
@@ -0,0 +1,66 @@
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE store_product_fts USING fts5("
+    "title, description, content='store_product', content_rowid='id')",
+    "INSERT INTO store_product_fts(rowid, title, description) "
+    "SELECT id, title, description FROM store_product",
+    "CREATE TRIGGER store_product_fts_insert AFTER INSERT ON store_product BEGIN "
+    "INSERT INTO store_product_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER store_product_fts_delete AFTER DELETE ON store_product BEGIN "
+    "INSERT INTO store_product_fts(store_product_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER store_product_fts_update AFTER UPDATE OF title, description "
+    "ON store_product BEGIN "
+    "INSERT INTO store_product_fts(store_product_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO store_product_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS store_product_fts_insert",
+    "DROP TRIGGER IF EXISTS store_product_fts_delete",
+    "DROP TRIGGER IF EXISTS store_product_fts_update",
+    "DROP TABLE IF EXISTS store_product_fts",
+]
+
+
+def sqlite_has_fts5(cursor):
+    cursor.execute('PRAGMA compile_options')
+    return 'ENABLE_FTS5' in {row[0] for row in cursor.fetchall()}
+
+
+def create_fulltext(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'mysql':
+            cursor.execute(
+                'ALTER TABLE store_product '
+                'ADD FULLTEXT INDEX store_product_fulltext (title, description)'
+            )
+        elif vendor == 'sqlite' and sqlite_has_fts5(cursor):
+            for statement in SQLITE_FORWARD:
+                cursor.execute(statement)
+
+
+def drop_fulltext(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'mysql':
+            cursor.execute('ALTER TABLE store_product DROP INDEX store_product_fulltext')
+        elif vendor == 'sqlite':
+            for statement in SQLITE_BACKWARD:
+                cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0015_collection_products_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext, drop_fulltext),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.0 on 2026-10-18 21:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('store', '0016_product_fulltext'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkActionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(max_length=255)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('query', models.BinaryField()),
+                ('max_pk', models.BigIntegerField(default=0)),
+                ('last_pk', models.BigIntegerField(default=0)),
+                ('total', models.PositiveBigIntegerField(default=0)),
+                ('processed', models.PositiveBigIntegerField(default=0)),
+                ('updated', models.PositiveBigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('P', 'Pending'), ('R', 'Running'), ('D', 'Done'), ('F', 'Failed')], default='P', max_length=1)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.user')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='bulkactionjob',
+            index=models.Index(fields=['status', 'heartbeat_at'], name='store_bulka_status_1160e0_idx'),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 4.0 on 2026-10-18 21:28
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+# SQLite applies AddField/RemoveField on store_product by rebuilding the
+# table, which drops the full-text triggers created in 0016
+SQLITE_FTS_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS store_product_fts_insert",
+    "DROP TRIGGER IF EXISTS store_product_fts_delete",
+    "DROP TRIGGER IF EXISTS store_product_fts_update",
+    "CREATE TRIGGER store_product_fts_insert AFTER INSERT ON store_product BEGIN "
+    "INSERT INTO store_product_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER store_product_fts_delete AFTER DELETE ON store_product BEGIN "
+    "INSERT INTO store_product_fts(store_product_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER store_product_fts_update AFTER UPDATE OF title, description "
+    "ON store_product BEGIN "
+    "INSERT INTO store_product_fts(store_product_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO store_product_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+]
+
+
+def restore_fulltext_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' "
+            "AND name = 'store_product_fts'"
+        )
+        if cursor.fetchone() is None:
+            # SQLite without FTS5, see 0016
+            return
+        for statement in SQLITE_FTS_TRIGGERS:
+            cursor.execute(statement)
+
+
+def populate_review_aggregates(apps, schema_editor):
+    Product = apps.get_model('store', 'Product')
+    Reviews = apps.get_model('store', 'Reviews')
+    reviews = Reviews.objects.filter(product=OuterRef('pk')).order_by()
+    Product.objects.update(
+        reviews_count=Coalesce(
+            Subquery(
+                reviews.values('product').annotate(count=Count('id')).values('count')
+            ),
+            0,
+        ),
+        last_review_at=Subquery(reviews.order_by('-date').values('date')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0017_bulkactionjob'),
+    ]
+
+    operations = [
+        # unapplying removes the fields after this, so restore the triggers
+        # last on the way back too
+        migrations.RunPython(migrations.RunPython.noop, restore_fulltext_triggers),
+        migrations.AddField(
+            model_name='product',
+            name='last_review_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='reviews_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='reviews',
+            index=models.Index(fields=['product', 'date'], name='store_revie_product_c92fff_idx'),
+        ),
+        migrations.RunPython(populate_review_aggregates, migrations.RunPython.noop),
+        migrations.RunPython(restore_fulltext_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.0 on 2026-10-18 23:05
+
+from django.db import migrations, models
+
+
+def fail_unfinished_jobs(apps, schema_editor):
+    # their pickled queries are not carried over; the action has to be
+    # started again from the admin
+    BulkActionJob = apps.get_model('store', 'BulkActionJob')
+    BulkActionJob.objects.exclude(status='D').update(
+        status='F',
+        last_error='Selection dropped by migration 0019; start the action again.',
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0018_product_review_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_unfinished_jobs, migrations.RunPython.noop),
+        # a default lets the field be added back to existing rows on unapply
+        migrations.AlterField(
+            model_name='bulkactionjob',
+            name='query',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.RemoveField(
+            model_name='bulkactionjob',
+            name='query',
+        ),
+        migrations.AddField(
+            model_name='bulkactionjob',
+            name='selection',
+            field=models.JSONField(default=dict),
+        ),
+    ]
@@ -4,11 +4,13 @@ from django.conf import settings
 from django.contrib import admin
 from django.core import validators
 from django.core.validators import MinValueValidator
-from django.db import models
-from django.db.models import constraints
+from django.db import connections, models
+from django.db.models import Count, OuterRef, Subquery, constraints
 from django.db.models.deletion import CASCADE, SET_NULL
 from django.db.models.fields import EmailField
 from django.db.models.fields.related import ForeignKey
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from rest_framework import permissions
 
 # Create your models here.
@@ -25,11 +27,84 @@ class Collection(models.Model):
     featured_product = models.ForeignKey(
         "Product", on_delete=models.SET_NULL, null=True, related_name="+"
     )
+    # denormalized, kept in sync by store.signals.handlers; rebuild with
+    # `manage.py rebuild_collection_counts`
+    products_count = models.PositiveIntegerField(default=0, editable=False)
     # related_name = "+" means telling Django not to create a reverse relationship to avoid circular dependancy clash
     def __str__(self) -> str:
         return self.title
 
 
+class ProductManager(models.Manager):
+    def update_rows(self, products, fields):
+        """
+        Write `fields` of existing products with a multi-row INSERT that
+        updates on primary-key conflict, which avoids bulk_update's CASE
+        expressions. `fields` must cover every NOT NULL column without a
+        default, as the rows are written as inserts first.
+        """
+        if not products:
+            return
+        connection = connections[self.db]
+        opts = self.model._meta
+        quote = connection.ops.quote_name
+        table = quote(opts.db_table)
+        updated = [opts.get_field(name) for name in fields]
+        # the INSERT half needs the other NOT NULL columns too; the conflict
+        # clause leaves them alone
+        insert_only = [
+            field
+            for field in opts.concrete_fields
+            if not field.null
+            and field.has_default()
+            and field not in updated
+            and not field.primary_key
+        ]
+        fields = [opts.pk] + updated + insert_only
+        columns = [quote(field.column) for field in fields]
+        updated_columns = columns[1 : len(updated) + 1]
+        if connection.vendor == "mysql":
+            updates = [f"{column} = VALUES({column})" for column in updated_columns]
+            conflict = f"ON DUPLICATE KEY UPDATE {', '.join(updates)}"
+        else:
+            updates = [f"{column} = excluded.{column}" for column in updated_columns]
+            conflict = f"ON CONFLICT ({columns[0]}) DO UPDATE SET {', '.join(updates)}"
+        row = f"({', '.join(['%s'] * len(columns))})"
+
+        batch_size = connection.ops.bulk_batch_size(fields, products)
+        with connection.cursor() as cursor:
+            for start in range(0, len(products), batch_size):
+                batch = products[start : start + batch_size]
+                params = [
+                    field.get_db_prep_save(getattr(product, field.attname), connection)
+                    for product in batch
+                    for field in fields
+                ]
+                cursor.execute(
+                    f"INSERT INTO {table} ({', '.join(columns)}) "
+                    f"VALUES {', '.join([row] * len(batch))} {conflict}",
+                    params,
+                )
+
+    def refresh_review_aggregates(self, products=None):
+        """
+        Recompute reviews_count and last_review_at from the reviews table,
+        e.g. after reviews were bulk created.
+        """
+        reviews = Reviews.objects.filter(product=OuterRef("pk")).order_by()
+        (self.all() if products is None else products).update(
+            reviews_count=Coalesce(
+                Subquery(
+                    reviews.values("product")
+                    .annotate(count=Count("id"))
+                    .values("count")
+                ),
+                0,
+            ),
+            last_review_at=Subquery(reviews.order_by("-date").values("date")[:1]),
+        )
+
+
 class Product(models.Model):
     title = models.CharField(max_length=255)
     slug = models.SlugField()
@@ -45,12 +120,23 @@ class Product(models.Model):
         Collection, on_delete=models.PROTECT, related_name="products"
     )
     promotions = models.ManyToManyField(Promotion, related_name="Products", blank=True)
+    # maintained by store.signals.handlers as reviews are added and deleted
+    reviews_count = models.PositiveIntegerField(default=0, editable=False)
+    last_review_at = models.DateTimeField(null=True, editable=False)
+
+    objects = ProductManager()
 
     def __str__(self) -> str:
         return self.title
 
     class Meta:
         ordering = ["title"]
+        # composite indexes let KeysetPagination seek on each ordering it supports
+        indexes = [
+            models.Index(fields=["title", "id"]),
+            models.Index(fields=["unit_price", "id"]),
+            models.Index(fields=["last_update", "id"]),
+        ]
 
 
 class Customer(models.Model):
@@ -119,6 +205,76 @@ class OrderItem(models.Model):
     unit_price = models.DecimalField(max_digits=6, decimal_places=2)
 
 
+class OutboxEvent(models.Model):
+    STATUS_PENDING = "P"
+    STATUS_DISPATCHED = "D"
+    STATUS_FAILED = "F"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_DISPATCHED, "Dispatched"),
+        (STATUS_FAILED, "Failed"),
+    ]
+    signal = models.CharField(max_length=255)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=1, choices=STATUS_CHOICES, default=STATUS_PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "available_at"])]
+
+
+class BulkActionJob(models.Model):
+    """
+    Progress record of a bulk admin action run in chunks by
+    store.bulk_actions; last_pk is committed with each chunk so an
+    interrupted job resumes where it stopped.
+    """
+
+    STATUS_PENDING = "P"
+    STATUS_RUNNING = "R"
+    STATUS_DONE = "D"
+    STATUS_FAILED = "F"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+    action = models.CharField(max_length=255)
+    params = models.JSONField(default=dict, blank=True)
+    # {"pks": [...]} or {"filters": {...}} of the changelist, see
+    # store.bulk_actions.selection
+    selection = models.JSONField(default=dict)
+    # rows created after the job started are left alone
+    max_pk = models.BigIntegerField(default=0)
+    last_pk = models.BigIntegerField(default=0)
+    total = models.PositiveBigIntegerField(default=0)
+    processed = models.PositiveBigIntegerField(default=0)
+    updated = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(
+        max_length=1, choices=STATUS_CHOICES, default=STATUS_PENDING
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=SET_NULL, null=True, blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "heartbeat_at"])]
+
+    def __str__(self):
+        return f"{self.action} #{self.pk}"
+
+
 class Address(models.Model):
     street = models.CharField(max_length=255)
     city = models.CharField(max_length=255)
@@ -132,11 +288,69 @@ class Cart(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
 
+class CartItemManager(models.Manager):
+    def add_quantities(self, cart_id, quantities):
+        """
+        Add {product_id: quantity} to a cart in one INSERT that falls back to
+        incrementing the existing line on the (cart, product) unique key.
+        Returns the resulting CartItem rows.
+        """
+        if not quantities:
+            return []
+        connection = connections[self.db]
+        opts = self.model._meta
+        quote = connection.ops.quote_name
+        table = quote(opts.db_table)
+        cart_column = quote(opts.get_field("cart").column)
+        product_column = quote(opts.get_field("product").column)
+        quantity_column = quote(opts.get_field("quantity").column)
+        cart_value = opts.get_field("cart").get_db_prep_value(cart_id, connection)
+
+        params = []
+        for product_id, quantity in quantities.items():
+            params += [cart_value, product_id, quantity]
+        sql = (
+            f"INSERT INTO {table} ({cart_column}, {product_column}, {quantity_column}) "
+            f"VALUES {', '.join(['(%s, %s, %s)'] * len(quantities))} "
+        )
+        if connection.vendor == "mysql":
+            sql += (
+                f"ON DUPLICATE KEY UPDATE {quantity_column} = "
+                f"{quantity_column} + VALUES({quantity_column})"
+            )
+        else:
+            sql += (
+                f"ON CONFLICT ({cart_column}, {product_column}) DO UPDATE SET "
+                f"{quantity_column} = {table}.{quantity_column} "
+                f"+ excluded.{quantity_column}"
+            )
+        returning = connection.features.can_return_rows_from_bulk_insert
+        if returning:
+            sql += f" RETURNING {quote(opts.pk.column)}, {product_column}, {quantity_column}"
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            if returning:
+                return [
+                    self.model(
+                        id=pk, cart_id=cart_id, product_id=product_id, quantity=quantity
+                    )
+                    for pk, product_id, quantity in cursor.fetchall()
+                ]
+        return list(
+            self.filter(cart_id=cart_id, product_id__in=quantities.keys()).only(
+                "id", "cart_id", "product_id", "quantity"
+            )
+        )
+
+
 class CartItem(models.Model):
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name="items")
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
 
+    objects = CartItemManager()
+
     class Meta:
         unique_together = [["cart", "product"]]
 
@@ -148,3 +362,7 @@ class Reviews(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField()
     date = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # a product's reviews, newest first
+        indexes = [models.Index(fields=["product", "date"])]
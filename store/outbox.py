@@ -0,0 +1,197 @@
+"""
+Transactional outbox for store signals.
+
+enqueue() writes the signal payload to OutboxEvent inside the caller's
+transaction, so the event exists if and only if the order does. Events are
+delivered after commit by a background thread (STORE_OUTBOX_DISPATCH_ON_COMMIT)
+and by the `dispatch_outbox` management command, which also retries failures.
+Delivery is at-least-once: when any receiver fails the whole event is retried,
+so receivers must tolerate seeing the same event twice.
+
+A worker claims a batch in a short transaction by leasing it: available_at
+moves STORE_OUTBOX_LEASE seconds ahead. Receivers then run outside any
+transaction, and each outcome is recorded in its own. Events of a worker
+that dies mid-batch become due again when the lease runs out.
+"""
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Min
+from django.utils import timezone
+
+from store.models import Order, OutboxEvent
+from store.signals import order_created
+
+logger = logging.getLogger(__name__)
+
+
+def _order_created_kwargs(payload):
+    return {"order": Order.objects.get(pk=payload["order_id"])}
+
+
+# signal name -> (signal, sender, function turning the payload into kwargs)
+SIGNALS = {
+    "order_created": (order_created, Order, _order_created_kwargs),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"dispatched": 0, "retried": 0, "failed": 0, "last_lag": None}
+
+
+def enqueue(signal_name, **payload):
+    if signal_name not in SIGNALS:
+        raise ValueError(f"Unknown outbox signal: {signal_name}")
+    event = OutboxEvent.objects.create(signal=signal_name, payload=payload)
+    if getattr(settings, "STORE_OUTBOX_DISPATCH_ON_COMMIT", True):
+        transaction.on_commit(_schedule_dispatch)
+    return event
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "STORE_OUTBOX_WORKERS", 1),
+                thread_name_prefix="outbox",
+            )
+        return _executor
+
+
+def _schedule_dispatch():
+    _get_executor().submit(_dispatch_in_thread)
+
+
+def _dispatch_in_thread():
+    try:
+        dispatch_pending()
+    except Exception:
+        logger.exception("Outbox dispatch failed")
+    finally:
+        connection.close()
+
+
+def dispatch_pending(batch_size=None, max_attempts=None):
+    """
+    Deliver one batch of due events and return how many were processed.
+    Rows are claimed with SKIP LOCKED where supported so several workers can
+    drain the table concurrently.
+    """
+    batch_size = batch_size or getattr(settings, "STORE_OUTBOX_BATCH_SIZE", 100)
+    max_attempts = max_attempts or getattr(settings, "STORE_OUTBOX_MAX_ATTEMPTS", 5)
+    events, leased_until = _claim(batch_size)
+    for event in events:
+        _dispatch(event, leased_until, max_attempts)
+    return len(events)
+
+
+def _claim(batch_size):
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    now = timezone.now()
+    leased_until = now + timedelta(seconds=getattr(settings, "STORE_OUTBOX_LEASE", 300))
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=skip_locked)
+            .filter(status=OutboxEvent.STATUS_PENDING, available_at__lte=now)
+            .order_by("id")[:batch_size]
+        )
+        OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).update(
+            attempts=F("attempts") + 1, available_at=leased_until
+        )
+    for event in events:
+        event.attempts += 1
+        event.available_at = leased_until
+    return events, leased_until
+
+
+def _dispatch(event, leased_until, max_attempts):
+    signal, sender, build_kwargs = SIGNALS[event.signal]
+    try:
+        responses = signal.send_robust(sender, **build_kwargs(event.payload))
+        errors = [
+            "".join(traceback.format_exception(type(e), e, e.__traceback__))
+            for receiver, e in responses
+            if isinstance(e, Exception)
+        ]
+    except Exception as e:
+        errors = ["".join(traceback.format_exception(type(e), e, e.__traceback__))]
+
+    now = timezone.now()
+    if not errors:
+        event.status = OutboxEvent.STATUS_DISPATCHED
+        event.dispatched_at = now
+        event.last_error = ""
+        outcome = "dispatched"
+    elif event.attempts >= max_attempts:
+        event.status = OutboxEvent.STATUS_FAILED
+        event.last_error = "\n".join(errors)
+        outcome = "failed"
+    else:
+        event.available_at = now + timedelta(seconds=min(2 ** event.attempts, 300))
+        event.last_error = "\n".join(errors)
+        outcome = "retried"
+    if not _record(event, leased_until):
+        return
+    with _stats_lock:
+        _stats[outcome] += 1
+        if outcome == "dispatched":
+            _stats["last_lag"] = (now - event.created_at).total_seconds()
+
+
+def _record(event, leased_until):
+    # a worker whose lease ran out leaves the event to whoever claimed it next
+    return OutboxEvent.objects.filter(pk=event.pk, available_at=leased_until).update(
+        status=event.status,
+        available_at=event.available_at,
+        dispatched_at=event.dispatched_at,
+        last_error=event.last_error,
+    )
+
+
+def stats():
+    """Queue depth, dispatch lag and this process's delivery counters."""
+    pending = OutboxEvent.objects.filter(status=OutboxEvent.STATUS_PENDING)
+    oldest = pending.aggregate(oldest=Min("created_at"))["oldest"]
+    with _stats_lock:
+        counters = dict(_stats)
+    return {
+        "queue_depth": pending.count(),
+        "failed_events": OutboxEvent.objects.filter(
+            status=OutboxEvent.STATUS_FAILED
+        ).count(),
+        "oldest_pending_age": (
+            (timezone.now() - oldest).total_seconds() if oldest else 0.0
+        ),
+        "last_dispatch_lag": counters.pop("last_lag"),
+        **counters,
+    }
+
+
+def drain(workers=1, batch_size=None):
+    """Dispatch until no due events remain, using a pool of worker threads."""
+    if not connection.features.has_select_for_update_skip_locked:
+        # without SKIP LOCKED parallel workers would claim the same rows
+        workers = 1
+
+    def work():
+        close_old_connections()
+        total = 0
+        try:
+            while True:
+                processed = dispatch_pending(batch_size)
+                total += processed
+                if not processed:
+                    return total
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="outbox") as pool:
+        futures = [pool.submit(work) for _ in range(workers)]
+        return sum(future.result() for future in futures)
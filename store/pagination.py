@@ -1,5 +1,277 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import Max, Q
+from django.utils.encoding import force_str
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class DefaultPagination(PageNumberPagination):
     page_size = 10
+
+
+def estimate_count(queryset):
+    """
+    Return a cheap row estimate for the queryset, or None if the backend
+    cannot give one without counting.
+
+    Unfiltered querysets read the table statistics; filtered ones use the
+    planner's row estimate where the backend exposes it.
+    """
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            if connection.vendor == "mysql":
+                cursor.execute(
+                    "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                    [table],
+                )
+                row = cursor.fetchone()
+                return int(row[0]) if row and row[0] is not None else None
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                    [table],
+                )
+                row = cursor.fetchone()
+                return max(int(row[0]), 0) if row else None
+            # sqlite keeps no statistics, but MAX(pk) is an index lookup and
+            # only overshoots by the number of deleted rows. It is read from
+            # the bare table so annotations are not computed first.
+            rows = queryset.model._base_manager.using(queryset.db)
+            return rows.aggregate(estimate=Max("pk"))["estimate"] or 0
+
+        sql, params = queryset.query.sql_with_params()
+        if connection.vendor == "mysql":
+            cursor.execute("EXPLAIN " + sql, params)
+            columns = [column[0] for column in cursor.description]
+            row = cursor.fetchone()
+            return int(row[columns.index("rows")]) if row else None
+        if connection.vendor == "postgresql":
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+    return None
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on the ordering columns instead of using
+    OFFSET, so page 10,000 costs the same as page 1.
+
+    The ordering comes from the OrderingFilter (when the view uses it), then
+    the view's `keyset_ordering`, then the model's Meta.ordering, and always
+    ends with the primary key as a tiebreaker. Only concrete, non-nullable
+    model fields can be used for ordering.
+
+    Counting is skipped by default. Clients may ask for `?count=exact` or
+    `?count=approximate` (see estimate_count).
+    """
+
+    page_size = 10
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    count_mode = "none"
+    count_modes = ("none", "exact", "approximate")
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.count = None
+        self.estimated_count = None
+
+        position, reverse = self.decode_cursor(request)
+        fields = [
+            self._get_field(queryset.model, name.lstrip("-")) for name in self.ordering
+        ]
+        if position is not None:
+            if len(position) != len(fields):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                position = [
+                    field.to_python(value) for field, value in zip(fields, position)
+                ]
+            except Exception:
+                raise NotFound(self.invalid_cursor_message)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [self._invert(name) for name in ordering]
+        page_queryset = queryset.order_by(*ordering)
+        if position is not None:
+            page_queryset = page_queryset.filter(self.seek_filter(ordering, position))
+
+        results = list(page_queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.first_position = self._position(results[0], fields) if results else None
+        self.last_position = self._position(results[-1], fields) if results else None
+
+        count_mode = self.get_count_mode(request)
+        if count_mode == "exact":
+            self.count = queryset.count()
+        elif count_mode == "approximate":
+            self.estimated_count = estimate_count(queryset)
+        return results
+
+    def get_paginated_response(self, data):
+        pairs = []
+        if self.count is not None:
+            pairs.append(("count", self.count))
+        if self.estimated_count is not None:
+            pairs.append(("estimated_count", self.estimated_count))
+        pairs += [
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]
+        return Response(OrderedDict(pairs))
+
+    def get_next_link(self):
+        if not self.has_next or self.last_position is None:
+            return None
+        return self.encode_cursor(self.last_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_position is None:
+            return None
+        return self.encode_cursor(self.first_position, reverse=True)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        if view is not None and OrderingFilter in getattr(view, "filter_backends", []):
+            ordering = OrderingFilter().get_ordering(request, queryset, view)
+        if not ordering:
+            ordering = getattr(view, "keyset_ordering", None)
+        if not ordering:
+            # expressions and annotations (e.g. search relevance) cannot be
+            # sought on
+            ordering = [
+                name
+                for name in queryset.query.order_by
+                if isinstance(name, str) and self._is_field(queryset.model, name)
+            ] or queryset.model._meta.ordering
+        pk_name = queryset.model._meta.pk.name
+        ordering = [
+            name.replace("pk", pk_name) if name.lstrip("-") == "pk" else name
+            for name in ordering
+        ]
+        if pk_name not in [name.lstrip("-") for name in ordering]:
+            ordering = list(ordering) + [pk_name]
+        return list(ordering)
+
+    def get_count_mode(self, request):
+        mode = request.query_params.get(self.count_query_param, self.count_mode)
+        return mode if mode in self.count_modes else self.count_mode
+
+    def seek_filter(self, ordering, position):
+        """
+        Build `(a, b, c) > (x, y, z)` as nested OR/AND conditions, honouring
+        the direction of each ordering column. The redundant `a >= x` bound
+        lets the database turn the seek into an index range scan.
+        """
+        first = ordering[0]
+        bound = "lte" if first.startswith("-") else "gte"
+        condition = Q()
+        for index, name in enumerate(ordering):
+            field = name.lstrip("-")
+            lookup = "lt" if name.startswith("-") else "gt"
+            step = Q(**{f"{field}__{lookup}": position[index]})
+            for previous, value in zip(ordering[:index], position[:index]):
+                step &= Q(**{previous.lstrip("-"): value})
+            condition |= step
+        return Q(**{f"{first.lstrip('-')}__{bound}": position[0]}) & condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            return payload["p"], bool(payload.get("r"))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position, reverse):
+        payload = {"p": position}
+        if reverse:
+            payload["r"] = 1
+        data = json.dumps(payload, default=self._encode_value, separators=(",", ":"))
+        encoded = base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded.rstrip("=")
+        )
+
+    def _position(self, obj, fields):
+        if isinstance(obj, dict):
+            return [obj[field.name] for field in fields]
+        return [getattr(obj, field.attname) for field in fields]
+
+    def _get_field(self, model, name):
+        return model._meta.get_field(name)
+
+    def _is_field(self, model, name):
+        name = name.lstrip("-")
+        if name == "pk":
+            return True
+        try:
+            self._get_field(model, name)
+        except FieldDoesNotExist:
+            return False
+        return True
+
+    def _invert(self, name):
+        return name[1:] if name.startswith("-") else "-" + name
+
+    def _encode_value(self, value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, (Decimal, UUID)):
+            return str(value)
+        return force_str(value)
+
+
+class KeysetPaginationMixin:
+    """
+    Opt a viewset into KeysetPagination when the client sends a `cursor`
+    query parameter (an empty `?cursor=` starts from the first page).
+    Without it the viewset's regular pagination_class is used.
+    """
+
+    keyset_pagination_class = KeysetPagination
+
+    @property
+    def paginator(self):
+        if (
+            not hasattr(self, "_paginator")
+            and self.request is not None
+            and self.keyset_pagination_class.cursor_query_param
+            in self.request.query_params
+        ):
+            self._paginator = self.keyset_pagination_class()
+        return super().paginator
@@ -0,0 +1,415 @@
+"""
+Product search backends used by ProductSearchFilter.
+
+A backend narrows the product queryset to the matches of a query and
+orders them by relevance. Every query token must match, and the last one
+also matches as a prefix so results follow a search box while the user
+types. STORE_SEARCH_BACKEND selects the backend; an empty value keeps DRF's
+SearchFilter.
+"""
+import json
+import logging
+import math
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models import Case, FloatField, IntegerField, Value, When
+from django.db.models.expressions import Expression, RawSQL
+from django.utils.module_loading import import_string
+
+from store.models import Product
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+def id_list(ids, using):
+    """
+    `ids` as the right-hand side of pk__in. On SQLite and MySQL the list is
+    a single JSON parameter, so a search matching more products than the
+    database accepts query parameters still works.
+    """
+    vendor = connections[using].vendor
+    if vendor == "sqlite":
+        return RawSQL("SELECT value FROM json_each(%s)", [json.dumps(ids)])
+    if vendor == "mysql":
+        return RawSQL(
+            "SELECT id FROM JSON_TABLE(%s, '$[*]' COLUMNS (id BIGINT PATH '$')) "
+            "AS ids",
+            [json.dumps(ids)],
+        )
+    return ids
+
+
+class SearchBackend:
+    # ranking orders by a CASE over the best ids, which grows quadratically
+    # with the list; further matches follow in id order
+    max_ranked = 200
+
+    def filter_queryset(self, queryset, query, rank=True):
+        """
+        Narrow `queryset` to every product matching `query`, ordered by
+        relevance if `rank` is set. Returns None if the backend cannot
+        answer (no tokens, index not ready) and SearchFilter should.
+        """
+        raise NotImplementedError
+
+    def index_product(self, product):
+        pass
+
+    def remove_product(self, product_id):
+        pass
+
+    def rank_by(self, queryset, product_ids):
+        ranked = product_ids[: self.max_ranked]
+        if not ranked:
+            return queryset
+        rank = Case(
+            *[When(pk=pk, then=Value(i)) for i, pk in enumerate(ranked)],
+            default=Value(len(ranked)),
+            output_field=IntegerField(),
+        )
+        return queryset.order_by(rank, "pk")
+
+
+class InvertedIndexBackend(SearchBackend):
+    """
+    In-process inverted index over title and description with BM25 ranking.
+
+    The index is built in a background thread, started when the WSGI or ASGI
+    application loads (see warm_up_search_backend) or by the first search;
+    until it is ready, searches fall back to SearchFilter. It is kept current in this process
+    by the Product save/delete signals. Changes made by other processes are
+    picked up on the next search by re-indexing products whose last_update
+    moved past the index watermark (at most every `refresh_interval`
+    seconds). Products deleted elsewhere are dropped by the database filter
+    that the ranked ids go through.
+    """
+
+    title_weight = 2
+    k1 = 1.2
+    b = 0.75
+    max_prefix_terms = 50
+    refresh_interval = 1.0
+    chunk_size = 2000
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._building = False
+        self._postings = defaultdict(dict)  # term -> {product_id: weighted tf}
+        self._documents = {}  # product_id -> {term: weighted tf}
+        self._lengths = {}
+        self._total_length = 0
+        self._terms = []
+        self._terms_dirty = False
+        self._watermark = None
+        self._refreshed_at = 0.0
+        # bumped by every index change. A listing searches twice (ETag
+        # validators, then the page), so the last result is reused until
+        # the index changes.
+        self._generation = 0
+        self._last_search = (None, None, None)
+
+    def filter_queryset(self, queryset, query, rank=True):
+        product_ids = self.search(query)
+        if product_ids is None:
+            return None
+        queryset = queryset.filter(pk__in=id_list(product_ids, queryset.db))
+        return self.rank_by(queryset, product_ids) if rank else queryset
+
+    def search(self, query):
+        """
+        Return the ids of all matching products by relevance, or None if
+        the query has no tokens or the index is not built yet.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+        if not self._built:
+            self.start_build()
+            return None
+        with self._lock:
+            if time.monotonic() - self._refreshed_at > self.refresh_interval:
+                self._refresh()
+            last_tokens, generation, ranked = self._last_search
+            if last_tokens == tokens and generation == self._generation:
+                return ranked
+            last = len(tokens) - 1
+            expanded = [
+                self._expand(token, prefix=index == last)
+                for index, token in enumerate(tokens)
+            ]
+            # score the rarest token over its postings, then only look up the
+            # surviving candidates in the others
+            expanded.sort(key=lambda terms: sum(len(self._postings[t]) for t in terms))
+            scores = self._score_terms(expanded[0])
+            for terms in expanded[1:]:
+                if not scores:
+                    break
+                scores = self._score_terms(terms, candidates=scores)
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+            ranked = [pk for pk, score in ranked]
+            self._last_search = (tokens, self._generation, ranked)
+        return ranked
+
+    def start_build(self):
+        """Build the index in a background thread, unless built or building."""
+        with self._lock:
+            if self._built or self._building:
+                return
+            self._building = True
+        threading.Thread(
+            target=self._build_in_background, name="search-index-build", daemon=True
+        ).start()
+
+    def index_product(self, product):
+        with self._lock:
+            if self._built:
+                self._index(product.pk, product.title, product.description)
+
+    def remove_product(self, product_id):
+        with self._lock:
+            if self._built:
+                self._remove(product_id)
+
+    def build(self):
+        """Index every product, in chunks that each hold the lock briefly."""
+        with self._lock:
+            self._building = True
+        try:
+            products = Product.objects.order_by().values_list(
+                "id", "title", "description", "last_update"
+            )
+            rows = products.iterator(chunk_size=self.chunk_size)
+            while True:
+                chunk = list(islice(rows, self.chunk_size))
+                if not chunk:
+                    break
+                # searches and signals wait for one chunk at most
+                with self._lock:
+                    for pk, title, description, last_update in chunk:
+                        self._index(pk, title, description)
+                        self._advance_watermark(last_update)
+            with self._lock:
+                self._built = True
+                # changes saved while the build was reading
+                self._refresh()
+        finally:
+            with self._lock:
+                self._building = False
+
+    def _build_in_background(self):
+        try:
+            self.build()
+        except Exception:
+            logger.exception("Building the product search index failed")
+        finally:
+            connection.close()
+
+    def _refresh(self):
+        products = Product.objects.order_by().values_list(
+            "id", "title", "description", "last_update"
+        )
+        if self._watermark is not None:
+            # >= so rows sharing the watermark timestamp are not missed
+            products = products.filter(last_update__gte=self._watermark)
+        for pk, title, description, last_update in products.iterator(
+            chunk_size=self.chunk_size
+        ):
+            self._index(pk, title, description)
+            self._advance_watermark(last_update)
+        self._refreshed_at = time.monotonic()
+
+    def _advance_watermark(self, last_update):
+        if self._watermark is None or last_update > self._watermark:
+            self._watermark = last_update
+
+    def _index(self, pk, title, description):
+        self._remove(pk)
+        self._generation += 1
+        frequencies = defaultdict(int)
+        for token in tokenize(title):
+            frequencies[token] += self.title_weight
+        for token in tokenize(description):
+            frequencies[token] += 1
+        for term, frequency in frequencies.items():
+            if term not in self._postings:
+                self._terms_dirty = True
+            self._postings[term][pk] = frequency
+        self._documents[pk] = dict(frequencies)
+        length = sum(frequencies.values())
+        self._lengths[pk] = length
+        self._total_length += length
+
+    def _remove(self, pk):
+        frequencies = self._documents.pop(pk, None)
+        if frequencies is None:
+            return
+        self._generation += 1
+        for term in frequencies:
+            postings = self._postings[term]
+            postings.pop(pk, None)
+            if not postings:
+                del self._postings[term]
+                self._terms_dirty = True
+        self._total_length -= self._lengths.pop(pk)
+
+    def _expand(self, token, prefix):
+        if not prefix:
+            return [token] if token in self._postings else []
+        if self._terms_dirty:
+            self._terms = sorted(self._postings)
+            self._terms_dirty = False
+        terms = []
+        position = bisect_left(self._terms, token)
+        while (
+            position < len(self._terms)
+            and self._terms[position].startswith(token)
+            and len(terms) < self.max_prefix_terms
+        ):
+            terms.append(self._terms[position])
+            position += 1
+        return terms
+
+    def _score_terms(self, terms, candidates=None):
+        """
+        BM25 score of each document for one query token (expanded to
+        `terms`). With `candidates`, only those documents are scored and the
+        result is added to their running score.
+        """
+        count = len(self._documents)
+        average_length = self._total_length / count if count else 1
+        k1, b, lengths = self.k1, self.b, self._lengths
+        scores = {}
+        for term in terms:
+            postings = self._postings[term]
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            if candidates is None:
+                matches = postings.items()
+            else:
+                matches = [(pk, postings[pk]) for pk in candidates if pk in postings]
+            for pk, frequency in matches:
+                norm = k1 * (1 - b + b * lengths[pk] / average_length)
+                score = idf * frequency * (k1 + 1) / (frequency + norm)
+                # a document matching several expansions keeps its best one
+                if score > scores.get(pk, 0):
+                    scores[pk] = score
+        if candidates is not None:
+            return {pk: candidates[pk] + score for pk, score in scores.items()}
+        return scores
+
+
+class DatabaseFullTextBackend(SearchBackend):
+    """
+    Full-text search in the database: a FULLTEXT index on MySQL or the
+    store_product_fts FTS5 table on SQLite, both created by migration 0016
+    and maintained by the database itself.
+    """
+
+    def filter_queryset(self, queryset, query, rank=True):
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+        vendor = connections[queryset.db].vendor
+        if vendor == "mysql":
+            return self._filter_mysql(queryset, tokens, rank)
+        if vendor == "sqlite":
+            return self._filter_sqlite(queryset, tokens, rank)
+        # no full-text structures on this backend: use SearchFilter
+        return None
+
+    def _filter_mysql(self, queryset, tokens, rank):
+        terms = " ".join(f"+{token}" for token in tokens) + "*"
+        table = Product._meta.db_table
+        relevance = RawSQL(
+            f"MATCH({table}.title, {table}.description) "
+            f"AGAINST (%s IN BOOLEAN MODE)",
+            [terms],
+            output_field=FloatField(),
+        )
+        queryset = queryset.alias(relevance=relevance).filter(relevance__gt=0)
+        return queryset.order_by("-relevance", "pk") if rank else queryset
+
+    def _filter_sqlite(self, queryset, tokens, rank):
+        terms = " ".join(f'"{token}"' for token in tokens) + "*"
+        queryset = queryset.filter(
+            pk__in=RawSQL(
+                "SELECT rowid FROM store_product_fts "
+                "WHERE store_product_fts MATCH %s",
+                [terms],
+            )
+        )
+        if not rank:
+            return queryset
+        return queryset.order_by(FullTextRank(terms, self.max_ranked), "pk")
+
+
+class FullTextRank(Expression):
+    """
+    A product's position among the `limit` best FTS5 matches for `terms`,
+    or `limit` for the rest. The ranking query runs when the expression is
+    compiled, so the counts and aggregates that drop the ordering never
+    run it.
+    """
+
+    output_field = IntegerField()
+
+    def __init__(self, terms, limit):
+        super().__init__()
+        self.terms = terms
+        self.limit = limit
+
+    def as_sql(self, compiler, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT rowid FROM store_product_fts "
+                "WHERE store_product_fts MATCH %s "
+                "ORDER BY bm25(store_product_fts, 2.0, 1.0), rowid LIMIT %s",
+                [self.terms, self.limit],
+            )
+            ranked = [row[0] for row in cursor.fetchall()]
+        if not ranked:
+            return "%s", [self.limit]
+        column = "%s.%s" % (
+            compiler.quote_name_unless_alias(compiler.query.get_initial_alias()),
+            connection.ops.quote_name(Product._meta.pk.column),
+        )
+        params = []
+        for position, pk in enumerate(ranked):
+            params += [pk, position]
+        whens = " ".join(["WHEN %s THEN %s"] * len(ranked))
+        return f"CASE {column} {whens} ELSE %s END", params + [self.limit]
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_search_backend():
+    global _backend
+    path = getattr(settings, "STORE_SEARCH_BACKEND", None)
+    if not path:
+        return None
+    with _backend_lock:
+        if _backend is None or _backend.__class__ is not import_string(path):
+            _backend = import_string(path)()
+        return _backend
+
+
+def warm_up_search_backend():
+    """Start building an in-process index, so no request waits for it."""
+    backend = get_search_backend()
+    if hasattr(backend, "start_build"):
+        backend.start_build()
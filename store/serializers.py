@@ -3,8 +3,11 @@ from decimal import Decimal
 from core import models
 from core.serializers import SimpleUserSerializer
 from django.core.exceptions import ValidationError
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.exceptions import NotFound
 from rest_framework.fields import ReadOnlyField
 from rest_framework.relations import HyperlinkedRelatedField
 from typing_extensions import Required
@@ -19,8 +22,10 @@ from store.models import (
     Product,
     Reviews,
 )
+from tags.models import TaggedItem
 
-from .signals import order_created
+from . import outbox
+from .signals import products_updated
 
 
 class CollectionSerializer(serializers.ModelSerializer):
@@ -44,6 +49,9 @@ class ProductSerializer(serializers.ModelSerializer):
             "unit_price",
             "price_with_tax",
             "collection",
+            "tags",
+            "reviews_count",
+            "last_review_at",
         ]
 
     # id = serializers.IntegerField()
@@ -53,6 +61,7 @@ class ProductSerializer(serializers.ModelSerializer):
     # )
     # # calculated field in serializer class
     price_with_tax = serializers.SerializerMethodField(method_name="calculate_tax")
+    tags = serializers.SerializerMethodField()
 
     # # serialize by primary key
     # # collection = serializers.PrimaryKeyRelatedField(queryset=Collection.objects.all())
@@ -69,6 +78,16 @@ class ProductSerializer(serializers.ModelSerializer):
     def calculate_tax(self, product: Product):
         return product.unit_price * Decimal(1.1)
 
+    def get_tags(self, product: Product):
+        # lists attach every page's tags in one query (see
+        # ProductViewSet.paginate_queryset)
+        labels = getattr(product, "tags", None)
+        if labels is None:
+            labels = TaggedItem.objects.get_tags_for_many(Product, [product.id])[
+                product.id
+            ]
+        return labels
+
     # override the validate method of the ModelSerializer class to perform custom validation.
     # def validate(self, attrs):
     #  return super().validate(attrs)
@@ -103,6 +122,20 @@ class SimpleProductSerializer(serializers.ModelSerializer):
         fields = ["id", "title", "unit_price"]
 
 
+def add_to_cart(cart_id, quantities):
+    """
+    CartItem.objects.add_quantities in a transaction of its own, raising
+    NotFound rather than the foreign key's IntegrityError for a missing cart.
+    """
+    try:
+        with transaction.atomic():
+            return CartItem.objects.add_quantities(cart_id, quantities)
+    except IntegrityError:
+        if Cart.objects.filter(pk=cart_id).exists():
+            raise
+        raise NotFound("The cart does not exist with the given id.")
+
+
 class AddCartItemSerializer(serializers.ModelSerializer):
     product_id = serializers.IntegerField()
 
@@ -118,21 +151,46 @@ class AddCartItemSerializer(serializers.ModelSerializer):
         return value
 
     def save(self, **kwargs):
+        # one upsert, so concurrent adds of the same product neither lose an
+        # increment nor trip the (cart, product) unique key
         cart_id = self.context["cart_id"]
-        producd_id = self.validated_data["product_id"]
-        quantity = self.validated_data["quantity"]
-        try:
-            cart_item = CartItem.objects.get(cart_id=cart_id, product_id=producd_id)
-            cart_item.quantity += quantity
-            cart_item.save()
-            self.instance = cart_item
-        except CartItem.DoesNotExist:
-            self.instance = CartItem.objects.create(
-                cart_id=cart_id, **self.validated_data
+        quantities = {
+            self.validated_data["product_id"]: self.validated_data["quantity"]
+        }
+        (self.instance,) = add_to_cart(cart_id, quantities)
+        return self.instance
+
+
+class BulkAddCartItemListSerializer(serializers.ListSerializer):
+    def validate(self, attrs):
+        product_ids = {item["product_id"] for item in attrs}
+        existing = Product.objects.only("id").in_bulk(product_ids)
+        missing = sorted(product_ids - existing.keys())
+        if missing:
+            raise serializers.ValidationError(
+                f"The products do not exist with the given product_ids: {missing}."
             )
+        return attrs
+
+    def save(self, **kwargs):
+        cart_id = self.context["cart_id"]
+        quantities = {}
+        for item in self.validated_data:
+            product_id = item["product_id"]
+            quantities[product_id] = quantities.get(product_id, 0) + item["quantity"]
+        self.instance = add_to_cart(cart_id, quantities)
         return self.instance
 
 
+class BulkAddCartItemSerializer(serializers.ModelSerializer):
+    product_id = serializers.IntegerField()
+
+    class Meta:
+        model = CartItem
+        fields = ["id", "product_id", "quantity"]
+        list_serializer_class = BulkAddCartItemListSerializer
+
+
 class UpdateCartItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = CartItem
@@ -144,6 +202,10 @@ class CartItemSerializer(serializers.ModelSerializer):
     total_price = serializers.SerializerMethodField(method_name="get_total_price")
 
     def get_total_price(self, cart_item: CartItem):
+        # annotated by CartViewSet / CartItemViewSet
+        total_price = getattr(cart_item, "total_price", None)
+        if total_price is not None:
+            return total_price
         return cart_item.quantity * cart_item.product.unit_price
 
     class Meta:
@@ -157,7 +219,10 @@ class CartSerializer(serializers.ModelSerializer):
     total_price = serializers.SerializerMethodField(method_name="get_total_price")
 
     def get_total_price(self, cart: Cart):
-
+        # annotated by CartViewSet; empty and freshly created carts fall back
+        total_price = getattr(cart, "total_price", None)
+        if total_price is not None:
+            return total_price
         return sum(
             [item.quantity * item.product.unit_price for item in cart.items.all()]
         )
@@ -211,43 +276,90 @@ class OrderSerializer(serializers.ModelSerializer):
         ]
 
     def get_total_order_price(self, order: Order):
+        # annotated by OrderViewSet; orders without items and freshly created
+        # ones fall back
+        total_order_price = getattr(order, "total_order_price", None)
+        if total_order_price is not None:
+            return total_order_price
         return sum([item.quantity * item.unit_price for item in order.items.all()])
 
 
 class CreateOrderSerializer(serializers.Serializer):
     cart_id = serializers.UUIDField()
 
-    def validate_cart_id(self, cart_id):
-        if not Cart.objects.filter(pk=cart_id).exists():
-            raise serializers.ValidationError(
-                "The card does not exist with the given id."
-            )
-        if CartItem.objects.filter(cart_id=cart_id).count() == 0:
-            raise serializers.ValidationError("The cart is empty.")
-
-        return cart_id
-
     def save(self, **kwargs):
         cart_id = self.validated_data["cart_id"]
-        user_id = self.context["user_id"]
+        customer_id = self.context["customer_id"]
+        if customer_id is None:
+            raise serializers.ValidationError("The user has no customer profile.")
         with transaction.atomic():
-            customer = Customer.objects.get(pk=user_id)
-            order = Order.objects.create(customer=customer)
-            cart_items = CartItem.objects.select_related("product").filter(
-                cart_id=cart_id
+            # one LEFT JOIN both validates the cart and loads its lines:
+            # no rows means no cart, a single (None, None) row an empty one
+            rows = Cart.objects.filter(pk=cart_id).values_list(
+                "items__product_id", "items__quantity"
             )
-            order_items = [
-                OrderItem(
-                    order=order,
-                    product=item.product,
-                    quantity=item.quantity,
-                    unit_price=item.product.unit_price,
+            quantities = {
+                product_id: quantity
+                for product_id, quantity in rows
+                if product_id is not None
+            }
+            if not quantities:
+                message = (
+                    "The cart is empty."
+                    if rows
+                    else "The card does not exist with the given id."
                 )
-                for item in cart_items
-            ]
-            OrderItem.objects.bulk_create(order_items)
+                raise serializers.ValidationError({"cart_id": [message]})
+
+            # lock the products in id order so concurrent checkouts cannot
+            # deadlock, then check stock against the locked rows
+            products = (
+                Product.objects.select_for_update()
+                .filter(pk__in=quantities)
+                .order_by("id")
+                .values_list("id", "inventory", "unit_price")
+            )
+            unit_prices = {}
+            out_of_stock = []
+            for product_id, inventory, unit_price in products:
+                unit_prices[product_id] = unit_price
+                if inventory < quantities[product_id]:
+                    out_of_stock.append(product_id)
+            if out_of_stock:
+                raise serializers.ValidationError(
+                    {"cart_id": [f"Not enough inventory for products: {out_of_stock}."]}
+                )
+
+            # the inventory condition is repeated in the UPDATE so backends
+            # without row locks (sqlite) still cannot oversell
+            ordered = Case(
+                *[When(pk=pk, then=Value(qty)) for pk, qty in quantities.items()],
+                output_field=IntegerField(),
+            )
+            updated = Product.objects.filter(
+                pk__in=quantities, inventory__gte=ordered
+            ).update(inventory=F("inventory") - ordered, last_update=timezone.now())
+            if updated != len(quantities):
+                raise serializers.ValidationError(
+                    {"cart_id": ["Not enough inventory for one or more products."]}
+                )
+
+            order = Order.objects.create(customer_id=customer_id)
+            OrderItem.objects.bulk_create(
+                [
+                    OrderItem(
+                        order=order,
+                        product_id=product_id,
+                        quantity=quantity,
+                        unit_price=unit_prices[product_id],
+                    )
+                    for product_id, quantity in quantities.items()
+                ]
+            )
             Cart.objects.filter(pk=cart_id).delete()
-            order_created.send_robust(self.__class__, order=order)
+            products_updated.send_robust(self.__class__, product_ids=list(quantities))
+            # receivers run after commit, outside the checkout request
+            outbox.enqueue("order_created", order_id=order.id)
             return order
 
 
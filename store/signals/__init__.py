@@ -1,3 +1,6 @@
 from django.dispatch import Signal
 
-order_created = Signal()
\ No newline at end of file
+order_created = Signal()
+# sent with product_ids= by code that changes products through
+# QuerySet.update() or bulk operations, which bypass post_save
+products_updated = Signal()
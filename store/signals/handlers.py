@@ -1,10 +1,159 @@
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Case, F, OuterRef, Subquery, Value, When
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+    pre_save,
+)
 from django.dispatch import receiver
-from store.models import Customer
+from django.utils import timezone
+from store.cache import catalog_cache, customer_ids
+from store.models import Collection, Customer, Product, Reviews
+from store.search import get_search_backend
+from store.signals import products_updated
+from tags.models import TaggedItem
+from tags.signals import objects_tagged
 
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_profile_on_new_user(sender, **kwargs):
     if kwargs["created"]:
-        Customer.objects.create(user=kwargs["instance"])
+        user = kwargs["instance"]
+        customer = Customer.objects.create(user=user)
+        transaction.on_commit(lambda: customer_ids.set(user.id, customer.id))
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def invalidate_customer_id(sender, instance, **kwargs):
+    customer_ids.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Collection)
+@receiver(post_delete, sender=Collection)
+@receiver(m2m_changed, sender=Product.promotions.through)
+@receiver(products_updated)
+def invalidate_catalog_cache(sender, **kwargs):
+    # bump after commit so a concurrent reader cannot cache the old rows
+    # under the new version
+    transaction.on_commit(catalog_cache.invalidate)
+
+
+@receiver(post_save, sender=TaggedItem)
+@receiver(post_delete, sender=TaggedItem)
+def touch_tagged_product(sender, instance, **kwargs):
+    # product responses include the tags, so tagging counts as a change to
+    # the product for the catalog cache and the ETag validators
+    if instance.content_type_id != ContentType.objects.get_for_model(Product).id:
+        return
+    Product.objects.filter(pk=instance.object_id).update(last_update=timezone.now())
+    transaction.on_commit(catalog_cache.invalidate)
+
+
+@receiver(objects_tagged)
+def touch_bulk_tagged_products(sender, obj_type, object_ids, **kwargs):
+    if obj_type is not Product:
+        return
+    now = timezone.now()
+    # batches keep the IN list under SQLite's variable limit
+    for start in range(0, len(object_ids), 1000):
+        Product.objects.filter(pk__in=object_ids[start : start + 1000]).update(
+            last_update=now
+        )
+    transaction.on_commit(catalog_cache.invalidate)
+
+
+# product responses include the review aggregates, so as with tags a new or
+# deleted review counts as a change to the product
+@receiver(post_save, sender=Reviews)
+def count_review(sender, instance, created, raw, **kwargs):
+    if not created or raw:
+        return
+    Product.objects.filter(pk=instance.product_id).update(
+        reviews_count=F("reviews_count") + 1,
+        # reviews committed out of order must not move it back
+        last_review_at=Case(
+            When(last_review_at__gte=instance.date, then=F("last_review_at")),
+            default=Value(instance.date),
+        ),
+        last_update=timezone.now(),
+    )
+    transaction.on_commit(catalog_cache.invalidate)
+
+
+@receiver(post_delete, sender=Reviews)
+def uncount_review(sender, instance, **kwargs):
+    latest = (
+        Reviews.objects.filter(product=OuterRef("pk"))
+        .order_by("-date")
+        .values("date")[:1]
+    )
+    Product.objects.filter(pk=instance.product_id).update(
+        reviews_count=Case(
+            When(reviews_count__gt=0, then=F("reviews_count") - 1), default=Value(0)
+        ),
+        last_review_at=Subquery(latest),
+        last_update=timezone.now(),
+    )
+    transaction.on_commit(catalog_cache.invalidate)
+
+
+@receiver(post_init, sender=Product)
+def remember_product_collection(sender, instance, **kwargs):
+    # __dict__ avoids loading a deferred field
+    instance._loaded_collection_id = instance.__dict__.get("collection_id")
+
+
+@receiver(pre_save, sender=Product)
+def load_product_collection(sender, instance, raw, **kwargs):
+    if raw or instance._state.adding or instance._loaded_collection_id is not None:
+        return
+    instance._loaded_collection_id = (
+        Product.objects.filter(pk=instance.pk)
+        .values_list("collection_id", flat=True)
+        .first()
+    )
+
+
+def change_products_count(collection_id, delta):
+    collections = Collection.objects.filter(pk=collection_id)
+    if delta < 0:
+        collections = collections.filter(products_count__gte=-delta)
+    collections.update(products_count=F("products_count") + delta)
+
+
+@receiver(post_save, sender=Product)
+def update_products_count_on_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    previous = None if created else instance._loaded_collection_id
+    if previous != instance.collection_id:
+        if previous is not None:
+            change_products_count(previous, -1)
+        change_products_count(instance.collection_id, 1)
+    instance._loaded_collection_id = instance.collection_id
+
+
+@receiver(post_delete, sender=Product)
+def update_products_count_on_delete(sender, instance, **kwargs):
+    change_products_count(instance.collection_id, -1)
+
+
+@receiver(post_save, sender=Product)
+def index_product_for_search(sender, instance, raw, **kwargs):
+    backend = get_search_backend()
+    if backend is not None and not raw:
+        backend.index_product(instance)
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_from_search(sender, instance, **kwargs):
+    backend = get_search_backend()
+    if backend is not None:
+        backend.remove_product(instance.pk)
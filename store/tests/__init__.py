@@ -0,0 +1,32 @@
+from decimal import Decimal
+
+from store.models import Collection, Product
+
+
+def create_products(count, **fields):
+    """
+    Create `count` products numbered from 1 in a new collection and return
+    them in id order. `fields` override the defaults; a callable is called
+    with the product's number.
+    """
+    collection = Collection.objects.create(title="Collection")
+    fields = {
+        "unit_price": lambda i: Decimal("1.25") * i,
+        "inventory": 10,
+        **fields,
+    }
+    Product.objects.bulk_create(
+        [
+            Product(
+                title=f"Product {i}",
+                slug=f"product-{i}",
+                collection=collection,
+                **{
+                    name: value(i) if callable(value) else value
+                    for name, value in fields.items()
+                },
+            )
+            for i in range(1, count + 1)
+        ]
+    )
+    return list(Product.objects.filter(collection=collection).order_by("id"))
@@ -0,0 +1,141 @@
+from decimal import Decimal
+from uuid import uuid4
+
+from django.urls import reverse
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from store.models import Cart, CartItem
+from store.tests import create_products
+
+
+class CartTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product_ids = [product.pk for product in create_products(50)]
+
+    def create_cart(self, lines):
+        cart = Cart.objects.create()
+        CartItem.objects.bulk_create(
+            [
+                CartItem(cart=cart, product_id=product_id, quantity=i % 3 + 1)
+                for i, product_id in enumerate(self.product_ids[:lines])
+            ]
+        )
+        return cart
+
+
+class CartRetrieveTests(CartTestCase):
+    def test_query_count_does_not_grow_with_lines(self):
+        for lines in [1, 50]:
+            cart = self.create_cart(lines)
+            with self.assertNumQueries(2):
+                response = self.client.get(reverse("cart-detail", args=[cart.pk]))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data["items"]), lines)
+
+    def test_totals_are_computed_by_the_database(self):
+        cart = self.create_cart(50)
+        response = self.client.get(reverse("cart-detail", args=[cart.pk]))
+        expected = 0
+        for item in response.data["items"]:
+            line = item["quantity"] * Decimal(str(item["product"]["unit_price"]))
+            self.assertEqual(Decimal(str(item["total_price"])), line)
+            expected += line
+        self.assertEqual(Decimal(str(response.data["total_price"])), expected)
+
+    def test_empty_cart(self):
+        cart = self.create_cart(0)
+        response = self.client.get(reverse("cart-detail", args=[cart.pk]))
+        self.assertEqual(response.data["items"], [])
+        self.assertEqual(response.data["total_price"], 0)
+
+
+class CartItemListTests(CartTestCase):
+    def test_query_count_does_not_grow_with_lines(self):
+        for lines in [1, 50]:
+            cart = self.create_cart(lines)
+            with self.assertNumQueries(1):
+                response = self.client.get(reverse("cart-items-list", args=[cart.pk]))
+            self.assertEqual(len(response.data), lines)
+
+
+class BulkAddCartItemTests(CartTestCase):
+    def bulk_add(self, cart_id, items):
+        return self.client.post(
+            reverse("cart-items-bulk", args=[cart_id]), items, format="json"
+        )
+
+    def test_query_count_does_not_grow_with_items(self):
+        for count in [1, 50]:
+            cart = self.create_cart(0)
+            items = [
+                {"product_id": product_id, "quantity": 2}
+                for product_id in self.product_ids[:count]
+            ]
+            # the product check, then the upsert between SAVEPOINT and RELEASE
+            with self.assertNumQueries(4):
+                response = self.bulk_add(cart.pk, items)
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(len(response.data), count)
+
+    def test_adds_to_existing_lines(self):
+        cart = self.create_cart(1)
+        product_id = self.product_ids[0]
+        response = self.bulk_add(
+            cart.pk,
+            [
+                {"product_id": product_id, "quantity": 2},
+                {"product_id": product_id, "quantity": 3},
+            ],
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(CartItem.objects.get(cart=cart).quantity, 6)
+
+    def test_missing_products_are_rejected(self):
+        cart = self.create_cart(0)
+        response = self.bulk_add(cart.pk, [{"product_id": 0, "quantity": 1}])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(CartItem.objects.filter(cart=cart).exists())
+
+    def test_malformed_cart_id(self):
+        response = self.client.post(
+            "/store/cart/not-a-uuid/items/bulk/",
+            [{"product_id": self.product_ids[0], "quantity": 1}],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class AddCartItemTests(CartTestCase):
+    def test_query_count(self):
+        cart = self.create_cart(0)
+        with self.assertNumQueries(4):
+            response = self.client.post(
+                reverse("cart-items-list", args=[cart.pk]),
+                {"product_id": self.product_ids[0], "quantity": 1},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 201)
+
+
+class MissingCartTests(APITransactionTestCase):
+    # SQLite checks foreign keys at commit, which TestCase never reaches
+
+    def test_adding_to_a_missing_cart_is_not_found(self):
+        [product] = create_products(1)
+        cart_id = uuid4()
+        responses = [
+            self.client.post(
+                reverse("cart-items-bulk", args=[cart_id]),
+                [{"product_id": product.pk, "quantity": 1}],
+                format="json",
+            ),
+            self.client.post(
+                reverse("cart-items-list", args=[cart_id]),
+                {"product_id": product.pk, "quantity": 1},
+                format="json",
+            ),
+        ]
+        for response in responses:
+            self.assertEqual(response.status_code, 404)
+        self.assertFalse(CartItem.objects.exists())
@@ -0,0 +1,53 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from core.models import User
+from store.cache import catalog_cache, customer_ids
+from store.tests import create_products
+
+
+class CatalogCacheTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_products(15)
+        cls.user = User.objects.create_user("reader", "reader@example.com")
+        cls.staff = User.objects.create_user(
+            "staff", "staff@example.com", is_staff=True
+        )
+
+    def setUp(self):
+        cache.clear()
+        catalog_cache.reset_stats()
+        customer_ids.reset_stats()
+        self.client.force_authenticate(self.user)
+
+    def test_repeated_request_is_served_from_the_cache(self):
+        path = reverse("products-list") + "?ordering=unit_price"
+        first = self.client.get(path)
+        with self.assertNumQueries(0):
+            second = self.client.get(path)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(catalog_cache.stats()["hits"], 1)
+
+    def test_saving_a_product_invalidates(self):
+        product = self.products[0]
+        path = reverse("products-detail", args=[product.pk])
+        self.client.get(path)
+        with self.captureOnCommitCallbacks(execute=True):
+            product.title = "Renamed"
+            product.save()
+        self.assertEqual(self.client.get(path).json()["title"], "Renamed")
+        self.assertEqual(catalog_cache.stats()["invalidations"], 1)
+
+    def test_stats_are_admin_only(self):
+        path = "/__stats__/caches/"
+        self.assertEqual(self.client.get(path).status_code, 403)
+        self.client.get(reverse("products-list"))
+        self.client.get(reverse("products-list"))
+        self.client.force_authenticate(self.staff)
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["catalog"]["hits"], 1)
+        self.assertEqual(response.data["catalog"]["misses"], 1)
+        self.assertIn("hit_rate", response.data["customer_ids"])
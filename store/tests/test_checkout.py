@@ -0,0 +1,75 @@
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from core.models import User
+from store.models import Cart, CartItem, Order, OrderItem, Product
+from store.tests import create_products
+
+
+# order_created waits in the outbox; see test_outbox
+@override_settings(STORE_OUTBOX_DISPATCH_ON_COMMIT=False)
+class CheckoutTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_products(2, inventory=3)
+        # the signal handler creates the customer
+        cls.user = User.objects.create_user("customer", "customer@example.com")
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def checkout(self, quantities):
+        cart = Cart.objects.create()
+        CartItem.objects.bulk_create(
+            [
+                CartItem(cart=cart, product=product, quantity=quantity)
+                for product, quantity in zip(self.products, quantities)
+                if quantity
+            ]
+        )
+        response = self.client.post(
+            reverse("orders-list"), {"cart_id": str(cart.pk)}, format="json"
+        )
+        return cart, response
+
+    def inventory(self):
+        return list(Product.objects.order_by("id").values_list("inventory", flat=True))
+
+    def test_checkout_reserves_inventory(self):
+        cart, response = self.checkout([2, 3])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.inventory(), [1, 0])
+        order = Order.objects.get()
+        self.assertEqual(order.customer, self.user.customer)
+        self.assertEqual(
+            sorted(order.items.values_list("product_id", "quantity")),
+            [(self.products[0].pk, 2), (self.products[1].pk, 3)],
+        )
+        self.assertFalse(Cart.objects.filter(pk=cart.pk).exists())
+
+    def test_oversell_is_rejected(self):
+        # one line short of stock fails the whole order
+        cart, response = self.checkout([1, 4])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Not enough inventory", str(response.data["cart_id"]))
+        self.assertEqual(self.inventory(), [3, 3])
+        self.assertFalse(OrderItem.objects.exists())
+        self.assertTrue(Cart.objects.filter(pk=cart.pk).exists())
+
+    def test_last_units_sell_once(self):
+        self.assertEqual(self.checkout([2, 0])[1].status_code, 200)
+        self.assertEqual(self.checkout([2, 0])[1].status_code, 400)
+        self.assertEqual(self.checkout([1, 0])[1].status_code, 200)
+        self.assertEqual(self.inventory(), [0, 3])
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_empty_and_missing_carts(self):
+        self.assertEqual(self.checkout([])[1].status_code, 400)
+        response = self.client.post(
+            reverse("orders-list"),
+            {"cart_id": "00000000-0000-0000-0000-000000000000"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from core.models import User
+from store.tests import create_products
+
+
+class ConditionalGetTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_products(15)
+        cls.user = User.objects.create_user("reader", "reader@example.com")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def assertNotModified(self, path):
+        etag = self.client.get(path)["ETag"]
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        return etag
+
+    def change_product(self):
+        product = self.products[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            product.unit_price += 1
+            product.save()
+
+    def test_list(self):
+        path = reverse("products-list")
+        etag = self.assertNotModified(path)
+        self.change_product()
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_detail(self):
+        path = reverse("products-detail", args=[self.products[0].pk])
+        etag = self.assertNotModified(path)
+        self.change_product()
+        self.assertEqual(
+            self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
+
+    def test_cached_cursor_page_reads_nothing(self):
+        path = reverse("products-list") + "?cursor="
+        self.client.get(path)
+        # no aggregate over the catalog for the validators
+        with self.assertNumQueries(0):
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get(path, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,77 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from core.models import User
+from core.serializers import TokenObtainPairSerializer
+from store.cache import customer_ids
+from store.models import Cart, CartItem, Customer
+from store.tests import create_products
+
+
+class CustomerIdLookupTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        [cls.product] = create_products(1, inventory=100)
+        # the signal handler creates the customer
+        cls.user = User.objects.create_user("customer", "customer@example.com")
+
+    def setUp(self):
+        customer_ids.clear()
+        customer_ids.reset_stats()
+
+    def lookups(self, request):
+        """Run `request` and return how many user -> customer queries it made."""
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+        self.assertLess(response.status_code, 300, response.data)
+        return sum(
+            'WHERE "store_customer"."user_id" =' in query["sql"]
+            for query in queries.captured_queries
+        )
+
+    def checkout(self):
+        cart = Cart.objects.create()
+        CartItem.objects.create(cart=cart, product=self.product, quantity=1)
+        return self.client.post(
+            reverse("orders-list"), {"cart_id": str(cart.pk)}, format="json"
+        )
+
+    def requests(self):
+        return [
+            self.checkout,
+            lambda: self.client.get(reverse("orders-list")),
+            lambda: self.client.get(reverse("customers-me")),
+        ]
+
+    def test_at_most_one_lookup_per_request(self):
+        self.client.force_authenticate(self.user)
+        for request in self.requests():
+            customer_ids.clear()
+            self.assertEqual(self.lookups(request), 1)
+
+    def test_process_cache(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.lookups(self.requests()[0]), 1)
+        for request in self.requests():
+            self.assertEqual(self.lookups(request), 0)
+        stats = customer_ids.stats()
+        self.assertEqual((stats["misses"], stats["hits"]), (1, 3))
+
+    def test_token_claim(self):
+        token = TokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"JWT {token}")
+        for request in self.requests():
+            self.assertEqual(self.lookups(request), 0)
+        self.assertEqual(customer_ids.stats()["claim_hits"], 3)
+
+    def test_customer_changes_invalidate(self):
+        customer_ids.get(self.user.pk)
+        Customer.objects.get(user=self.user).save()
+        self.assertEqual(customer_ids.stats()["invalidations"], 1)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(customer_ids.get(self.user.pk), self.user.customer.pk)
+        self.assertEqual(len(queries), 1)
+        # user is unique, so Customer's Meta.ordering (a join) is left out
+        self.assertNotIn("core_user", queries[0]["sql"])
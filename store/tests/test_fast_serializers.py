@@ -0,0 +1,156 @@
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from core.models import User
+from store.fast_serializers import compile_serializer
+from store.models import Cart, CartItem, Collection, Product
+from store.serializers import (
+    CartItemSerializer,
+    CartSerializer,
+    ProductSerializer,
+    SimpleProductSerializer,
+)
+from store.tests import create_products
+from store.views import cart_item_total_price
+from tags.models import Tag, TaggedItem
+
+
+class FastSerializerTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        products = create_products(
+            30,
+            # some products without a description
+            description=lambda i: f"Description of product {i}" if i % 3 else None,
+            inventory=lambda i: i,
+        )
+        cls.product_ids = [product.pk for product in products]
+        Product.objects.filter(pk__in=cls.product_ids[::4]).update(
+            reviews_count=2, last_review_at=timezone.now()
+        )
+        TaggedItem.objects.tag_many(
+            Tag.objects.create(label="sale"), Product, cls.product_ids[::2]
+        )
+        TaggedItem.objects.tag_many(
+            Tag.objects.create(label="new"), Product, cls.product_ids[::5]
+        )
+        cls.cart = Cart.objects.create()
+        CartItem.objects.bulk_create(
+            [
+                CartItem(cart=cls.cart, product_id=product_id, quantity=i % 3 + 1)
+                for i, product_id in enumerate(cls.product_ids[:12])
+            ]
+        )
+        cls.user = User.objects.create_user("reader", "reader@example.com")
+
+
+class CompileSerializerTests(FastSerializerTestCase):
+    def assertRendersLikeDrf(self, serializer_class, queryset, tagged=False):
+        """Both paths must render byte-identical JSON for every row."""
+        columns, represent = compile_serializer(
+            serializer_class, queryset.query.annotations
+        )
+        objects = list(queryset)
+        rows = list(queryset.values(*columns))
+        if tagged:
+            TaggedItem.objects.attach_tags(Product, objects)
+            TaggedItem.objects.attach_tags(Product, rows)
+        renderer = JSONRenderer()
+        drf = serializer_class(objects, many=True).data
+        fast = [represent(row) for row in rows]
+        self.assertEqual(len(fast), len(drf))
+        for expected, actual in zip(drf, fast):
+            self.assertEqual(renderer.render(actual), renderer.render(expected))
+
+    def test_product_serializer(self):
+        self.assertRendersLikeDrf(
+            ProductSerializer, Product.objects.order_by("id"), tagged=True
+        )
+
+    def test_simple_product_serializer(self):
+        self.assertRendersLikeDrf(SimpleProductSerializer, Product.objects.all())
+
+    def test_cart_item_serializer(self):
+        self.assertRendersLikeDrf(
+            CartItemSerializer,
+            CartItem.objects.select_related("product")
+            .annotate(total_price=cart_item_total_price())
+            .order_by("id"),
+        )
+
+    def test_cart_item_serializer_without_annotation(self):
+        # get_total_price falls back to quantity * the product's unit_price
+        self.assertRendersLikeDrf(
+            CartItemSerializer,
+            CartItem.objects.select_related("product").order_by("id"),
+        )
+
+    def test_list_serializer_is_rejected(self):
+        with self.assertRaises(ValueError):
+            compile_serializer(CartSerializer)
+
+
+@override_settings(STORE_CATALOG_CACHE_TIMEOUT=0)
+class FastSerializerEndpointTests(FastSerializerTestCase):
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def assertSameResponses(self, path):
+        """GET `path` with STORE_FAST_SERIALIZERS off and on."""
+        responses = []
+        for enabled in [False, True]:
+            with override_settings(STORE_FAST_SERIALIZERS=enabled):
+                responses.append(self.client.get(path))
+        drf, fast = responses
+        self.assertEqual(fast.status_code, drf.status_code)
+        self.assertEqual(fast.content, drf.content)
+        return drf
+
+    def test_product_list(self):
+        products = reverse("products-list")
+        for query in [
+            "",
+            "?page=2",
+            "?ordering=-unit_price",
+            "?ordering=last_update&page=3",
+            f"?collection_id={Collection.objects.get().pk}",
+            "?cursor=",
+        ]:
+            with self.subTest(query=query):
+                response = self.assertSameResponses(products + query)
+                self.assertEqual(response.status_code, 200)
+
+    def test_product_cursor_pages(self):
+        path = reverse("products-list") + "?cursor="
+        pages = 0
+        while path:
+            path = self.assertSameResponses(path).json()["next"]
+            pages += 1
+        self.assertGreater(pages, 1)
+
+    def test_product_detail(self):
+        for product_id in self.product_ids[:4]:
+            response = self.assertSameResponses(
+                reverse("products-detail", args=[product_id])
+            )
+            self.assertEqual(response.status_code, 200)
+
+    def test_missing_product(self):
+        response = self.assertSameResponses(
+            reverse("products-detail", args=[self.product_ids[-1] + 1])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_cart_items(self):
+        response = self.assertSameResponses(
+            reverse("cart-items-list", args=[self.cart.pk])
+        )
+        self.assertEqual(len(response.json()), 12)
+        item = CartItem.objects.filter(cart=self.cart).first()
+        response = self.assertSameResponses(
+            reverse("cart-items-detail", args=[self.cart.pk, item.pk])
+        )
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,77 @@
+from django.db.models.signals import pre_delete
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from core.models import User
+from likes.models import LikeCounter, LikedItem
+from store.models import Product
+from store.tests import create_products
+
+
+class LikeTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_products(3)
+        cls.users = [
+            User.objects.create_user(f"user-{i}", f"user-{i}@example.com")
+            for i in range(3)
+        ]
+
+    def like(self, user, product, method="post"):
+        self.client.force_authenticate(user)
+        path = reverse("products-like", args=[product.pk])
+        response = getattr(self.client, method)(path)
+        self.assertEqual(response.status_code, 200)
+        return response.data["likes_count"]
+
+    def counts(self):
+        return LikeCounter.objects.counts_for_many(
+            Product, [product.pk for product in self.products]
+        )
+
+    def test_like_and_unlike(self):
+        product = self.products[0]
+        self.assertEqual(self.like(self.users[0], product), 1)
+        self.assertEqual(self.like(self.users[1], product), 2)
+        # liking twice counts once
+        self.assertEqual(self.like(self.users[1], product), 2)
+        self.assertEqual(self.like(self.users[0], product, "delete"), 1)
+        self.assertEqual(self.like(self.users[0], product, "delete"), 1)
+
+    def test_overlapping_unlikes_count_once(self):
+        product = self.products[0]
+        LikedItem.objects.like(self.users[0], Product, product.pk)
+        unlikes = []
+
+        def unlike_in_between(sender, **kwargs):
+            # another request's unlike, between a collector's SELECT of the
+            # like and its DELETE
+            pre_delete.disconnect(unlike_in_between, sender=LikedItem)
+            unlikes.append(LikedItem.objects.unlike(self.users[0], Product, product.pk))
+
+        pre_delete.connect(unlike_in_between, sender=LikedItem)
+        try:
+            unlikes.append(LikedItem.objects.unlike(self.users[0], Product, product.pk))
+        finally:
+            pre_delete.disconnect(unlike_in_between, sender=LikedItem)
+        self.assertEqual(unlikes.count(True), 1)
+        self.assertEqual(self.counts()[product.pk], 0)
+
+    def test_deleting_a_user_removes_their_likes(self):
+        for product in self.products[:2]:
+            LikedItem.objects.like(self.users[0], Product, product.pk)
+        LikedItem.objects.like(self.users[1], Product, self.products[0].pk)
+        self.users[0].delete()
+        self.assertEqual(list(self.counts().values()), [1, 0, 0])
+
+    def test_likes_for_a_page(self):
+        LikedItem.objects.like(self.users[0], Product, self.products[1].pk)
+        LikedItem.objects.like(self.users[1], Product, self.products[1].pk)
+        self.client.force_authenticate(self.users[0])
+        ids = ",".join(str(product.pk) for product in self.products)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("products-likes") + f"?ids={ids}")
+        self.assertEqual(
+            [(row["likes_count"], row["liked"]) for row in response.data],
+            [(0, False), (2, True), (0, False)],
+        )
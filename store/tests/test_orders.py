@@ -0,0 +1,71 @@
+from decimal import Decimal
+
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from core.models import User
+from store.cache import customer_ids
+from store.models import Order, OrderItem
+from store.tests import create_products
+
+
+class OrderListTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_products(5)
+        cls.staff = User.objects.create_user(
+            "staff", "staff@example.com", "password", is_staff=True
+        )
+        # the signal handler creates the customer
+        cls.user = User.objects.create_user("customer", "customer@example.com")
+
+    def setUp(self):
+        customer_ids.clear()
+
+    def create_orders(self, count):
+        Order.objects.bulk_create(
+            [Order(customer=self.user.customer) for i in range(count)]
+        )
+        orders = list(Order.objects.order_by("-id")[:count])
+        OrderItem.objects.bulk_create(
+            [
+                OrderItem(
+                    order=order,
+                    product=product,
+                    quantity=2,
+                    unit_price=Decimal("1.50"),
+                )
+                for order in orders
+                for product in self.products[:3]
+            ]
+        )
+
+    def assert_query_count_is_constant(self, user, path, expected):
+        self.client.force_authenticate(user)
+        for count in [1, 20]:
+            self.create_orders(count)
+            customer_ids.clear()
+            with self.assertNumQueries(expected):
+                response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+
+    def test_staff(self):
+        self.assert_query_count_is_constant(self.staff, reverse("orders-list"), 2)
+
+    def test_customer(self):
+        # plus the user to customer lookup
+        self.assert_query_count_is_constant(self.user, reverse("orders-list"), 3)
+
+    def test_cursor_page(self):
+        self.assert_query_count_is_constant(
+            self.staff, reverse("orders-list") + "?cursor=", 2
+        )
+
+    def test_totals(self):
+        self.create_orders(2)
+        self.client.force_authenticate(self.staff)
+        response = self.client.get(reverse("orders-list"))
+        for order in response.data:
+            self.assertEqual(len(order["items"]), 3)
+            self.assertEqual(order["total_order_price"], Decimal("9.00"))
+            self.assertEqual(order["items"][0]["total_price"], Decimal("3.00"))
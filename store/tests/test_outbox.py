@@ -0,0 +1,91 @@
+import contextlib
+import io
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core.models import User
+from store import outbox
+from store.models import Order, OutboxEvent
+from store.signals import order_created
+
+
+@override_settings(STORE_OUTBOX_DISPATCH_ON_COMMIT=False)
+class OutboxTests(TransactionTestCase):
+    # receivers must run outside the claiming transaction, which TestCase
+    # would wrap in its own
+
+    def setUp(self):
+        user = User.objects.create_user("customer", "customer@example.com")
+        self.order = Order.objects.create(customer=user.customer)
+        self.deliveries = []
+        self.failures = 0
+        order_created.connect(self.receiver, dispatch_uid="test-outbox")
+        self.addCleanup(order_created.disconnect, dispatch_uid="test-outbox")
+
+    def receiver(self, sender, order, **kwargs):
+        self.deliveries.append((order.pk, connection.in_atomic_block))
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("receiver failed")
+
+    def dispatch(self, **kwargs):
+        # core's on_order_created prints every order
+        with contextlib.redirect_stdout(io.StringIO()):
+            return outbox.dispatch_pending(**kwargs)
+
+    def make_due(self, event):
+        OutboxEvent.objects.filter(pk=event.pk).update(
+            available_at=timezone.now() - timedelta(seconds=1)
+        )
+
+    def test_delivers_outside_a_transaction(self):
+        event = outbox.enqueue("order_created", order_id=self.order.pk)
+        self.assertEqual(self.dispatch(), 1)
+        self.assertEqual(self.deliveries, [(self.order.pk, False)])
+        event.refresh_from_db()
+        self.assertEqual(event.status, OutboxEvent.STATUS_DISPATCHED)
+        self.assertEqual(self.dispatch(), 0)
+
+    def test_failed_delivery_is_retried_later(self):
+        self.failures = 1
+        event = outbox.enqueue("order_created", order_id=self.order.pk)
+        self.dispatch()
+        event.refresh_from_db()
+        self.assertEqual(event.status, OutboxEvent.STATUS_PENDING)
+        self.assertEqual(event.attempts, 1)
+        self.assertIn("receiver failed", event.last_error)
+        self.assertGreater(event.available_at, timezone.now())
+        # not due until the backoff has passed
+        self.assertEqual(self.dispatch(), 0)
+        self.make_due(event)
+        self.assertEqual(self.dispatch(), 1)
+        event.refresh_from_db()
+        self.assertEqual(event.status, OutboxEvent.STATUS_DISPATCHED)
+        self.assertEqual(len(self.deliveries), 2)
+
+    def test_gives_up_after_max_attempts(self):
+        self.failures = 2
+        event = outbox.enqueue("order_created", order_id=self.order.pk)
+        self.dispatch(max_attempts=2)
+        self.make_due(event)
+        self.dispatch(max_attempts=2)
+        event.refresh_from_db()
+        self.assertEqual(event.status, OutboxEvent.STATUS_FAILED)
+        self.assertEqual(event.attempts, 2)
+
+    def test_expired_lease_is_claimed_again(self):
+        event = outbox.enqueue("order_created", order_id=self.order.pk)
+        # a worker that claimed the event and died
+        [claimed], leased_until = outbox._claim(10)
+        self.assertEqual(self.dispatch(), 0)
+        self.make_due(event)
+        self.assertEqual(self.dispatch(), 1)
+        # the first worker's late outcome does not overwrite the delivery
+        claimed.status = OutboxEvent.STATUS_PENDING
+        self.assertEqual(outbox._record(claimed, leased_until), 0)
+        event.refresh_from_db()
+        self.assertEqual(event.status, OutboxEvent.STATUS_DISPATCHED)
+        self.assertEqual(event.attempts, 2)
@@ -0,0 +1,78 @@
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from core.models import User
+from store.models import Reviews
+from store.tests import create_products
+
+
+@override_settings(STORE_CATALOG_CACHE_TIMEOUT=0)
+class KeysetPaginationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # four prices, so pages split runs of equal prices
+        cls.products = create_products(25, unit_price=lambda i: i % 4 + 1)
+        cls.user = User.objects.create_user("reader", "reader@example.com")
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def walk(self, path):
+        """Follow `next` links from `path`; returns the pages' ids."""
+        pages = []
+        while path:
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row["id"] for row in response.json()["results"]])
+            path = response.json()["next"]
+        return pages
+
+    def test_pages_follow_the_ordering_with_the_pk_as_tiebreaker(self):
+        for ordering, key in [
+            ("unit_price", lambda p: (p.unit_price, p.pk)),
+            ("-unit_price", lambda p: (-p.unit_price, p.pk)),
+        ]:
+            with self.subTest(ordering=ordering):
+                pages = self.walk(
+                    reverse("products-list") + f"?ordering={ordering}&cursor="
+                )
+                self.assertEqual([len(page) for page in pages], [10, 10, 5])
+                expected = [p.pk for p in sorted(self.products, key=key)]
+                self.assertEqual(sum(pages, []), expected)
+
+    def test_previous_link_returns_the_previous_page(self):
+        path = reverse("products-list") + "?ordering=unit_price&cursor="
+        first = self.client.get(path).json()
+        self.assertIsNone(first["previous"])
+        second = self.client.get(first["next"]).json()
+        back = self.client.get(second["previous"]).json()
+        self.assertEqual(back["results"], first["results"])
+        self.assertEqual(
+            self.client.get(back["next"]).json()["results"], second["results"]
+        )
+
+    def test_count_is_opt_in(self):
+        path = reverse("products-list") + "?cursor="
+        self.assertNotIn("count", self.client.get(path).json())
+        self.assertEqual(self.client.get(path + "&count=exact").json()["count"], 25)
+
+    def test_invalid_cursor_is_not_found(self):
+        path = reverse("products-list") + "?cursor=not-a-cursor"
+        self.assertEqual(self.client.get(path).status_code, 404)
+
+    def test_reviews_newest_first(self):
+        product = self.products[0]
+        Reviews.objects.bulk_create(
+            [
+                Reviews(product=product, name=f"Reviewer {i}", description="Fine")
+                for i in range(15)
+            ]
+        )
+        pages = self.walk(reverse("product-reviews-list", args=[product.pk]))
+        ids = list(
+            Reviews.objects.filter(product=product)
+            .order_by("-date", "-id")
+            .values_list("id", flat=True)
+        )
+        self.assertEqual(sum(pages, []), ids)
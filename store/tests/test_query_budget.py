@@ -0,0 +1,24 @@
+import json
+from pathlib import Path
+
+from django.test import TransactionTestCase, override_settings
+
+from store import benchmark
+
+
+# as `manage.py benchmark_api`: the database path, in autocommit like a
+# server, so transactions are not counted as savepoints
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}},
+    STORE_OUTBOX_DISPATCH_ON_COMMIT=False,
+)
+class QueryBudgetTests(TransactionTestCase):
+    def test_every_endpoint_is_within_budget(self):
+        budget = json.loads(
+            Path(benchmark.__file__).with_name("benchmark_budget.json").read_text()
+        )
+        users = benchmark.seed(1)
+        report = benchmark.run_benchmark(
+            benchmark.build_scenarios(users), budget, repeat=1
+        )
+        self.assertEqual(report["failures"], [])
@@ -0,0 +1,27 @@
+from django.test import RequestFactory, SimpleTestCase
+
+from store.views import CartViewSet, CollectionViewSet, ProductViewSet, ReviewViewSet
+from storefront.db.middleware import ReplicaRoutingMiddleware
+from storefront.db.routers import use_primary
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    def pinned(self, viewset):
+        middleware = ReplicaRoutingMiddleware(lambda request: None)
+        view = viewset.as_view({"get": "list"})
+        token = use_primary.set(False)
+        try:
+            middleware.process_view(RequestFactory().get("/"), view, (), {})
+            return use_primary.get()
+        finally:
+            use_primary.reset(token)
+
+    def test_pinned_reads_use_the_primary(self):
+        # catalog cache entries and ETags are keyed on the catalog version;
+        # anonymous carts cannot be pinned to the client's writes
+        for viewset in [ProductViewSet, CollectionViewSet, CartViewSet]:
+            with self.subTest(viewset=viewset.__name__):
+                self.assertTrue(self.pinned(viewset))
+
+    def test_other_reads_may_use_a_replica(self):
+        self.assertFalse(self.pinned(ReviewViewSet))
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from core.models import User
+from store.models import Product, Reviews
+from store.tests import create_products
+
+
+class ReviewAggregateTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_products(2)
+        cls.user = User.objects.create_user("reader", "reader@example.com")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def aggregates(self, product):
+        return Product.objects.values_list("reviews_count", "last_review_at").get(
+            pk=product.pk
+        )
+
+    def test_posting_a_review_updates_the_product(self):
+        product = self.products[0]
+        detail = reverse("products-detail", args=[product.pk])
+        self.assertEqual(self.client.get(detail).json()["reviews_count"], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("product-reviews-list", args=[product.pk]),
+                {"name": "Reviewer", "description": "Fine"},
+            )
+        self.assertEqual(response.status_code, 201)
+        review = Reviews.objects.get()
+        self.assertEqual(self.aggregates(product), (1, review.date))
+        # the cached product response was invalidated
+        self.assertEqual(self.client.get(detail).json()["reviews_count"], 1)
+        self.assertEqual(self.aggregates(self.products[1]), (0, None))
+
+    def test_deleting_reviews(self):
+        product = self.products[0]
+        older, newer = [
+            Reviews.objects.create(product=product, name=name, description="Fine")
+            for name in ["Older", "Newer"]
+        ]
+        self.assertEqual(self.aggregates(product), (2, newer.date))
+        newer.delete()
+        self.assertEqual(self.aggregates(product), (1, older.date))
+        older.delete()
+        self.assertEqual(self.aggregates(product), (0, None))
+
+    def test_refresh_after_bulk_create(self):
+        product = self.products[0]
+        reviews = Reviews.objects.bulk_create(
+            [
+                Reviews(product=product, name=f"Reviewer {i}", description="Fine")
+                for i in range(3)
+            ]
+        )
+        latest = timezone.now() + timedelta(days=1)
+        Reviews.objects.filter(pk=reviews[1].pk).update(date=latest)
+        # bulk_create sends no signals
+        self.assertEqual(self.aggregates(product), (0, None))
+        Product.objects.refresh_review_aggregates()
+        self.assertEqual(self.aggregates(product), (3, latest))
+        self.assertEqual(self.aggregates(self.products[1]), (0, None))
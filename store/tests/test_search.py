@@ -0,0 +1,71 @@
+from django.db.models import F
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from core.models import User
+from store.models import Product
+from store.pagination import KeysetPagination
+from store.search import SearchBackend
+from store.tests import create_products
+
+
+@override_settings(STORE_CATALOG_CACHE_TIMEOUT=0)
+class SearchWithCursorTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        products = create_products(
+            25, description=lambda i: "apple pie" if i % 2 else "pear tart"
+        )
+        cls.apples = [product.pk for product in products[::2]]
+        cls.user = User.objects.create_user("reader", "reader@example.com")
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_cursor_pages_through_every_match(self):
+        path = reverse("products-list") + "?search=apple&cursor="
+        seen = []
+        while path:
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            seen += [product["id"] for product in response.json()["results"]]
+            path = response.json()["next"]
+        # in the view's keyset ordering, each match once
+        self.assertCountEqual(seen, self.apples)
+
+    def test_ranked_search_without_cursor(self):
+        response = self.client.get(reverse("products-list") + "?search=apple")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], len(self.apples))
+
+
+class KeysetOrderingTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_products(3)
+
+    def paginate(self, queryset):
+        request = Request(APIRequestFactory().get("/", {"cursor": ""}))
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(queryset, request)
+        return paginator.ordering, [product.pk for product in page]
+
+    def test_expression_ordering_is_skipped(self):
+        # as InvertedIndexBackend ranks its results
+        ranked = SearchBackend().rank_by(
+            Product.objects.all(), [product.pk for product in self.products[::-1]]
+        )
+        self.assertEqual(
+            self.paginate(ranked), (["id"], [product.pk for product in self.products])
+        )
+
+    def test_alias_ordering_is_skipped(self):
+        # as the MySQL backend ranks by its relevance alias
+        ranked = Product.objects.alias(relevance=F("unit_price")).order_by(
+            "-relevance", "pk"
+        )
+        self.assertEqual(
+            self.paginate(ranked), (["id"], [product.pk for product in self.products])
+        )
@@ -1,11 +1,21 @@
 from django.db import transaction
-from django.db.models.aggregates import Count
+from django.db.models import (
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    Prefetch,
+    ProtectedError,
+)
+from django.db.models.aggregates import Sum
 from django.db.models.base import Model
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.conf import User
 from rest_framework import permissions, status
-from rest_framework.decorators import action, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.generics import get_object_or_404
 from rest_framework.mixins import (
     CreateModelMixin,
     DestroyModelMixin,
@@ -22,10 +32,23 @@ from rest_framework.response import Response
 from rest_framework.serializers import ModelSerializer
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 
-from store import serializers
-from store.filters import ProductFilter
-from store.pagination import DefaultPagination
+from likes.models import LikeCounter, LikedItem
+from store import exports, serializers
+from store.cache import (
+    CatalogCacheMixin,
+    ConditionalGetMixin,
+    catalog_cache,
+    customer_ids,
+)
+from store.fast_serializers import FastSerializerMixin
+from store.filters import ProductFilter, ProductSearchFilter
+from store.pagination import (
+    DefaultPagination,
+    KeysetPagination,
+    KeysetPaginationMixin,
+)
 from store.permissions import IsAdminOrReadOnly, ViewHistoryPermission
+from tags.models import TaggedItem
 
 from .models import (
     Cart,
@@ -39,6 +62,7 @@ from .models import (
 )
 from .serializers import (
     AddCartItemSerializer,
+    BulkAddCartItemSerializer,
     CartItemSerializer,
     CartSerializer,
     CollectionSerializer,
@@ -61,10 +85,19 @@ HTTP Requests supported: GET, POST, PUT, DELETE
 """
 
 
-class ProductViewSet(ModelViewSet):
+class ProductViewSet(
+    ConditionalGetMixin,
+    CatalogCacheMixin,
+    FastSerializerMixin,
+    KeysetPaginationMixin,
+    ModelViewSet,
+):
+    # a lagging replica read after a catalog version bump would be cached
+    # (and its ETag answered with 304) under the new version
+    read_from_replica = False
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, OrderingFilter]
     # filterset_fields = ["collection_id", "unit_price"]
     filterset_class = ProductFilter
     search_fields = ["title", "description"]
@@ -79,12 +112,75 @@ class ProductViewSet(ModelViewSet):
     """
     Pagination can also be set up globally in settings module.
     Please check the settings.py module in storefront folder.
+    Clients paging deep into the catalog can opt into keyset pagination
+    with ?cursor= (see KeysetPaginationMixin).
     """
     pagination_class = DefaultPagination
+    MAX_LIKES_IDS = 100
 
     def get_serializer_context(self):
         return {"request": self.request}
 
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            TaggedItem.objects.attach_tags(Product, page)
+        return page
+
+    def get_validators(self, request):
+        # every change to a product, tagging included, moves its
+        # last_update
+        if self.action == "retrieve":
+            try:
+                last_update = (
+                    Product.objects.filter(pk=self.kwargs["pk"])
+                    .values_list("last_update", flat=True)
+                    .first()
+                )
+            except (TypeError, ValueError):
+                # a malformed id; retrieve answers 404
+                return None, None
+            return last_update, last_update
+        # lists use the catalog version, bumped by every change to the
+        # catalog, so neither cache hits nor cursor pages aggregate over it
+        return catalog_cache.get_version(), None
+
+    @action(detail=False, permission_classes=[IsAuthenticated])
+    def likes(self, request):
+        """
+        Like counts and whether the user liked each of ?ids=1,2,3 (at most
+        MAX_LIKES_IDS), in two queries. Kept out of the cached product
+        representation, which is shared between users.
+        """
+        try:
+            ids = [int(pk) for pk in request.query_params.get("ids", "").split(",")]
+        except ValueError:
+            raise ValidationError({"ids": "A comma-separated list of product ids."})
+        if len(ids) > self.MAX_LIKES_IDS:
+            raise ValidationError({"ids": f"At most {self.MAX_LIKES_IDS} ids."})
+        counts = LikeCounter.objects.counts_for_many(Product, ids)
+        liked = LikedItem.objects.liked_by(request.user, Product, ids)
+        return Response(
+            [{"id": pk, "likes_count": counts[pk], "liked": pk in liked} for pk in ids]
+        )
+
+    @action(
+        detail=True, methods=["POST", "DELETE"], permission_classes=[IsAuthenticated]
+    )
+    def like(self, request, pk):
+        # 404 for unknown and malformed ids alike
+        pk = get_object_or_404(Product.objects.only("id"), pk=pk).pk
+        if request.method == "POST":
+            LikedItem.objects.like(request.user, Product, pk)
+        else:
+            LikedItem.objects.unlike(request.user, Product, pk)
+        return Response(
+            {
+                "likes_count": LikeCounter.objects.counts_for_many(Product, [pk])[pk],
+                "liked": request.method == "POST",
+            }
+        )
+
     def destroy(self, request, *args, **kwargs):
         if OrderItem.objects.filter(product_id=kwargs["id"]).count() > 0:
             return Response(
@@ -102,24 +198,46 @@ HTTP Requests supported: GET, POST, PUT, DELETE
 """
 
 
-class CollectionViewSet(ModelViewSet):
-    queryset = Collection.objects.annotate(products_count=Count("products")).all()
+class CollectionViewSet(ConditionalGetMixin, ModelViewSet):
+    # ETags carry the catalog version, see ProductViewSet
+    read_from_replica = False
+    queryset = Collection.objects.all()
     serializer_class = CollectionSerializer
     permission_classes = [IsAdminOrReadOnly]
 
+    def get_validators(self, request):
+        # collections have no timestamp, but every change to them or to
+        # their products (products_count) bumps the catalog version
+        return catalog_cache.get_version(), None
+
     def destroy(self, request, *args, **kwargs):
-        if Product.objects.filter(collection=kwargs["pk"]).count() > 0:
-            return Response(
-                {
-                    "error": "collection cannot be deleted becasue it contains one or more products."
-                },
-                status=status.HTTP_405_METHOD_NOT_ALLOWED,
-            )
-        return super().destroy(request, *args, **kwargs)
+        collection = self.get_object()
+        # exact, unlike products_count, which writes that skip signals can
+        # leave behind
+        if collection.products.exists():
+            return self.not_empty_response()
+        try:
+            self.perform_destroy(collection)
+        except ProtectedError:
+            # a product was added after the check
+            return self.not_empty_response()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def not_empty_response(self):
+        return Response(
+            {
+                "error": "collection cannot be deleted becasue it contains one or more products."
+            },
+            status=status.HTTP_405_METHOD_NOT_ALLOWED,
+        )
 
 
 class ReviewViewSet(ModelViewSet):
     serializer_class = ReviewSerializer
+    # a product can have too many reviews for offsets; the pages walk the
+    # (product, date) index
+    pagination_class = KeysetPagination
+    keyset_ordering = ["-date", "-id"]
 
     def get_queryset(self):
         return Reviews.objects.filter(product_id=self.kwargs["product_pk"])
@@ -128,15 +246,48 @@ class ReviewViewSet(ModelViewSet):
         return {"product_id": self.kwargs["product_pk"]}
 
 
+def cart_item_total_price(prefix=""):
+    return ExpressionWrapper(
+        F(f"{prefix}quantity") * F(f"{prefix}product__unit_price"),
+        output_field=DecimalField(max_digits=19, decimal_places=2),
+    )
+
+
+def order_item_total_price(prefix=""):
+    return ExpressionWrapper(
+        F(f"{prefix}quantity") * F(f"{prefix}unit_price"),
+        output_field=DecimalField(max_digits=19, decimal_places=2),
+    )
+
+
 class CartViewSet(
     CreateModelMixin, RetrieveModelMixin, DestroyModelMixin, GenericViewSet
 ):
-    queryset = Cart.objects.prefetch_related("items__product").all()
+    # carts are anonymous, so reads cannot be pinned to the client's writes
+    read_from_replica = False
+    # other ids 404 in the URL resolver, here and in the nested items routes,
+    # instead of failing the UUID lookup with a 500
+    lookup_value_regex = "[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+    # line totals and the cart total are computed by the database, see
+    # CartSerializer.get_total_price
+    queryset = (
+        Cart.objects.prefetch_related(
+            Prefetch(
+                "items",
+                queryset=CartItem.objects.select_related("product").annotate(
+                    total_price=cart_item_total_price()
+                ),
+            )
+        )
+        .annotate(total_price=Sum(cart_item_total_price("items__")))
+        .all()
+    )
     serializer_class = CartSerializer
 
 
 class CustomerViewSet(ModelViewSet):
-    queryset = Customer.objects.all()
+    # first_name and last_name read the user
+    queryset = Customer.objects.select_related("user")
     serializer_class = CustomerSerializer
 
     permission_classes = [IsAdminUser]
@@ -148,8 +299,9 @@ class CustomerViewSet(ModelViewSet):
     )
     def me(self, request):
         method = request.method
-        user_id = request.user.id
-        customer = Customer.objects.get(user_id=user_id)
+        customer = Customer.objects.select_related("user").get(
+            pk=customer_ids.for_request(request)
+        )
         if method == "GET":
             serializer = CustomerProfileSerializer(customer)
             return Response(serializer.data)
@@ -164,12 +316,15 @@ class CustomerViewSet(ModelViewSet):
         return Response("ok")
 
 
-class CartItemViewSet(ModelViewSet):
+class CartItemViewSet(FastSerializerMixin, ModelViewSet):
     http_method_names = ["get", "post", "patch", "delete"]
+    read_from_replica = False
 
     def get_queryset(self):
-        return CartItem.objects.filter(cart_id=self.kwargs["cart_pk"]).select_related(
-            "product"
+        return (
+            CartItem.objects.filter(cart_id=self.kwargs["cart_pk"])
+            .select_related("product")
+            .annotate(total_price=cart_item_total_price())
         )
 
     def get_serializer_class(self):
@@ -182,13 +337,25 @@ class CartItemViewSet(ModelViewSet):
     def get_serializer_context(self):
         return {"cart_id": self.kwargs["cart_pk"]}
 
+    @action(detail=False, methods=["POST"])
+    def bulk(self, request, *args, **kwargs):
+        serializer = BulkAddCartItemSerializer(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            context=self.get_serializer_context(),
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
 
-class OrderViewSet(ModelViewSet):
+class OrderViewSet(KeysetPaginationMixin, ModelViewSet):
 
     http_method_names = ["get", "patch", "post", "delete", "head", "options"]
 
     def get_permissions(self):
-        if self.request.method in ["PATCH", "DELETE"]:
+        if self.request.method in ["PATCH", "DELETE"] or self.action == "export":
             return [IsAdminUser()]
         return [IsAuthenticated()]
 
@@ -203,26 +370,65 @@ class OrderViewSet(ModelViewSet):
         return {"user_id": self.request.user.id}
 
     def get_queryset(self):
+        # a constant number of queries however many orders are listed: the
+        # customer's name comes from its user, items and their products are
+        # prefetched together and the order total is summed by the database
+        queryset = (
+            Order.objects.select_related("customer__user")
+            .prefetch_related(
+                Prefetch(
+                    "items",
+                    queryset=OrderItem.objects.select_related("product").only(
+                        "id",
+                        "order_id",
+                        "quantity",
+                        "unit_price",
+                        "product__id",
+                        "product__title",
+                        "product__unit_price",
+                    ),
+                )
+            )
+            .annotate(total_order_price=Sum(order_item_total_price("items__")))
+        )
         user = self.request.user
         if user.is_staff:
-            return Order.objects.all()
-        customer = Customer.objects.get(user_id=user.id)
-        return (
-            Order.objects.prefetch_related("items")
-            .select_related("customer")
-            .filter(customer_id=customer.id)
-            .all()
-        )
+            return queryset
+        return queryset.filter(customer_id=customer_ids.for_request(self.request))
 
     def create(self, request, *args, **kwargs):
         serializer = CreateOrderSerializer(
-            data=request.data, context=self.get_serializer_context()
+            data=request.data,
+            context={
+                **self.get_serializer_context(),
+                "customer_id": customer_ids.for_request(request),
+            },
         )
         serializer.is_valid(raise_exception=True)
         order = serializer.save()
-        serializer = OrderSerializer(order)
+        serializer = OrderSerializer(self.get_queryset().get(pk=order.pk))
         return Response(serializer.data)
 
+    @action(detail=False)
+    def export(self, request):
+        """
+        Stream every matching order (?dataset=orders) or order item
+        (?dataset=items, the default) as ?output=csv or ndjson; admin only. `format` is
+        taken by DRF's content negotiation, hence `output`. Filters:
+        placed_at__gte, placed_at__lt and payment_status.
+        """
+        dataset = request.query_params.get("dataset", "items")
+        output = request.query_params.get("output", "csv")
+        try:
+            chunks = exports.export(dataset, output, request.query_params)
+        except exports.ExportError as e:
+            raise ValidationError({"detail": str(e)})
+        response = StreamingHttpResponse(
+            chunks, content_type=exports.CONTENT_TYPES[output]
+        )
+        response["Content-Disposition"] = f'attachment; filename="{dataset}.{output}"'
+        return response
+
     def destroy(self, request, *args, **kwargs):
         with transaction.atomic():
             instance = self.get_object()
@@ -232,3 +438,12 @@ class OrderViewSet(ModelViewSet):
             instance.delete()
             return Response(order, status=status.HTTP_200_OK)
             # return super().destroy(request, *args, **kwargs)
+
+
+@api_view()
+@permission_classes([IsAdminUser])
+def cache_stats_view(request):
+    """Catalog and customer id cache counters for this worker process."""
+    return Response(
+        {"catalog": catalog_cache.stats(), "customer_ids": customer_ids.stats()}
+    )
@@ -13,4 +13,12 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'storefront.settings')
 
+# Sync views run in asgiref's worker threads, each with its own Django
+# connection; the database pool (storefront/db/pool.py) is thread-safe and
+# shared by those threads, so nothing else is needed here.
 application = get_asgi_application()
+
+# start building an in-process search index before the first request needs it
+from store.search import warm_up_search_backend  # noqa: E402
+
+warm_up_search_backend()
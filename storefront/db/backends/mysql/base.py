@@ -0,0 +1,8 @@
+from django.db.backends.mysql import base
+
+from storefront.db.backends.pooled import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    def ping(self, connection):
+        connection.ping()
@@ -0,0 +1,40 @@
+from functools import partial
+
+from storefront.db.pool import get_pool
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Take driver connections from a ConnectionPool instead of opening them,
+    and hand them back instead of closing them, when the database settings
+    have a "POOL" entry. Subclasses implement ping().
+    """
+
+    def get_pool(self):
+        options = self.settings_dict.get("POOL")
+        if not options:
+            return None
+        return get_pool(self.alias, options, self.ping)
+
+    def ping(self, connection):
+        raise NotImplementedError
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool()
+        connect = partial(super().get_new_connection, conn_params)
+        if pool is None:
+            return connect()
+        connection = pool.acquire(connect)
+        pool.fill(connect)
+        return connection
+
+    def _close(self):
+        pool = self.get_pool()
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            if self.in_atomic_block:
+                # Django keeps using this connection until the block exits
+                pool.discard(self.connection)
+            else:
+                pool.release(self.connection, reset=not self.autocommit)
@@ -0,0 +1,8 @@
+from django.db.backends.sqlite3 import base
+
+from storefront.db.backends.pooled import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    def ping(self, connection):
+        connection.execute("SELECT 1").fetchall()
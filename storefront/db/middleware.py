@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .routers import use_primary
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Pin a request to the primary database when it may write, or when it
+    comes from a client that wrote within the last
+    DATABASE_REPLICA_STICKY_SECONDS ("read your writes"). Clients are told
+    apart by JWT subject, then by session; anonymous clients get a cookie.
+    The sticky marks live in the DATABASE_REPLICA_STICKY_CACHE cache, which
+    must be shared between workers in production.
+
+    Views whose reads must never lag, such as the anonymous cart endpoints
+    and the catalog views, whose cache entries and ETags are keyed on a
+    version bumped at commit, set `read_from_replica = False`.
+    """
+
+    safe_methods = ("GET", "HEAD", "OPTIONS")
+    cookie_name = "db_primary"
+    key_prefix = "db:sticky"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sticky_seconds = getattr(settings, "DATABASE_REPLICA_STICKY_SECONDS", 5)
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, "DATABASE_REPLICA_STICKY_CACHE", "default")]
+
+    def __call__(self, request):
+        subject = self.get_subject(request)
+        writes = request.method not in self.safe_methods
+        pinned = (
+            writes
+            or self.cookie_name in request.COOKIES
+            or (subject is not None and self.cache.get(self.sticky_key(subject)))
+        )
+        token = use_primary.set(bool(pinned))
+        try:
+            response = self.get_response(request)
+        finally:
+            use_primary.reset(token)
+
+        if writes:
+            if subject is not None:
+                self.cache.set(self.sticky_key(subject), True, self.sticky_seconds)
+            else:
+                response.set_cookie(
+                    self.cookie_name, "1", max_age=self.sticky_seconds, httponly=True
+                )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, "cls", None)
+        if not getattr(view_class, "read_from_replica", True):
+            use_primary.set(True)
+
+    def get_subject(self, request):
+        header = request.META.get("HTTP_AUTHORIZATION", "").split()
+        if len(header) == 2 and header[0] in api_settings.AUTH_HEADER_TYPES:
+            try:
+                token = AccessToken(header[1])
+                return f"user:{token[api_settings.USER_ID_CLAIM]}"
+            except (TokenError, KeyError):
+                pass
+        session = getattr(request, "session", None)
+        if session is not None and session.session_key:
+            return f"session:{session.session_key}"
+        return None
+
+    def sticky_key(self, subject):
+        return f"{self.key_prefix}:{subject}"
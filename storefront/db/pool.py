@@ -0,0 +1,194 @@
+"""
+Process-wide database connection pools, used by the backends in
+storefront.db.backends. A database opts in with a "POOL" entry in its
+DATABASES settings:
+
+    "POOL": {"MIN_SIZE": 2, "MAX_SIZE": 20, "MAX_LIFETIME": 1800, "TIMEOUT": 10}
+
+Django still opens and closes its per-thread connection as usual (keep
+CONN_MAX_AGE at 0); closing hands the driver connection back to the pool
+and opening takes one out, so the network handshake and authentication are
+paid once per pooled connection instead of once per request.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """
+    A bounded, thread-safe pool of driver connections.
+
+    Idle connections are checked with `ping` when they are handed out and
+    are replaced once they are older than `max_lifetime` seconds. When all
+    `max_size` connections are in use, acquire() waits up to `timeout`
+    seconds before raising PoolTimeout.
+    """
+
+    def __init__(self, ping, min_size=0, max_size=10, max_lifetime=3600, timeout=30):
+        self.ping = ping
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self._idle = deque()  # (connection, created at)
+        self._created_at = {}  # id(connection) -> created at, for checked out ones
+        self._size = 0
+        self._condition = threading.Condition()
+        self._counters = {
+            "checkouts": 0,
+            "connects": 0,
+            "discarded": 0,
+            "waits": 0,
+            "timeouts": 0,
+        }
+
+    def acquire(self, connect):
+        """Return an open connection, creating one with `connect` if needed."""
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            self._counters["checkouts"] += 1
+            while True:
+                if self._idle:
+                    connection, created_at = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    connection = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"No database connection available within {self.timeout}s "
+                        f"(pool size {self.max_size})"
+                    )
+                self._counters["waits"] += 1
+                self._condition.wait(remaining)
+
+        if connection is not None and self._usable(connection, created_at):
+            self._created_at[id(connection)] = created_at
+            return connection
+        if connection is not None:
+            self._discard(connection, release_slot=False)
+        return self._connect(connect)
+
+    def release(self, connection, reset=False):
+        """
+        Return a connection to the pool. `reset` rolls back whatever
+        transaction was left open; a connection that fails that, or has
+        outlived max_lifetime, is closed instead.
+        """
+        created_at = self._created_at.pop(id(connection), time.monotonic())
+        if reset:
+            try:
+                connection.rollback()
+            except Exception:
+                self._discard(connection)
+                return
+        if time.monotonic() - created_at > self.max_lifetime:
+            self._discard(connection)
+            return
+        with self._condition:
+            self._idle.append((connection, created_at))
+            self._condition.notify()
+
+    def discard(self, connection):
+        """Close a checked-out connection instead of returning it."""
+        self._created_at.pop(id(connection), None)
+        self._discard(connection)
+
+    def fill(self, connect):
+        """Open connections until at least min_size exist."""
+        while True:
+            with self._condition:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            connection = self._connect(connect)
+            self.release(connection)
+
+    def close_all(self):
+        with self._condition:
+            idle, self._idle = list(self._idle), deque()
+        for connection, created_at in idle:
+            self._discard(connection)
+
+    def stats(self):
+        with self._condition:
+            idle = len(self._idle)
+            return {
+                "size": self._size,
+                "idle": idle,
+                "in_use": self._size - idle,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                **self._counters,
+            }
+
+    def _connect(self, connect):
+        try:
+            connection = connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._counters["connects"] += 1
+        self._created_at[id(connection)] = time.monotonic()
+        return connection
+
+    def _usable(self, connection, created_at):
+        if time.monotonic() - created_at > self.max_lifetime:
+            return False
+        try:
+            self.ping(connection)
+        except Exception:
+            return False
+        return True
+
+    def _discard(self, connection, release_slot=True):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._condition:
+            self._counters["discarded"] += 1
+            if release_slot:
+                self._size -= 1
+                self._condition.notify()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, options, ping):
+    # keyed on the pid so a forked worker never shares its parent's sockets
+    key = (alias, os.getpid())
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(
+                    ping,
+                    min_size=options.get("MIN_SIZE", 0),
+                    max_size=options.get("MAX_SIZE", 10),
+                    max_lifetime=options.get("MAX_LIFETIME", 3600),
+                    timeout=options.get("TIMEOUT", 30),
+                )
+    return pool
+
+
+def pool_stats():
+    pid = os.getpid()
+    return {alias: pool.stats() for (alias, p), pool in _pools.items() if p == pid}
@@ -0,0 +1,100 @@
+"""
+Read/write splitting between the primary ("default") and the read replicas
+named in settings.DATABASE_REPLICAS.
+
+Writes always go to the primary. Reads go to a healthy replica, round-robin,
+unless the current request is pinned to the primary (see
+storefront.db.middleware) or the primary has an open transaction, so that
+code inside transaction.atomic() reads what it is about to write.
+"""
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+# set by ReplicaRoutingMiddleware for the duration of a request
+use_primary = ContextVar("use_primary", default=False)
+
+
+class ReplicaSet:
+    """
+    Round-robin over the replica aliases, skipping any that failed a health
+    check within the last `check_interval` seconds.
+    """
+
+    def __init__(self, aliases, check_interval):
+        self.aliases = list(aliases)
+        self.check_interval = check_interval
+        self._cycle = itertools.cycle(self.aliases)
+        self._lock = threading.Lock()
+        self._status = {}  # alias -> (healthy, checked at)
+
+    def choose(self):
+        for _ in range(len(self.aliases)):
+            with self._lock:
+                alias = next(self._cycle)
+            if self.is_healthy(alias):
+                return alias
+        return None
+
+    def is_healthy(self, alias):
+        healthy, checked_at = self._status.get(alias, (True, None))
+        if checked_at is None or time.monotonic() - checked_at > self.check_interval:
+            healthy = self.check(alias)
+            self._status[alias] = (healthy, time.monotonic())
+        return healthy
+
+    def check(self, alias):
+        connection = connections[alias]
+        try:
+            connection.ensure_connection()
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return True
+        except DatabaseError:
+            # drop the broken connection so the next check reconnects
+            connection.close()
+            return False
+
+    def mark_unhealthy(self, alias):
+        self._status[alias] = (False, time.monotonic())
+
+    def status(self):
+        return {
+            alias: self._status.get(alias, (True, None))[0] for alias in self.aliases
+        }
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self.replicas = ReplicaSet(
+            getattr(settings, "DATABASE_REPLICAS", []),
+            getattr(settings, "DATABASE_REPLICA_HEALTH_CHECK_INTERVAL", 5),
+        )
+
+    def db_for_read(self, model, **hints):
+        if (
+            not self.replicas.aliases
+            or use_primary.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return self.replicas.choose() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *self.replicas.aliases}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas receive the schema through replication
+        if db in self.replicas.aliases:
+            return False
+        return None
@@ -0,0 +1,12 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .pool import pool_stats
+
+
+@api_view()
+@permission_classes([IsAdminUser])
+def pool_stats_view(request):
+    """Connection pool counters for this worker process, per database."""
+    return Response(pool_stats())
@@ -59,6 +59,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "storefront.db.middleware.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -94,16 +95,89 @@ WSGI_APPLICATION = "storefront.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# storefront.db.backends.mysql is Django's MySQL backend with the connection
+# pool from storefront/db/pool.py; remove "POOL" to connect per request.
+# Keep CONN_MAX_AGE at 0 so connections go back to the pool after each
+# request. MAX_SIZE bounds the connections of one worker process.
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.mysql",
+        "ENGINE": "storefront.db.backends.mysql",
         "NAME": "storefront2",
         "HOST": "localhost",
         "USER": "root",
         "PASSWORD": "zahid786",
+        "POOL": {"MIN_SIZE": 1, "MAX_SIZE": 20, "MAX_LIFETIME": 1800, "TIMEOUT": 10},
     }
 }
 
+# Read replicas: add their connections to DATABASES (with
+# "TEST": {"MIRROR": "default"}) and list the aliases here. Safe requests
+# then read from them, see storefront/db/routers.py. The sticky window should
+# exceed the replication lag.
+DATABASE_ROUTERS = ["storefront.db.routers.ReplicaRouter"]
+DATABASE_REPLICAS = []
+DATABASE_REPLICA_HEALTH_CHECK_INTERVAL = 5
+DATABASE_REPLICA_STICKY_SECONDS = 5
+DATABASE_REPLICA_STICKY_CACHE = "default"
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Point "default" (or STORE_CATALOG_CACHE) at
+# django.core.cache.backends.redis.RedisCache to share the catalog cache
+# between workers.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+STORE_CATALOG_CACHE = "default"
+STORE_CATALOG_CACHE_TIMEOUT = 300
+
+# serve product and cart item reads through the serializers compiled by
+# store.fast_serializers instead of DRF's field machinery
+STORE_FAST_SERIALIZERS = False
+
+# admin changelists with estimated counts, cached filtered counts and
+# seek paging (store.admin_performance); counts may lag by the TTL
+STORE_ADMIN_PERFORMANCE_MODE = True
+STORE_ADMIN_CACHE = "default"
+STORE_ADMIN_COUNT_TTL = 60
+
+# per-process user -> customer id cache (store.cache.customer_ids)
+STORE_CUSTOMER_CACHE_SIZE = 10000
+STORE_CUSTOMER_CACHE_TTL = 300
+
+# ?search= on /store/products/, through the MySQL FULLTEXT index (SQLite:
+# FTS5). store.search.InvertedIndexBackend keeps an index in each process
+# instead, built in the background at startup. Set to None for DRF's
+# SearchFilter.
+STORE_SEARCH_BACKEND = "store.search.DatabaseFullTextBackend"
+
+# order_created and other store signals are delivered through the outbox
+# table; see store/outbox.py and `manage.py dispatch_outbox`. A claimed batch
+# is retried by other workers if not delivered within STORE_OUTBOX_LEASE
+# seconds.
+STORE_OUTBOX_DISPATCH_ON_COMMIT = True
+STORE_OUTBOX_WORKERS = 1
+STORE_OUTBOX_BATCH_SIZE = 100
+STORE_OUTBOX_MAX_ATTEMPTS = 5
+STORE_OUTBOX_LEASE = 300
+
+# admin bulk actions run in primary-key chunks, one transaction each, on a
+# background thread pool; see store/bulk_actions.py and
+# `manage.py resume_bulk_actions`.
+STORE_BULK_ACTION_RUN_ON_COMMIT = True
+STORE_BULK_ACTION_WORKERS = 2
+STORE_BULK_ACTION_CHUNK_SIZE = 1000
+STORE_BULK_ACTION_STALE_AFTER = 60
+
+# rows per object in likes.LikeCounter; more shards spread concurrent likes
+# of one object over more row locks
+LIKES_COUNTER_SHARDS = 8
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -150,8 +224,16 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "COERCE_DECIMAL_TO_STRING": False,
-    "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+    "DEFAULT_AUTHENTICATION_CLASSES": ("core.authentication.ClaimsJWTAuthentication",),
+    # orjson when installed, DRF's stdlib JSON otherwise; see core.renderers
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "core.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ),
     # "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     # "PAGE_SIZE": 10,
@@ -165,6 +247,10 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
 }
 
+# Seconds for which core.authentication trusts a cached is_active/is_staff
+# instead of reading the user row.
+CORE_AUTH_STATUS_TTL = 30
+
 DJOSER = {
     "SERIALIZERS": {
         "user_create": "core.serializers.UserCreateSerializer",
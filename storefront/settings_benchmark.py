@@ -0,0 +1,18 @@
+"""
+Settings for `manage.py benchmark_api`, the other benchmarks and the tests on
+SQLite, without MySQL.
+
+    python manage.py benchmark_api --settings=storefront.settings_benchmark
+    python manage.py test --settings=storefront.settings_benchmark
+"""
+
+from .settings import *  # noqa
+
+DEBUG = False
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "benchmark.sqlite3",
+    }
+}
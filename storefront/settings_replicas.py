@@ -0,0 +1,26 @@
+"""
+Settings for trying the replica router locally with two SQLite files.
+
+    python manage.py migrate --settings=storefront.settings_replicas
+    cp primary.sqlite3 replica.sqlite3
+    python manage.py runserver --settings=storefront.settings_replicas
+
+Nothing replicates between the files, so rows written after the copy are
+only visible on the primary, which makes routing mistakes easy to spot.
+"""
+
+from .settings import *  # noqa
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "primary.sqlite3",
+    },
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "replica.sqlite3",
+        "TEST": {"MIRROR": "default"},
+    },
+}
+
+DATABASE_REPLICAS = ["replica"]
@@ -18,6 +18,10 @@ import debug_toolbar
 from django.contrib import admin
 from django.urls import include, path
 
+from core.views import TokenObtainPairView
+from store.views import cache_stats_view
+from storefront.db.views import pool_stats_view
+
 admin.site.site_header = "Storefront Administration"
 admin.site.index_title = "Admin Control Panel"
 
@@ -25,7 +29,12 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("playground/", include("playground.urls")),
     path("store/", include("store.urls")),
+    # before djoser's jwt/create so issued tokens carry the claims read by
+    # core.authentication.ClaimsJWTAuthentication
+    path("auth/jwt/create/", TokenObtainPairView.as_view(), name="jwt-create"),
     path("auth/", include("djoser.urls")),
     path("auth/", include("djoser.urls.jwt")),
     path("__debug__/", include(debug_toolbar.urls)),
+    path("__stats__/db-pools/", pool_stats_view),
+    path("__stats__/caches/", cache_stats_view),
 ]
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'storefront.settings')
 
 application = get_wsgi_application()
+
+# start building an in-process search index before the first request needs it
+from store.search import warm_up_search_backend  # noqa: E402
+
+warm_up_search_backend()
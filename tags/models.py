@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import connections, models, router, transaction
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
 
+from tags.signals import objects_tagged
+
 # Create your models here.
 
 
@@ -12,10 +14,100 @@ class Tag(models.Model):
         return self.label
 
 
+class TaggedItemManager(models.Manager):
+    """
+    Tag lookups for objects of one model. ContentType.objects.get_for_model
+    caches the content type per process, so none of these queries the
+    ContentType table more than once.
+    """
+
+    def get_tags_for(self, obj_type, obj_id):
+        content_type = ContentType.objects.get_for_model(obj_type)
+        return self.select_related("tag").filter(
+            content_type=content_type, object_id=obj_id
+        )
+
+    def get_tags_for_many(self, obj_type, obj_ids):
+        """Return {object id: [label, ...]} for `obj_ids` in one query."""
+        content_type = ContentType.objects.get_for_model(obj_type)
+        labels = {obj_id: [] for obj_id in obj_ids}
+        rows = (
+            self.filter(content_type=content_type, object_id__in=labels)
+            .order_by("tag__label")
+            .values_list("object_id", "tag__label")
+        )
+        for obj_id, label in rows:
+            labels[obj_id].append(label)
+        return labels
+
+    def attach_tags(self, obj_type, objects, attr="tags"):
+        """
+        Set each object's `attr` (or key, for values() rows) to its list of
+        labels, with one query for all of them.
+        """
+        objects = list(objects)
+        ids = [obj["id"] if isinstance(obj, dict) else obj.pk for obj in objects]
+        labels = self.get_tags_for_many(obj_type, ids)
+        for obj, obj_id in zip(objects, ids):
+            if isinstance(obj, dict):
+                obj[attr] = labels[obj_id]
+            else:
+                setattr(obj, attr, labels[obj_id])
+        return objects
+
+    def object_ids_tagged(self, obj_type, labels):
+        """
+        The ids of `obj_type` objects carrying any of `labels`, as a
+        subquery: filter(pk__in=...) is a semi-join, so an object with
+        several matching tags is returned once without DISTINCT.
+        """
+        content_type = ContentType.objects.get_for_model(obj_type)
+        # matching on tag ids lets the (tag, content_type, object_id) index
+        # answer the subquery on its own
+        tag_ids = Tag.objects.filter(label__in=labels).values("id")
+        return self.filter(content_type=content_type, tag__in=tag_ids).values(
+            "object_id"
+        )
+
+    def tag_many(self, tag, obj_type, obj_ids, batch_size=1000):
+        """
+        Tag the objects with `tag` and return the number of rows inserted.
+        The rows go straight to executemany, without building model
+        instances, so instead of post_save this sends objects_tagged once,
+        inside the same transaction.
+        """
+        content_type = ContentType.objects.get_for_model(obj_type)
+        connection = connections[router.db_for_write(self.model)]
+        quote = connection.ops.quote_name
+        columns = ", ".join(
+            quote(self.model._meta.get_field(name).column)
+            for name in ["tag", "content_type", "object_id"]
+        )
+        sql = (
+            f"INSERT INTO {quote(self.model._meta.db_table)} ({columns}) "
+            f"VALUES (%s, %s, %s)"
+        )
+        rows = [(tag.pk, content_type.pk, obj_id) for obj_id in obj_ids]
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            for start in range(0, len(rows), batch_size):
+                cursor.executemany(sql, rows[start : start + batch_size])
+            objects_tagged.send(self.model, obj_type=obj_type, object_ids=list(obj_ids))
+        return len(rows)
+
+
 class TaggedItem(models.Model):
+    objects = TaggedItemManager()
     tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
     # type of the content (video, article, product or music)
     # ID of the product
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey()
+
+    class Meta:
+        indexes = [
+            # get_tags_for_many: the tags of a batch of objects
+            models.Index(fields=["content_type", "object_id"]),
+            # object_ids_tagged: the objects carrying some tags
+            models.Index(fields=["tag", "content_type", "object_id"]),
+        ]
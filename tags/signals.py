@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# sent with obj_type= and object_ids= by TaggedItemManager.tag_many, whose
+# inserts bypass post_save
+objects_tagged = Signal()